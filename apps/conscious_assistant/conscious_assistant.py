@@ -1,10 +1,21 @@
-import os
+import queue
+import threading
+import time
+from collections import deque
 
-from neuro_san.client.agent_session_factory import AgentSessionFactory
-from neuro_san.client.streaming_input_processor import StreamingInputProcessor
+from coded_tools.agent_session_pool import get_agent_session_pool
+from coded_tools.agent_session_pool import new_agent_state_info
 
 AGENT_NETWORK_NAME = "conscious_agent"
 
+# Seconds between turns while the user is talking
+THINKING_INTERVAL = 1.0
+# Factor by which the interval grows with each turn the user stays silent, up to the ceiling
+IDLE_BACKOFF = 2.0
+MAX_IDLE_INTERVAL = 300.0
+# Tokens the turns the user did not prompt may spend in an hour, None for no limit
+TOKENS_PER_HOUR = 100000
+
 
 def set_up_conscious_assistant():
     """Configure these as needed."""
@@ -13,54 +24,37 @@ def set_up_conscious_assistant():
     host = "localhost"
     port = 30011
     local_externals_direct = False
-    metadata = {"user_id": os.environ.get("USER")}
 
-    # Create session factory and agent session
-    factory = AgentSessionFactory()
-    session = factory.create_session(connection, agent_name, host, port, local_externals_direct, metadata)
+    # Lease a warm agent session from the process-wide pool
+    session = get_agent_session_pool().acquire(agent_name, connection, host, port, local_externals_direct)
     # Initialize any conversation state here
-    conscious_thread = {
-        "last_chat_response": None,
-        "prompt": "Please enter your response ('quit' to terminate):\n",
-        "timeout": 5000.0,
-        "num_input": 0,
-        "user_input": None,
-        "sly_data": None,
-        "chat_filter": {"chat_filter_type": "MAXIMAL"},
-    }
+    conscious_thread = new_agent_state_info()
     return session, conscious_thread
 
 
-def conscious_thinker(conscious_session, conscious_thread, thoughts):
+def conscious_thinker(conscious_session, conscious_thread, thoughts, on_text=None):
     """
     Processes a single turn of user input within the conscious agent's session.
 
     This function simulates a conversational turn by:
-    1. Initializing a StreamingInputProcessor to handle the input.
-    2. Updating the agent's internal thread state with the user's input (`thoughts`).
-    3. Passing the updated thread to the processor for handling.
-    4. Extracting and returning the agent's response for this turn.
+    1. Updating the agent's internal thread state with the user's input (`thoughts`).
+    2. Passing the updated thread to the session's reusable input processor for handling.
+    3. Extracting and returning the agent's response for this turn.
 
     Parameters:
-        conscious_session: An active session object for the conscious agent.
+        conscious_session: A session to the conscious agent, leased from the session pool.
         conscious_thread (dict): The agent's current conversation thread state.
         thoughts (str): The user's input or query to be processed.
+        on_text (Callable): Optional function called with each part of the response as it streams in.
 
     Returns:
         tuple:
             - last_chat_response (str or None): The agent's response to the input.
             - conscious_thread (dict): The updated thread state after processing.
     """
-    # Use the processor (like in agent_cli.py)
-    input_processor = StreamingInputProcessor(
-        "DEFAULT",
-        "/tmp/agent_thinking.txt",  # Or wherever you want
-        conscious_session,
-        None,  # Not using a thinking_dir for simplicity
-    )
     # Update the conversation state with this turn's input
     conscious_thread["user_input"] = thoughts
-    conscious_thread = input_processor.process_once(conscious_thread)
+    conscious_thread = conscious_session.process_once(conscious_thread, on_text)
     # Get the agent response for this turn
     last_chat_response = conscious_thread.get("last_chat_response")
     return last_chat_response, conscious_thread
@@ -69,9 +63,154 @@ def conscious_thinker(conscious_session, conscious_thread, thoughts):
 def tear_down_conscious_assistant(conscious_session):
     """Tear down the assistant.
 
-    :param conscious_session: The pointer to the session.
+    :param conscious_session: The session leased from the session pool.
     """
     print("tearing down conscious assistant...")
-    conscious_session.close()
+    # Give the session back to the pool, which closes it once unused for a while
+    get_agent_session_pool().release(conscious_session)
     # client.assistants.delete(conscious_assistant_id)
     print("conscious assistant torn down.")
+
+
+class ThinkingScheduler:  # pylint: disable=too-many-instance-attributes
+    """
+    Decides when the conscious agent thinks next. While the user stays silent, the interval between
+    turns grows exponentially up to a ceiling, and the turns stop once they spent the hourly token
+    budget. A message from the user wakes the agent up right away and brings the interval back down.
+    Turns prompted by the user are always run, but their tokens count towards the budget.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        interval=THINKING_INTERVAL,
+        backoff=IDLE_BACKOFF,
+        max_idle_interval=MAX_IDLE_INTERVAL,
+        tokens_per_hour=TOKENS_PER_HOUR,
+        budget_window=3600.0,
+    ):
+        """
+        Args:
+            interval (float): Seconds between turns while the user is talking.
+            backoff (float): Factor by which the interval grows with each silent turn.
+            max_idle_interval (float): Ceiling of the interval between silent turns.
+            tokens_per_hour (int): Tokens silent turns may spend per budget window, None for no limit.
+            budget_window (float): Seconds over which the tokens spent are counted against the budget.
+        """
+        self.interval = interval
+        self.backoff = backoff
+        self.max_idle_interval = max_idle_interval
+        self.tokens_per_hour = tokens_per_hour
+        self.budget_window = budget_window
+        self.user_inputs = queue.Queue()
+        self.lock = threading.Lock()
+        # Seconds until the next silent turn
+        self.next_interval = interval
+        self.last_turn = time.monotonic()
+        # (time, tokens) of the turns within the budget window
+        self.spent = deque()
+        self.turns = 0
+        self.user_turns = 0
+        self.tokens = 0
+        self.idle_seconds = 0.0
+        self.deferred_turns = 0
+
+    def put_user_input(self, user_input):
+        """
+        Hands a message of the user to the agent, waking it up.
+
+        Args:
+            user_input (str): The message of the user.
+        """
+        self.user_inputs.put(user_input)
+
+    def wait(self):
+        """
+        Blocks until the next turn is due.
+
+        Returns:
+            List[str]: The messages the user sent since the last turn, empty for a silent turn.
+        """
+        start = time.monotonic()
+        try:
+            deferred = False
+            while True:
+                timeout = self.last_turn + self.next_interval - time.monotonic()
+                budget_freed = self.budget_freed_at()
+                if budget_freed is not None:
+                    deferred = True
+                    timeout = max(timeout, budget_freed - time.monotonic())
+                try:
+                    user_inputs = [self.user_inputs.get(timeout=max(timeout, 0.0))]
+                except queue.Empty:
+                    if self.budget_freed_at() is None:
+                        if deferred:
+                            with self.lock:
+                                self.deferred_turns += 1
+                        return []
+                    continue
+                while not self.user_inputs.empty():
+                    user_inputs.append(self.user_inputs.get_nowait())
+                return user_inputs
+        finally:
+            with self.lock:
+                self.idle_seconds += time.monotonic() - start
+
+    def record_turn(self, user_spoke, token_accounting=None):
+        """
+        Records a turn of the agent, and sets when the next silent turn is due.
+
+        Args:
+            user_spoke (bool): True if the user prompted the turn.
+            token_accounting (dict): The token accounting of the turn, as returned in the agent state.
+        """
+        tokens = int((token_accounting or {}).get("total_tokens") or 0)
+        now = time.monotonic()
+        with self.lock:
+            self.last_turn = now
+            self.turns += 1
+            self.tokens += tokens
+            self.spent.append((now, tokens))
+            if user_spoke:
+                self.user_turns += 1
+                self.next_interval = self.interval
+            else:
+                self.next_interval = min(self.next_interval * self.backoff, self.max_idle_interval)
+
+    def budget_freed_at(self):
+        """
+        Returns:
+            float or None: The monotonic time at which the tokens spent drop back under the budget,
+            None if they are under the budget already.
+        """
+        now = time.monotonic()
+        with self.lock:
+            while self.spent and self.spent[0][0] <= now - self.budget_window:
+                self.spent.popleft()
+            spent = sum(tokens for _, tokens in self.spent)
+            if self.tokens_per_hour is None or spent < self.tokens_per_hour:
+                return None
+            for when, tokens in self.spent:
+                spent -= tokens
+                if spent < self.tokens_per_hour:
+                    return when + self.budget_window
+            return now + self.budget_window
+
+    def metrics(self):
+        """
+        Returns:
+            dict: The turns run, how many the user prompted, the tokens spent in all and within the
+            budget window, the seconds spent waiting for the next turn, the silent turns the budget
+            delayed, and the current interval between silent turns.
+        """
+        self.budget_freed_at()
+        with self.lock:
+            return {
+                "turns": self.turns,
+                "user_turns": self.user_turns,
+                "idle_turns": self.turns - self.user_turns,
+                "tokens": self.tokens,
+                "tokens_last_hour": sum(tokens for _, tokens in self.spent),
+                "idle_seconds": round(self.idle_seconds, 3),
+                "deferred_turns": self.deferred_turns,
+                "idle_interval": self.next_interval,
+            }
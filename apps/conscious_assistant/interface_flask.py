@@ -1,19 +1,21 @@
 import atexit
 import os
-import queue
-import re
 import time
+import uuid
 from datetime import datetime
 
 # pylint: disable=import-error
 import schedule
 from flask import Flask
+from flask import jsonify
 from flask import render_template
 from flask_socketio import SocketIO
 
+from apps.conscious_assistant.conscious_assistant import ThinkingScheduler
 from apps.conscious_assistant.conscious_assistant import conscious_thinker
 from apps.conscious_assistant.conscious_assistant import set_up_conscious_assistant
 from apps.conscious_assistant.conscious_assistant import tear_down_conscious_assistant
+from apps.response_blocks import ResponseBlockStream
 
 os.environ["AGENT_MANIFEST_FILE"] = "registries/manifest.hocon"
 os.environ["AGENT_TOOL_PATH"] = "coded_tools"
@@ -22,72 +24,97 @@ app.config["SECRET_KEY"] = "secret!"
 socketio = SocketIO(app)
 thread_started = False  # pylint: disable=invalid-name
 
-user_input_queue = queue.Queue()
+scheduler = ThinkingScheduler()
 
 conscious_session, conscious_thread = set_up_conscious_assistant()
 
 
+class ThoughtEmitter:
+    """
+    Emits the thought and say blocks of one turn to the browser as they stream in. Each block gets
+    an id, so that the browser replaces what it showed of the block while it was being written.
+    """
+
+    def __init__(self):
+        self.turn_id = uuid.uuid4().hex
+        self.stream = ResponseBlockStream(kinds=("thought", "say"))
+        self.blocks = 0
+        self.streamed = False
+
+    def on_text(self, text):
+        """
+        Emits the blocks completed by the text streamed in, and the block being written.
+
+        :param text: The next part of the response
+        """
+        self.streamed = True
+        # The agent streams whole messages, so each one ends its last line
+        self.emit_blocks(self.stream.feed(text + "\n"))
+        partial = self.stream.partial()
+        if partial and partial[1]:
+            self.emit_block(partial[0], partial[1], "partial_")
+
+    def finish(self, response):
+        """
+        Emits the rest of the response once the turn is over.
+
+        :param response: The whole response
+        """
+        if self.streamed:
+            self.emit_blocks(self.stream.close())
+        else:
+            stream = ResponseBlockStream(kinds=("thought", "say"))
+            self.emit_blocks(stream.feed(response or "") + stream.close())
+
+    def emit_blocks(self, blocks):
+        """
+        :param blocks: The completed (block_type, content) tuples to emit
+        """
+        for kind, content in blocks:
+            if content:
+                self.emit_block(kind, content, "update_")
+            self.blocks += 1
+
+    def emit_block(self, kind, content, event_prefix):
+        """
+        Emits the block being written.
+
+        :param kind: "thought" or "say"
+        :param content: The content of the block
+        :param event_prefix: "update_" for a complete block, "partial_" for one still being written
+        """
+        block_id = f"{self.turn_id}-{self.blocks}"
+        if kind == "thought":
+            timestamp = datetime.now().strftime("[%I:%M:%S%p]").lower()
+            data = {"id": block_id, "data": f"{timestamp} thought: {content}"}
+            socketio.emit(event_prefix + "thoughts", data, namespace="/chat")
+        else:
+            socketio.emit(event_prefix + "speech", {"id": block_id, "data": content}, namespace="/chat")
+
+
 def conscious_thinking_process():
     """Main permanent agent-calling loop."""
     with app.app_context():  # Manually push the application context
         global conscious_thread  # pylint: disable=global-statement
         thoughts = "thought: hmm, let's see now..."
+        user_spoke = True
         while True:
-            socketio.sleep(1)
-
-            thoughts, conscious_thread = conscious_thinker(conscious_session, conscious_thread, thoughts)
-            print(thoughts)
-
-            # Separating thoughts and speeches
-            # Assume 'thoughts' is the string returned by conscious_thinker
-
-            thoughts_to_emit = []
-            speeches_to_emit = []
-
-            # --- 1.  Slice the input into blocks ----------------------------------------
-            #     Each block begins with  "thought:"  or  "say:"  and continues until
-            #     the next block or the end of the string.
-            pattern = re.compile(
-                r"(?m)^(thought|say):[ \t]*(.*?)(?=^\s*(?:thought|say):|\Z)", re.S  # look-ahead  # dot = newline
+            # Emit each thought and speech as soon as it is complete, and the one being written as it streams in
+            emitter = ThoughtEmitter()
+            thoughts, conscious_thread = conscious_thinker(
+                conscious_session, conscious_thread, thoughts, emitter.on_text
             )
-
-            for kind, raw in pattern.findall(thoughts):
-                content = raw.lstrip()  # drop the leading spaces/newline after the prefix
-                if not content:
-                    continue
-
-                if kind == "thought":
-                    timestamp = datetime.now().strftime("[%I:%M:%S%p]").lower()
-                    thoughts_to_emit.append(f"{timestamp} thought: {content}")
-                else:  # kind == "say"
-                    speeches_to_emit.append(content)
-
-            # --- 2.  Emit the blocks -----------------------------------------------------
-            if thoughts_to_emit:
-                socketio.emit(
-                    "update_thoughts",
-                    {"data": "\n".join(thoughts_to_emit)},
-                    namespace="/chat",
-                )
-
-            if speeches_to_emit:
-                socketio.emit(
-                    "update_speech",
-                    {"data": "\n".join(speeches_to_emit)},
-                    namespace="/chat",
-                )
-
+            print(thoughts)
+            emitter.finish(thoughts)
+            scheduler.record_turn(user_spoke, conscious_thread.get("token_accounting"))
+
+            # Sleep until the next turn is due, or the user says something
+            user_inputs = [user_input for user_input in scheduler.wait() if user_input]
+            if "exit" in user_inputs:
+                break
+            user_spoke = bool(user_inputs)
             timestamp = datetime.now().strftime("[%I:%M:%S%p]").lower()
-            thoughts = f"\n{timestamp} user: " + "[Silence]"
-            try:
-                user_input = user_input_queue.get(timeout=0.1)
-                if user_input:
-                    thoughts = f"\n{timestamp} user: " + user_input
-                if user_input == "exit":
-                    break
-            except queue.Empty:
-                time.sleep(0.1)
-                continue
+            thoughts = "".join(f"\n{timestamp} user: " + user_input for user_input in user_inputs or ["[Silence]"])
 
 
 @socketio.on("connect", namespace="/chat")
@@ -114,7 +141,7 @@ def handle_user_input(json, *_):
     :param json: A json object
     """
     user_input = json["data"]
-    user_input_queue.put(user_input)
+    scheduler.put_user_input(user_input)
     socketio.emit("update_user_input", {"data": user_input}, namespace="/chat")
 
 
@@ -132,6 +159,12 @@ def shutdown():
     return "Capture ended"
 
 
+@app.route("/metrics")
+def metrics():
+    """Return the metrics of the thinking loop."""
+    return jsonify(scheduler.metrics())
+
+
 @app.after_request
 def add_header(response):
     """Add the header."""
@@ -1,86 +1,81 @@
 import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 
-from neuro_san.client.agent_session_factory import AgentSessionFactory
-from neuro_san.client.streaming_input_processor import StreamingInputProcessor
 from pyhocon import ConfigFactory
 
+from apps.response_blocks import ResponseBlockStream
+from coded_tools.agent_session_pool import DEFAULT_MAX_SESSIONS
+from coded_tools.agent_session_pool import get_agent_session_pool
+from coded_tools.agent_session_pool import new_agent_state_info
+
 AGENT_NETWORK_NAME = "cruse_agent"
+CONNECTION = "direct"
+HOST = "localhost"
+PORT = 30011
+LOCAL_EXTERNALS_DIRECT = False
+
+# Conversations one cruse process holds at once, and seconds after which an idle one is dropped
+MAX_CONVERSATIONS = 64
+CONVERSATION_IDLE_TIMEOUT = 1800.0
 
+# Turns of different conversations run at the same time, at most, one per session of the pool
+CONVERSATION_WORKERS = DEFAULT_MAX_SESSIONS
 
-def set_up_cruse_assistant(selected_agent):
-    """Configure these as needed."""
-    agent_name = AGENT_NETWORK_NAME
-    connection = "direct"
-    host = "localhost"
-    port = 30011
-    local_externals_direct = False
-    metadata = {"user_id": os.environ.get("USER")}
-    selected_agent = "registries/" + selected_agent
+# Seconds to wait for the events sent along with the first one of a turn, e.g. the gui context
+# the browser emits right after the message it comes with
+COALESCE_SECONDS = 0.05
 
-    # Create session factory and agent session
-    factory = AgentSessionFactory()
-    session = factory.create_session(connection, agent_name, host, port, local_externals_direct, metadata)
-    sly_data = {"selected_agent": selected_agent, "agent_session": session}
 
+def new_cruse_state(selected_agent):
+    """
+    Args:
+        selected_agent (str): The hocon file of the agent network the cruse agent works with.
+
+    Returns:
+        dict: The state of a new conversation with the cruse agent.
+    """
     # Initialize any conversation state here
-    cruse_state_info = {
-        "last_chat_response": None,
-        "prompt": "Please enter your response ('quit' to terminate):\n",
-        "timeout": 5000.0,
-        "num_input": 0,
-        "user_input": None,
-        "sly_data": sly_data,
-        "chat_filter": {"chat_filter_type": "MAXIMAL"},
-    }
-    return session, cruse_state_info
-
-
-def cruse(cruse_session, cruse_state_info, user_input):
+    cruse_state_info = new_agent_state_info()
+    cruse_state_info["sly_data"] = {"selected_agent": "registries/" + selected_agent}
+    return cruse_state_info
+
+
+def cruse(cruse_state_info, user_input, on_text=None):
     """
     Processes a single turn of user input within the cruse_agent agent's session.
 
     This function simulates a conversational turn by:
-    1. Initializing a StreamingInputProcessor to handle the input.
-    2. Updating the agent's internal state with the user's input (`thoughts`).
-    3. Passing the updated state to the processor for handling.
+    1. Updating the agent's internal state with the user's input (`thoughts`).
+    2. Leasing a session to the cruse agent from the process-wide pool for the turn, so that the
+       conversations of all users share a bounded number of sessions.
+    3. Passing the updated state to the session's reusable input processor for handling.
     4. Extracting and returning the agent's response for this turn.
 
     Parameters:
-        cruse_session: An active session object for the cruse_agent agent.
         cruse_state_info (dict): The agent's current conversation state.
         user_input (str): The user's input or query to be processed.
+        on_text (Callable): Optional function called with each part of the response as it streams in.
 
     Returns:
         tuple:
             - last_chat_response (str or None): The agent's response to the input.
             - cruse_state_info (dict): The updated state after processing.
     """
-    # Use the processor (like in agent_cli.py)
-    input_processor = StreamingInputProcessor(
-        "DEFAULT",
-        "/tmp/agent_thinking.txt",  # Or wherever you want
-        cruse_session,
-        None,  # Not using a thinking_dir for simplicity
-    )
     # Update the conversation state with this turn's input
     cruse_state_info["user_input"] = user_input
-    cruse_state_info = input_processor.process_once(cruse_state_info)
+    with get_agent_session_pool().session(
+        AGENT_NETWORK_NAME, CONNECTION, HOST, PORT, LOCAL_EXTERNALS_DIRECT
+    ) as cruse_session:
+        cruse_state_info = cruse_session.process_once(cruse_state_info, on_text)
     # Get the agent response for this turn
     last_chat_response = cruse_state_info.get("last_chat_response")
     return last_chat_response, cruse_state_info
 
 
-def tear_down_cruse_assistant(cruse_session):
-    """Tear down the assistant.
-
-    :param cruse_session: The pointer to the session.
-    """
-    print("tearing down cruse_agent assistant...")
-    cruse_session.close()
-    # client.assistants.delete(cruse_assistant_id)
-    print("cruse_agent assistant torn down.")
-
-
 def get_available_systems():
     """
     Parses the HOCON manifest file specified by the AGENT_MANIFEST_FILE environment variable
@@ -114,29 +109,279 @@ def parse_response_blocks(response: str):
         List[Tuple[str, str]]: A list of (block_type, content) tuples, where block_type is
                                either 'say' or 'gui', and content is the corresponding block text.
     """
-    blocks = []
-    current_type = None
-    current_lines = []
-
-    for line in response.splitlines():
-        line = line.rstrip()
-
-        # Detect new block start
-        if line.lower().startswith("say:"):
-            if current_type:
-                blocks.append((current_type, "\n".join(current_lines).strip()))
-            current_type = "say"
-            current_lines = [line[4:].lstrip()]  # content on same line
-        elif line.lower().startswith("gui:"):
-            if current_type:
-                blocks.append((current_type, "\n".join(current_lines).strip()))
-            current_type = "gui"
-            current_lines = [line[4:].lstrip()]
-        else:
-            current_lines.append(line)
-
-    # Append the last block
-    if current_type and current_lines:
-        blocks.append((current_type, "\n".join(current_lines).strip()))
-
-    return blocks
+    stream = ResponseBlockStream()
+    return stream.feed(response) + stream.close()
+
+
+class AgentInbox:
+    """
+    Combined queue of the user inputs and gui context updates for the agent, which the agent loop
+    blocks on instead of polling.
+
+    Everything that arrives while the agent is busy with a turn is merged into the next turn: the
+    user inputs are joined, and the gui context updates, each a snapshot of the form fields, are
+    merged into one, the latest value of a field winning.
+    """
+
+    def __init__(self, coalesce_seconds=COALESCE_SECONDS):
+        """
+        Args:
+            coalesce_seconds (float): Seconds to wait for the events sent along with the first one of a turn.
+        """
+        self.events = queue.Queue()
+        self.coalesce_seconds = coalesce_seconds
+
+    def put_user_input(self, user_input):
+        """
+        Args:
+            user_input (str): A message of the user, "exit" to stop the agent loop.
+        """
+        self.events.put(("user_input", user_input))
+
+    def put_gui_context(self, gui_context):
+        """
+        Args:
+            gui_context (dict or str): The fields of the generated form.
+        """
+        self.events.put(("gui_context", gui_context))
+
+    def close(self):
+        """
+        Stop the agent loop once it is done with its current turn.
+        """
+        self.events.put(("exit", None))
+
+    def get(self, block=True):
+        """
+        Block until an event arrives, and merge it with the events already queued or arriving
+        within the coalescing delay.
+
+        Args:
+            block (bool): False to raise queue.Empty instead of blocking when no event is queued.
+
+        Returns:
+            tuple or None:
+                - user_input (str): The user inputs, one per line, or "" if there were none.
+                - gui_context (dict, str or None): The merged gui context updates, None if there were none.
+            or None once the inbox was closed or the user sent "exit".
+        """
+        batch = [self.events.get(block)]
+        deadline = time.monotonic() + self.coalesce_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.events.get(timeout=remaining) if remaining > 0 else self.events.get_nowait())
+            except queue.Empty:
+                break
+
+        user_inputs = []
+        gui_context = None
+        for kind, data in batch:
+            if kind == "exit" or (kind == "user_input" and data == "exit"):
+                return None
+            if kind == "user_input":
+                user_inputs.append(data)
+            elif isinstance(gui_context, dict) and isinstance(data, dict):
+                gui_context = {**gui_context, **data}
+            else:
+                gui_context = data
+        return "\n".join(user_inputs), gui_context
+
+
+class CruseConversation:  # pylint: disable=too-few-public-methods
+    """
+    The conversation of one browser page with the cruse agent: its state and its inbox.
+    The conversation holds no agent session between turns.
+    """
+
+    def __init__(self, conversation_id, selected_agent):
+        """
+        Args:
+            conversation_id (str): The id the browser page holds for the conversation.
+            selected_agent (str): The hocon file of the agent network the cruse agent works with.
+        """
+        self.conversation_id = conversation_id
+        self.state = new_cruse_state(selected_agent)
+        self.inbox = AgentInbox()
+        self.last_active = time.monotonic()
+        # True while a worker serves the conversation or is about to
+        self.scheduled = False
+        self.lock = threading.Lock()
+
+
+class CruseConversations:
+    """
+    The conversations of all browsers, served by a pool of workers. A conversation is
+    served by one worker at a time, so its turns stay in order, while turns of different
+    conversations run concurrently. Conversations are keyed by an id held by the browser, so they
+    outlive dropped socket connections, and conversations left idle are dropped.
+    """
+
+    def __init__(
+        self,
+        handle_turn,
+        max_conversations=MAX_CONVERSATIONS,
+        idle_timeout=CONVERSATION_IDLE_TIMEOUT,
+        workers=CONVERSATION_WORKERS,
+    ):
+        """
+        Args:
+            handle_turn (Callable): Function of a conversation, the user input and the gui context
+                of a turn, running the turn.
+            max_conversations (int): Conversations held at once, at most.
+            idle_timeout (float): Seconds after which a conversation without any input is dropped.
+            workers (int): Turns of different conversations run at the same time, at most.
+        """
+        self.handle_turn = handle_turn
+        self.max_conversations = max_conversations
+        self.idle_timeout = idle_timeout
+        self.conversations = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cruse-conversation")
+
+    def open(self, conversation_id, selected_agent):
+        """
+        Start a conversation, replacing any former one with the same id.
+
+        Args:
+            conversation_id (str): The id the browser page holds for the conversation.
+            selected_agent (str): The hocon file of the agent network the cruse agent works with.
+
+        Returns:
+            bool: False if max_conversations conversations are already open.
+        """
+        with self.lock:
+            self.evict_idle()
+            former = self.conversations.pop(conversation_id, None)
+            if former is not None:
+                former.inbox.close()
+            if len(self.conversations) >= self.max_conversations:
+                return False
+            self.conversations[conversation_id] = CruseConversation(conversation_id, selected_agent)
+            return True
+
+    def resume(self, conversation_id):
+        """
+        Keep a conversation going for a browser reconnecting to it.
+
+        Args:
+            conversation_id (str): The id the browser page holds for the conversation.
+
+        Returns:
+            bool: False if there is no such conversation, e.g. because it was dropped while idle.
+        """
+        with self.lock:
+            conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            return False
+        conversation.last_active = time.monotonic()
+        return True
+
+    def close(self, conversation_id):
+        """
+        End a conversation, once its current turn is done.
+
+        Args:
+            conversation_id (str): The id the browser page holds for the conversation.
+        """
+        with self.lock:
+            conversation = self.conversations.pop(conversation_id, None)
+        if conversation is not None:
+            conversation.inbox.close()
+
+    def close_all(self):
+        """
+        End all conversations.
+        """
+        with self.lock:
+            conversations = list(self.conversations.values())
+            self.conversations = {}
+        for conversation in conversations:
+            conversation.inbox.close()
+
+    def put_user_input(self, conversation_id, user_input):
+        """
+        Args:
+            conversation_id (str): The id the browser page holds for the conversation.
+            user_input (str): A message of the user.
+
+        Returns:
+            bool: False if there is no such conversation.
+        """
+        return self.put(conversation_id, AgentInbox.put_user_input, user_input)
+
+    def put_gui_context(self, conversation_id, gui_context):
+        """
+        Args:
+            conversation_id (str): The id the browser page holds for the conversation.
+            gui_context (dict or str): The fields of the generated form.
+
+        Returns:
+            bool: False if there is no such conversation.
+        """
+        return self.put(conversation_id, AgentInbox.put_gui_context, gui_context)
+
+    def put(self, conversation_id, put_event, data):
+        """
+        Queue an event in the inbox of a conversation, and make sure a worker serves it.
+
+        Args:
+            conversation_id (str): The id the browser page holds for the conversation.
+            put_event (Callable): The AgentInbox method queueing the event.
+            data: The event.
+
+        Returns:
+            bool: False if there is no such conversation.
+        """
+        with self.lock:
+            conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            return False
+        conversation.last_active = time.monotonic()
+        put_event(conversation.inbox, data)
+        with conversation.lock:
+            if conversation.scheduled:
+                return True
+            conversation.scheduled = True
+        self.executor.submit(self.serve, conversation)
+        return True
+
+    def serve(self, conversation):
+        """
+        Run the turns of a conversation until its inbox is empty, in a worker.
+
+        Args:
+            conversation (CruseConversation): A conversation with events in its inbox.
+        """
+        while True:
+            try:
+                message = conversation.inbox.get(block=False)
+            except queue.Empty:
+                with conversation.lock:
+                    # An event queued after the inbox was found empty found the conversation
+                    # still scheduled, so it must be served here
+                    if conversation.inbox.events.empty():
+                        conversation.scheduled = False
+                        return
+                continue
+            if message is None:
+                # Closed: leave it scheduled, so no worker serves it again
+                return
+            user_input, gui_context = message
+            try:
+                self.handle_turn(conversation, user_input, gui_context)
+            except Exception:  # pylint: disable=broad-exception-caught
+                print(f"Turn of conversation {conversation.conversation_id} failed:")
+                traceback.print_exc()
+            conversation.last_active = time.monotonic()
+
+    def evict_idle(self):
+        """
+        Drop the conversations without input for longer than the idle timeout. Must be called with the lock held.
+        """
+        now = time.monotonic()
+        for conversation_id, conversation in list(self.conversations.items()):
+            if not conversation.scheduled and now - conversation.last_active > self.idle_timeout:
+                print(f"Dropping idle conversation {conversation_id}")
+                del self.conversations[conversation_id]
+                conversation.inbox.close()
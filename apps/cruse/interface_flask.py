@@ -1,19 +1,22 @@
 import atexit
 import os
-import queue
+import re
+import uuid
 
 # pylint: disable=import-error
 import schedule
 from flask import Flask
 from flask import jsonify
 from flask import render_template
+from flask import request
 from flask_socketio import SocketIO
+from flask_socketio import join_room
 
+from apps.cruse.cruse_assistant import CruseConversations
 from apps.cruse.cruse_assistant import cruse
 from apps.cruse.cruse_assistant import get_available_systems
 from apps.cruse.cruse_assistant import parse_response_blocks
-from apps.cruse.cruse_assistant import set_up_cruse_assistant
-from apps.cruse.cruse_assistant import tear_down_cruse_assistant
+from apps.response_blocks import ResponseBlockStream
 
 os.environ["AGENT_MANIFEST_FILE"] = "registries/manifest.hocon"
 os.environ["AGENT_TOOL_PATH"] = "coded_tools"
@@ -21,74 +24,142 @@ os.environ["AGENT_TOOL_PATH"] = "coded_tools"
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "secret!"
 socketio = SocketIO(app, ping_timeout=360, ping_interval=25)
-thread_started = False  # pylint: disable=invalid-name
 
-user_input_queue = queue.Queue()
-gui_context_queue = queue.Queue()
+# Conversation ids sent by the browsers, which generate them at random
+CONVERSATION_ID_PATTERN = re.compile(r"[A-Za-z0-9-]{16,64}")
 
-cruse_session, cruse_agent_state = set_up_cruse_assistant(get_available_systems()[0])
 
+class ResponseEmitter:
+    """
+    Emits the blocks of the response of one turn to the browser as they stream in. Each say block
+    gets an id, so that the browser replaces the speech shown while it was being written.
+    """
 
-def cruse_thinking_process():
-    """Main permanent agent-calling loop."""
-    with app.app_context():
-        global cruse_agent_state  # pylint: disable=global-statement
-        user_input = ""
-
-        while True:
-            socketio.sleep(1)
-            try:
-                gui_context = gui_context_queue.get_nowait()
-            except queue.Empty:
-                gui_context = ""
-
-            if user_input or gui_context:
-
-                print(f"USER INPUT:{user_input}\n\nGUI CONTEXT:{gui_context}\n")
-                response, cruse_agent_state = cruse(cruse_session, cruse_agent_state, user_input + str(gui_context))
-                print(response)
-
-                blocks = parse_response_blocks(response)
-
-                gui_to_emit = []
-                speeches_to_emit = []
+    def __init__(self, conversation_id):
+        """
+        Args:
+            conversation_id (str): The id of the conversation, held by its browser page, which is also
+                the room of the sockets of the page.
+        """
+        self.conversation_id = conversation_id
+        self.turn_id = uuid.uuid4().hex
+        self.stream = ResponseBlockStream()
+        self.blocks = 0
+        self.gui = []
+        self.streamed = False
+
+    def on_text(self, text):
+        """
+        Emits the blocks completed by the text streamed in, and the speech being written.
+
+        Args:
+            text (str): The next part of the response.
+        """
+        self.streamed = True
+        # The agent streams whole messages, so each one ends its last line
+        self.emit_blocks(self.stream.feed(text + "\n"))
+        partial = self.stream.partial()
+        if partial and partial[0] == "say" and partial[1]:
+            self.emit("partial_speech", {"id": self.block_id(), "data": partial[1]})
+
+    def finish(self, response):
+        """
+        Emits the rest of the response once the turn is over.
+
+        Args:
+            response (str): The whole response.
+        """
+        if self.streamed:
+            self.emit_blocks(self.stream.close())
+        else:
+            self.emit_blocks(parse_response_blocks(response))
+        # fallback if nothing was matched
+        if not self.blocks and response.strip():
+            self.emit("update_speech", {"id": self.block_id(), "data": response.strip()})
+
+    def emit_blocks(self, blocks):
+        """
+        Args:
+            blocks (List[Tuple[str, str]]): The completed (block_type, content) tuples to emit.
+        """
+        for kind, content in blocks:
+            if content and kind == "gui":
+                self.gui.append(content)
+                self.emit("update_gui", {"data": "\n".join(self.gui)})
+            elif content and kind == "say":
+                self.emit("update_speech", {"id": self.block_id(), "data": content})
+            self.blocks += 1
+
+    def block_id(self):
+        """
+        Returns:
+            str: The id of the block being written.
+        """
+        return f"{self.turn_id}-{self.blocks}"
+
+    def emit(self, event, data):
+        """
+        Emits an event to the browser of the conversation.
+        """
+        socketio.emit(event, data, to=self.conversation_id, namespace="/chat")
+
+
+def cruse_thinking_process(conversation, user_input, gui_context):
+    """
+    Run one turn of the conversation of a browser, in a worker of the conversations.
 
-                for kind, content in blocks:
-                    if not content:
-                        continue
-                    if kind == "gui":
-                        gui_to_emit.append(content)
-                    elif kind == "say":
-                        speeches_to_emit.append(content)
+    Args:
+        conversation (CruseConversation): The conversation of the browser.
+        user_input (str): The user inputs sent since the last turn.
+        gui_context (dict, str or None): The gui context sent since the last turn.
+    """
+    with app.app_context():
+        if user_input or gui_context:
+            gui_context = str(gui_context) if gui_context else ""
+            print(f"USER INPUT:{user_input}\n\nGUI CONTEXT:{gui_context}\n")
+            emitter = ResponseEmitter(conversation.conversation_id)
+            response, conversation.state = cruse(conversation.state, user_input + gui_context, emitter.on_text)
+            print(response)
+            emitter.finish(response)
 
-                # fallback if nothing was matched
-                if not blocks and response.strip():
-                    speeches_to_emit.append(response.strip())
 
-                if gui_to_emit:
-                    socketio.emit("update_gui", {"data": "\n".join(gui_to_emit)}, namespace="/chat")
+conversations = CruseConversations(cruse_thinking_process)
 
-                if speeches_to_emit:
-                    socketio.emit("update_speech", {"data": "\n".join(speeches_to_emit)}, namespace="/chat")
 
-            try:
-                user_input = user_input_queue.get_nowait()
-                if user_input == "exit":
-                    break
-            except queue.Empty:
-                user_input = ""
-                socketio.sleep(1)
-                continue
+def get_conversation_id():
+    """
+    Returns:
+        str: The conversation id the browser page sent when connecting its socket, or the socket id
+            if it sent none, so that a reconnecting socket resumes the conversation of the page.
+    """
+    conversation_id = request.args.get("conversation_id", "")
+    if CONVERSATION_ID_PATTERN.fullmatch(conversation_id):
+        return conversation_id
+    return request.sid
 
 
 @socketio.on("connect", namespace="/chat")
 def on_connect():
-    """Start background task on connect."""
-    global thread_started  # pylint: disable=global-statement
-    if not thread_started:
-        thread_started = True
-        # let socketio manage the green-thread
-        socketio.start_background_task(cruse_thinking_process)
+    """
+    Resume the conversation of the browser page, or start one, refusing the connection if the server is full.
+    """
+    conversation_id = get_conversation_id()
+    if not conversations.resume(conversation_id) and not conversations.open(
+        conversation_id, get_available_systems()[0]
+    ):
+        print(f"Refusing connection {request.sid}: too many conversations")
+        return False
+    join_room(conversation_id)
+    return True
+
+
+@socketio.on("disconnect", namespace="/chat")
+def on_disconnect(*_):
+    """
+    Keep the conversation of the browser page, which a reconnecting socket resumes.
+    Conversations that are not resumed are dropped once idle.
+    """
+    print(f"Socket {request.sid} of conversation {get_conversation_id()} disconnected")
 
 
 @app.route("/")
@@ -105,8 +176,9 @@ def handle_user_input(json, *_):
     :param json: A json object
     """
     user_input = json["data"]
-    user_input_queue.put(user_input)
-    socketio.emit("update_user_input", {"data": user_input}, namespace="/chat")
+    conversation_id = get_conversation_id()
+    conversations.put_user_input(conversation_id, user_input)
+    socketio.emit("update_user_input", {"data": user_input}, to=conversation_id, namespace="/chat")
 
 
 @socketio.on("gui_context", namespace="/chat")
@@ -117,21 +189,24 @@ def handle_gui_context(json, *_):
     :param json: A json object
     """
     gui_context = json["gui_context"]
-    gui_context_queue.put(gui_context)
-    socketio.emit("gui_context_input", {"gui_context": gui_context}, namespace="/chat")
+    conversation_id = get_conversation_id()
+    conversations.put_gui_context(conversation_id, gui_context)
+    socketio.emit("gui_context_input", {"gui_context": gui_context}, to=conversation_id, namespace="/chat")
 
 
 def cleanup():
     """Tear things down on exit."""
     print("Bye!")
-    tear_down_cruse_assistant(cruse_session)
+    conversations.close_all()
     socketio.stop()
 
 
 @app.route("/shutdown")
 def shutdown():
-    """Shut down process."""
-    cleanup()
+    """
+    Called by a browser leaving the page. The server keeps serving the other browsers, and the
+    conversation of the leaving one is dropped once idle.
+    """
     return "Capture ended"
 
 
@@ -190,19 +265,16 @@ def handle_new_chat(data, *args):
 
     Side Effects:
     ------------
-    - Tears down the existing Cruse assistant session.
-    - Sets up a new session and updates the global `cruse_session` and `cruse_agent_state`.
+    - Starts a new conversation for the browser that sent the event, dropping its former one.
     - Prints diagnostic messages to the console.
 
     Notes:
     -----
     - If no valid agent is found and no available systems are returned, the function exits early.
-    - Relies on global variables: `cruse_session`, `cruse_agent_state`.
+    - The conversations of the other browsers are not affected.
 
     """
     del args
-    # pylint: disable=global-statement
-    global cruse_session, cruse_agent_state
 
     if isinstance(data, dict):
         selected_agent = data.get("system")
@@ -222,8 +294,7 @@ def handle_new_chat(data, *args):
 
     print(f"Resetting session for new chat... Selected agent is: {selected_agent}")
 
-    tear_down_cruse_assistant(cruse_session)
-    cruse_session, cruse_agent_state = set_up_cruse_assistant(selected_agent)
+    conversations.open(get_conversation_id(), selected_agent)
 
     print("****New chat started****")
 
@@ -1,9 +1,19 @@
+import csv
+import hashlib
+import itertools
 import json
+import math
 import os
 import re
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-from neuro_san.client.agent_session_factory import AgentSessionFactory
-from neuro_san.client.streaming_input_processor import StreamingInputProcessor
+import numpy as np
+
+from coded_tools.agent_session_pool import get_agent_session_pool
+from coded_tools.agent_session_pool import new_agent_state_info
 
 AGENT_THINKING_LOGS_DIRECTORY = "/private/tmp/agent_thinking"
 
@@ -11,6 +21,82 @@ AGENT_NETWORK_NAME = "log_analysis_agents"
 os.environ["AGENT_MANIFEST_FILE"] = "registries/manifest.hocon"
 os.environ["AGENT_TOOL_PATH"] = "coded_tools"
 
+# Entries analyzed concurrently, each worker with its own agent session
+ANALYSIS_WORKERS = 4
+
+# Results of the analysis, one JSON line per entry, in log order. A rerun skips the entries
+# already in this file, so an interrupted analysis resumes where it stopped.
+ANALYSIS_CHECKPOINT_FILE = "log_analysis_results.jsonl"
+
+# Token usage of every entry and per agent, extracted from the logs without any LLM, as CSV,
+# or Parquet if the file name ends with ".parquet"
+TOKEN_USAGE_FILE = "log_token_usage.csv"
+TOKEN_SUMMARY_FILE = "log_token_summary.csv"
+
+# Send only the entries whose token usage or time is an outlier for their agent to the analysis agent
+ANALYZE_OUTLIERS_ONLY = False
+
+# Tokens of the entries of a log file sent to the analysis agent in one request, after the system
+# prompt of the file, which is then sent once per request instead of once per entry.
+# None sends one request per entry.
+ANALYSIS_BATCH_TOKENS = 8000
+CHARS_PER_TOKEN = 4
+
+# Pre-filtering of the entries before any LLM call: only the entries of these agents, only the
+# entries containing one of these markers, e.g. ("error", "exception", "traceback"), and only the
+# entries using at least this many tokens. None keeps all entries.
+FILTER_AGENTS = None
+FILTER_ERROR_MARKERS = None
+FILTER_MIN_TOTAL_TOKENS = None
+
+# Entries whose word shingles are at least this similar to those of an earlier entry are skipped
+DEDUP_THRESHOLD = 0.9
+
+# Labels of the sections of a thinking log
+HUMAN_LABEL = "[HUMAN]"
+AI_LABEL = "[AI]"
+AGENT_LABEL = "[AGENT]"
+SYSTEM_LABEL = "[SYSTEM]"
+LABEL_PATTERN = re.compile(r"\[(?:HUMAN|AI|AGENT|SYSTEM)]")
+
+# Characters of a log read at once by the streaming parser
+LOG_BLOCK_SIZE = 1 << 20
+
+# Token fields of the metadata an [AGENT] section ends a conversation entry with
+METADATA_FIELDS = ("completion_tokens", "prompt_tokens", "total_tokens")
+
+# Start of the first line of a thinking log, naming the agent the log is about
+AGENT_NAME_PREFIX = "Agent:"
+
+# Usage fields of the metadata, and the columns of the token usage tables
+USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens", "time_taken_in_seconds", "total_cost")
+ENTRY_COLUMNS = ("file", "agent", "entry") + USAGE_FIELDS
+SUMMARY_COLUMNS = (
+    "agent",
+    "calls",
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "total_cost",
+    "mean_tokens",
+    "p95_tokens",
+    "mean_seconds",
+    "p95_seconds",
+    "max_seconds",
+)
+
+# Entries using more tokens or time than this percentile of their agent are outliers
+OUTLIER_PERCENTILE = 0.95
+# Agents with fewer calls have all their entries analyzed, as their percentiles mean little
+OUTLIER_MIN_CALLS = 20
+
+# MinHash signatures of entries: words per shingle, hash functions, and bands of the locality
+# sensitive hashing bucketing the signatures, with MINHASH_PERMUTATIONS / MINHASH_BANDS rows each
+SHINGLE_WORDS = 5
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+MINHASH_PRIME = (1 << 32) - 5
+
 
 def set_up_log_analyzer():
     """Configure these as needed."""
@@ -19,21 +105,12 @@ def set_up_log_analyzer():
     host = "localhost"
     port = 30011
     local_externals_direct = False
-    metadata = {"user_id": os.environ.get("USER")}
 
-    # Create session factory and agent session
-    factory = AgentSessionFactory()
-    session = factory.create_session(connection, agent_name, host, port, local_externals_direct, metadata)
+    # Lease a warm agent session from the process-wide pool
+    session = get_agent_session_pool().acquire(agent_name, connection, host, port, local_externals_direct)
     # Initialize any conversation state here
-    analysis_thread = {
-        "last_chat_response": None,
-        "prompt": "Analyze the agent log\n",
-        "timeout": 5000.0,
-        "num_input": 0,
-        "user_input": None,
-        "sly_data": None,
-        "chat_filter": {"chat_filter_type": "MAXIMAL"},
-    }
+    analysis_thread = new_agent_state_info()
+    analysis_thread["prompt"] = "Analyze the agent log\n"
     return session, analysis_thread
 
 
@@ -42,13 +119,12 @@ def log_analyzer_agent(analysis_session, analysis_thread, log_entry):
     Processes a single turn of user input within the analysis agent's session.
 
     This function simulates a conversational turn by:
-    1. Initializing a StreamingInputProcessor to handle the input.
-    2. Updating the agent's internal thread state with the user's input (`log_entry`).
-    3. Passing the updated thread to the processor for handling.
-    4. Extracting and returning the agent's response for this turn.
+    1. Updating the agent's internal thread state with the user's input (`log_entry`).
+    2. Passing the updated thread to the session's reusable input processor for handling.
+    3. Extracting and returning the agent's response for this turn.
 
     Parameters:
-        analysis_session: An active session object for the analysis agent.
+        analysis_session: A session to the analysis agent, leased from the session pool.
         analysis_thread (dict): The agent's current conversation thread state.
         log_entry (str): The user's input or query to be processed.
 
@@ -57,16 +133,9 @@ def log_analyzer_agent(analysis_session, analysis_thread, log_entry):
             - last_chat_response (str or None): The agent's response to the input.
             - analysis_thread (dict): The updated thread state after processing.
     """
-    # Use the processor (like in agent_cli.py)
-    input_processor = StreamingInputProcessor(
-        "DEFAULT",
-        "/tmp/agent_thinking.txt",  # Or wherever you want
-        analysis_session,
-        None,  # Not using a thinking_dir for simplicity
-    )
     # Update the conversation state with this turn's input
     analysis_thread["user_input"] = log_entry
-    analysis_thread = input_processor.process_once(analysis_thread)
+    analysis_thread = analysis_session.process_once(analysis_thread)
     # Get the agent response for this turn
     last_chat_response = analysis_thread.get("last_chat_response")
     return last_chat_response, analysis_thread
@@ -75,10 +144,11 @@ def log_analyzer_agent(analysis_session, analysis_thread, log_entry):
 def tear_down_analysis_assistant(analysis_session):
     """Tear down the assistant.
 
-    :param analysis_session: The pointer to the session.
+    :param analysis_session: The session leased from the session pool.
     """
     print("tearing down analysis assistant...")
-    analysis_session.close()
+    # Give the session back to the pool, which closes it once unused for a while
+    get_agent_session_pool().release(analysis_session)
     # client.assistants.delete(analysis_assistant_id)
     print("analysis assistant torn down.")
 
@@ -102,22 +172,12 @@ def parse_log_files(directory_path, log_analyzer, analysis_session, analysis_thr
         print(f"Processing file: {log_file}")
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            # Extract system prompt
-            system_prompt = extract_system_prompt(content)
-
-            # Extract conversation entries
-            conversation_entries = extract_conversation_entries(content)
-
-            # Process each conversation entry
-            for log_entry in conversation_entries:
-                if log_entry.strip():  # Skip empty entries
-                    analysis, analysis_thread = log_analyzer(
-                        analysis_session, analysis_thread, system_prompt + " " + log_entry
-                    )
-                    print(analysis)
+            # Process each conversation entry as it is read
+            for system_prompt, log_entry in iter_log_entries(file_path):
+                analysis, analysis_thread = log_analyzer(
+                    analysis_session, analysis_thread, system_prompt + " " + log_entry
+                )
+                print(analysis)
 
         except (FileNotFoundError, UnicodeDecodeError, IOError) as e:
             print(f"Error processing file {file_path}: {str(e)}")
@@ -128,6 +188,647 @@ def parse_log_files(directory_path, log_analyzer, analysis_session, analysis_thr
             raise  # Or use logging framework to log full traceback
 
 
+def read_blocks(f, block_size=LOG_BLOCK_SIZE):
+    """
+    Read a file in blocks of text.
+
+    Args:
+        f: An open text file
+        block_size (int): Characters per block
+
+    Yields:
+        str: Each block of the file
+    """
+    return iter(lambda: f.read(block_size), "")
+
+
+def iter_log_sections(blocks):
+    """
+    Split a log into its labeled sections in a single pass, without holding more than a block
+    and one section in memory. Text before the first label and sections without text are skipped.
+
+    Args:
+        blocks: Iterable of consecutive blocks of text of a log, e.g. from read_blocks()
+
+    Yields:
+        tuple:
+            - label (str): The label of the section, e.g. "[HUMAN]"
+            - text (str): The stripped text following the label, up to the next label
+    """
+    label = None
+    buffer = []
+    carry = ""
+    for block in itertools.chain(blocks, [None]):
+        if block is None:
+            # The last line of the log
+            block, cut = carry, len(carry)
+        else:
+            # Labels never span lines, so a block is scanned up to its last newline
+            block = carry + block
+            cut = block.rfind("\n") + 1
+        carry = block[cut:]
+        start = 0
+        for match in LABEL_PATTERN.finditer(block, 0, cut):
+            buffer.append(block[start : match.start()])
+            text = "".join(buffer).strip()
+            if label is not None and text:
+                yield label, text
+            buffer = []
+            label = match.group(0)
+            start = match.end()
+        buffer.append(block[start:cut])
+
+    text = "".join(buffer).strip()
+    if label is not None and text:
+        yield label, text
+
+
+def iter_conversation_entries(sections):
+    """
+    Group the sections of a log into conversation entries, from a [HUMAN] section to the next
+    [AI] section plus the following [AGENT] metadata, as they are read.
+
+    Args:
+        sections: Iterable of the (label, text) sections of a log
+
+    Yields:
+        str: Each conversation entry
+    """
+    entry_parts = None
+    seen_ai = False
+    for label, text in sections:
+        if entry_parts is not None and seen_ai:
+            # The entry ends after its [AI] section, with the [AGENT] metadata if that comes next
+            is_metadata = label == AGENT_LABEL and is_json_metadata(text)
+            if is_metadata:
+                entry_parts.append(f"{label}:\n{text}")
+            yield "\n".join(entry_parts)
+            entry_parts = None
+            if is_metadata:
+                continue
+
+        if entry_parts is None:
+            if label == HUMAN_LABEL:
+                entry_parts = [f"{label}:\n{text}"]
+                seen_ai = False
+        else:
+            entry_parts.append(f"{label}:\n{text}")
+            seen_ai = label == AI_LABEL
+
+    # At least HUMAN and AI, or whatever followed the last HUMAN
+    if entry_parts is not None and len(entry_parts) >= 2:
+        yield "\n".join(entry_parts)
+
+
+def iter_log_entries(file_path):
+    """
+    Read the conversation entries of a log file incrementally, so that logs of any size are
+    parsed in bounded memory.
+
+    Args:
+        file_path (str): Path of the log file
+
+    Yields:
+        tuple:
+            - system_prompt (str): The [SYSTEM] section read so far, usually from the head of the log
+            - log_entry (str): A conversation entry
+    """
+    system_prompt = ""
+
+    def watch_system_prompt(sections):
+        nonlocal system_prompt
+        for label, text in sections:
+            if label == SYSTEM_LABEL and not system_prompt:
+                system_prompt = section_body(text)
+            yield label, text
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        for log_entry in iter_conversation_entries(watch_system_prompt(iter_log_sections(read_blocks(f)))):
+            yield system_prompt, log_entry
+
+
+def iter_directory_log_entries(directory_path):
+    """
+    Read the conversation entries of all log files in a directory, in file name order.
+
+    Args:
+        directory_path (str): Path to directory containing log files
+
+    Yields:
+        tuple:
+            - file_path (str): Path of the log file of the entry
+            - index (int): Index of the entry within its log file
+            - system_prompt (str): The system prompt of the log file
+            - log_entry (str): The entry
+    """
+    for log_file in sorted(os.listdir(directory_path)):
+        file_path = os.path.join(directory_path, log_file)
+        if not os.path.isfile(file_path):
+            continue
+        try:
+            for index, (system_prompt, log_entry) in enumerate(iter_log_entries(file_path)):
+                yield file_path, index, system_prompt, log_entry
+        except (UnicodeDecodeError, IOError) as e:
+            print(f"Error processing file {file_path}: {str(e)}")
+
+
+def iter_directory_entries(directory_path, done=None, selected=None, entry_filter=None):
+    """
+    Read the conversation entries of all log files in a directory that are to be analyzed.
+
+    Args:
+        directory_path (str): Path to directory containing log files
+        done (set): (file path, entry index) of the entries to skip, e.g. as already analyzed
+        selected (dict): (file path, entry index) of the only entries to analyze, to a note
+            preceding the entry, e.g. as returned by find_outliers(), or None for all entries
+        entry_filter (LogEntryFilter): Filter of the entries to analyze, or None for all entries
+
+    Yields:
+        tuple:
+            - file_path (str): Path of the log file of the entry
+            - index (int): Index of the entry within its log file
+            - system_prompt (str): The system prompt of the log file
+            - text (str): The note, if any, and the entry
+    """
+    done = done or set()
+    agent = None
+    agent_file = None
+    for file_path, index, system_prompt, log_entry in iter_directory_log_entries(directory_path):
+        key = (file_path, index)
+        if selected is not None and key not in selected:
+            continue
+        if entry_filter is not None:
+            if file_path != agent_file:
+                agent, agent_file = read_agent_name(file_path), file_path
+            # Entries already analyzed are filtered too, so a resumed run drops the same duplicates
+            if not entry_filter.accept(agent, log_entry):
+                continue
+        if key in done:
+            continue
+        if selected is not None:
+            log_entry = selected[key] + "\n" + log_entry
+        yield file_path, index, system_prompt, log_entry
+
+
+def iter_analysis_requests(entries, batch_tokens=None):
+    """
+    Group consecutive entries of the same log file into the requests sent to the analysis agent,
+    so that the system prompt of the file is sent once per request rather than once per entry.
+
+    Args:
+        entries: Iterable of the (file path, entry index, system prompt, text) of the entries
+        batch_tokens (int): Estimated tokens of the entries of a request, or None for one request per entry
+
+    Yields:
+        tuple:
+            - file_path (str): Path of the log file of the entries
+            - indexes (list): Indexes of the entries within their log file
+            - combined_input (str): The system prompt followed by the entries
+    """
+    batch = []
+    batch_file = None
+    batch_prompt = ""
+    batch_size = 0
+    for file_path, index, system_prompt, text in entries:
+        size = len(text) // CHARS_PER_TOKEN
+        if batch and (batch_tokens is None or file_path != batch_file or batch_size + size > batch_tokens):
+            yield make_analysis_request(batch_file, batch_prompt, batch)
+            batch = []
+            batch_size = 0
+        batch.append((index, text))
+        batch_file = file_path
+        batch_prompt = system_prompt
+        batch_size += size
+    if batch:
+        yield make_analysis_request(batch_file, batch_prompt, batch)
+
+
+def make_analysis_request(file_path, system_prompt, batch):
+    """
+    Args:
+        file_path (str): Path of the log file of the entries
+        system_prompt (str): The system prompt of the log file
+        batch (list): (entry index, text) of the entries
+
+    Returns:
+        tuple: The file path, the entry indexes and the input of the request
+    """
+    if len(batch) == 1:
+        return file_path, [batch[0][0]], system_prompt + " " + batch[0][1]
+    entries = "\n\n".join(f"--- Interaction {index} ---\n{text}" for index, text in batch)
+    return file_path, [index for index, _ in batch], f"{system_prompt}\n\n{entries}"
+
+
+class LogEntryFilter:  # pylint: disable=too-many-instance-attributes
+    """
+    Pre-filters conversation entries before any of them is sent to the analysis agent: by agent,
+    by error markers and by token usage, then drops the entries identical or nearly identical to
+    an earlier entry.
+
+    Identical entries, up to case, whitespace and digits, are found by hashing. Near duplicates
+    are found by MinHash signatures of the word shingles of the entries, bucketed by locality
+    sensitive hashing, so each entry is only compared with the few earlier entries sharing a bucket.
+    """
+
+    def __init__(self, agents=None, error_markers=None, min_total_tokens=None, dedup_threshold=DEDUP_THRESHOLD):
+        """
+        Args:
+            agents: Names of the agents whose entries are kept, or None for all agents
+            error_markers: Strings of which an entry must contain one, case insensitively, or None
+            min_total_tokens (int): Total tokens an entry must use at least, or None
+            dedup_threshold (float): Estimated Jaccard similarity from which an entry is a near
+                duplicate, or None to drop identical entries only
+        """
+        self.agents = set(agents or ())
+        self.error_markers = [marker.lower() for marker in error_markers or ()]
+        self.min_total_tokens = min_total_tokens
+        self.dedup_threshold = dedup_threshold
+        self.hashes = set()
+        self.signatures = []
+        # (band, band of a signature) -> rows of the signatures in that bucket
+        self.buckets = {}
+        rng = np.random.default_rng(0)
+        self.multipliers = rng.integers(1, 1 << 31, MINHASH_PERMUTATIONS, dtype=np.uint64)
+        self.increments = rng.integers(0, 1 << 31, MINHASH_PERMUTATIONS, dtype=np.uint64)
+        self.stats = {"read": 0, "filtered": 0, "duplicates": 0, "kept": 0}
+
+    def accept(self, agent, log_entry):
+        """
+        Args:
+            agent (str): Name of the agent of the log file of the entry
+            log_entry (str): A conversation entry
+
+        Returns:
+            bool: True if the entry is to be analyzed
+        """
+        self.stats["read"] += 1
+        if not self.matches(agent, log_entry):
+            self.stats["filtered"] += 1
+            return False
+        if self.is_duplicate(log_entry):
+            self.stats["duplicates"] += 1
+            return False
+        self.stats["kept"] += 1
+        return True
+
+    def matches(self, agent, log_entry):
+        """
+        Args:
+            agent (str): Name of the agent of the log file of the entry
+            log_entry (str): A conversation entry
+
+        Returns:
+            bool: True if the entry passes the agent, error marker and token filters
+        """
+        if self.agents and agent not in self.agents:
+            return False
+        if self.error_markers:
+            lowered = log_entry.lower()
+            if not any(marker in lowered for marker in self.error_markers):
+                return False
+        if self.min_total_tokens is not None:
+            total_tokens = entry_usage(log_entry).get("total_tokens")
+            if total_tokens is None or total_tokens < self.min_total_tokens:
+                return False
+        return True
+
+    def is_duplicate(self, log_entry):
+        """
+        Check an entry against the entries seen before, and remember it if it is new.
+
+        Args:
+            log_entry (str): A conversation entry
+
+        Returns:
+            bool: True if the entry is identical or nearly identical to an earlier entry
+        """
+        words = re.sub(r"\d+", "0", log_entry.lower()).split()
+        digest = hashlib.blake2b(" ".join(words).encode("utf-8"), digest_size=16).digest()
+        if digest in self.hashes:
+            return True
+        self.hashes.add(digest)
+        if self.dedup_threshold is None:
+            return False
+
+        signature = self.minhash(words)
+        rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+        keys = [(band, signature[band * rows : (band + 1) * rows].tobytes()) for band in range(MINHASH_BANDS)]
+        candidates = {row for key in keys for row in self.buckets.get(key, ())}
+        for row in candidates:
+            if np.mean(self.signatures[row] == signature) >= self.dedup_threshold:
+                return True
+        for key in keys:
+            self.buckets.setdefault(key, []).append(len(self.signatures))
+        self.signatures.append(signature)
+        return False
+
+    def minhash(self, words):
+        """
+        Args:
+            words (list): The normalized words of an entry
+
+        Returns:
+            np.ndarray: The MinHash signature of the word shingles of the entry
+        """
+        shingles = {" ".join(words[i : i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+        hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64)
+        return ((np.outer(hashes, self.multipliers) + self.increments) % MINHASH_PRIME).min(axis=0)
+
+
+def read_agent_name(file_path):
+    """
+    Read the name of the agent a log file is about, from the "Agent:" line the thinking file
+    writer starts each file with.
+
+    Args:
+        file_path (str): Path of the log file
+
+    Returns:
+        str: The name of the agent, or the name of the file if it has no "Agent:" line
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        first_line = f.readline()
+    if first_line.startswith(AGENT_NAME_PREFIX):
+        return first_line[len(AGENT_NAME_PREFIX) :].strip()
+    return os.path.basename(file_path)
+
+
+def entry_usage(log_entry):
+    """
+    Read the token usage of a conversation entry from the [AGENT] metadata it ends with.
+
+    Args:
+        log_entry (str): A conversation entry
+
+    Returns:
+        dict: The USAGE_FIELDS found in the metadata, summed over the LLMs if the metadata has
+            one dictionary per LLM, empty if the entry has no metadata
+    """
+    _, label, text = log_entry.rpartition("\n" + AGENT_LABEL + ":\n")
+    metadata = parse_metadata(text) if label else None
+    if metadata is None:
+        return {}
+    usage = {}
+    for field in USAGE_FIELDS:
+        if is_number(metadata.get(field)):
+            usage[field] = metadata[field]
+            continue
+        numbers = [value.get(field) for value in metadata.values() if isinstance(value, dict)]
+        numbers = [number for number in numbers if is_number(number)]
+        if numbers:
+            usage[field] = sum(numbers)
+    return usage
+
+
+def is_number(value):
+    """
+    Args:
+        value: A value parsed from JSON
+
+    Returns:
+        bool: True if the value is an int or a float
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def collect_token_usage(directory_path):
+    """
+    Extract the token usage of every conversation entry of the log files in a directory,
+    without calling any LLM.
+
+    Args:
+        directory_path (str): Path to directory containing log files
+
+    Returns:
+        list: One dict per entry with the ENTRY_COLUMNS, None for usage missing from the entry
+    """
+    rows = []
+    agents = {}
+    for file_path, index, _, log_entry in iter_directory_log_entries(directory_path):
+        if file_path not in agents:
+            agents[file_path] = read_agent_name(file_path)
+        usage = entry_usage(log_entry)
+        row = {"file": file_path, "agent": agents[file_path], "entry": index}
+        row.update({field: usage.get(field) for field in USAGE_FIELDS})
+        rows.append(row)
+    return rows
+
+
+def percentile(values, fraction):
+    """
+    Args:
+        values (list): Numbers
+        fraction (float): Fraction of the values at or below the percentile, e.g. 0.95
+
+    Returns:
+        float: The nearest-rank percentile of the values, or None if there are none
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize_token_usage(rows):
+    """
+    Aggregate the token usage of the entries per agent.
+
+    Args:
+        rows (list): The rows returned by collect_token_usage()
+
+    Returns:
+        list: One dict per agent with the SUMMARY_COLUMNS, by decreasing total tokens
+    """
+    by_agent = {}
+    for row in rows:
+        by_agent.setdefault(row["agent"], []).append(row)
+
+    summary = []
+    for agent, agent_rows in by_agent.items():
+        tokens = [row["total_tokens"] for row in agent_rows if row["total_tokens"] is not None]
+        seconds = [row["time_taken_in_seconds"] for row in agent_rows if row["time_taken_in_seconds"] is not None]
+        summary_row = {"agent": agent, "calls": len(agent_rows)}
+        for field in ("prompt_tokens", "completion_tokens", "total_tokens", "total_cost"):
+            summary_row[field] = sum(row[field] for row in agent_rows if row[field] is not None)
+        summary_row["mean_tokens"] = sum(tokens) / len(tokens) if tokens else None
+        summary_row["p95_tokens"] = percentile(tokens, OUTLIER_PERCENTILE)
+        summary_row["mean_seconds"] = sum(seconds) / len(seconds) if seconds else None
+        summary_row["p95_seconds"] = percentile(seconds, OUTLIER_PERCENTILE)
+        summary_row["max_seconds"] = max(seconds) if seconds else None
+        summary.append(summary_row)
+    summary.sort(key=lambda summary_row: summary_row["total_tokens"], reverse=True)
+    return summary
+
+
+def find_outliers(rows, summary):
+    """
+    Find the entries using more tokens or time than the 95th percentile of their agent, so
+    that only those are sent to the analysis agent. All the entries of agents with fewer than
+    OUTLIER_MIN_CALLS calls and the entries without usage metadata are kept too, as they cannot
+    be ranked.
+
+    Args:
+        rows (list): The rows returned by collect_token_usage()
+        summary (list): The rows returned by summarize_token_usage() for the same entries
+
+    Returns:
+        dict: (file path, entry index) of each outlier to a note on its usage for the analysis agent
+    """
+    by_agent = {summary_row["agent"]: summary_row for summary_row in summary}
+    outliers = {}
+    for row in rows:
+        agent = by_agent[row["agent"]]
+        key = (row["file"], row["entry"])
+        if agent["calls"] < OUTLIER_MIN_CALLS:
+            outliers[key] = f"Agent {row['agent']} has too few calls ({agent['calls']}) to rank their usage."
+            continue
+        if row["total_tokens"] is None and row["time_taken_in_seconds"] is None:
+            outliers[key] = f"This entry of agent {row['agent']} has no usage metadata."
+            continue
+        over_tokens = row["total_tokens"] is not None and row["total_tokens"] > agent["p95_tokens"]
+        over_seconds = row["time_taken_in_seconds"] is not None and row["time_taken_in_seconds"] > agent["p95_seconds"]
+        if over_tokens or over_seconds:
+            outliers[key] = (
+                f"This entry is a usage outlier of agent {row['agent']} over {agent['calls']} calls: "
+                f"{row['total_tokens']} total tokens (95th percentile {agent['p95_tokens']}), "
+                f"{row['time_taken_in_seconds']} seconds (95th percentile {agent['p95_seconds']})."
+            )
+    return outliers
+
+
+def write_table(rows, columns, path):
+    """
+    Write rows to a CSV file, or to a Parquet file if the path ends with ".parquet".
+
+    Args:
+        rows (list): Dicts of the values of the columns
+        columns (tuple): Names of the columns
+        path (str): Path of the file to write
+    """
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow  # pylint: disable=import-outside-toplevel
+            import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise ImportError(
+                "The pyarrow package is not installed. Please install it using 'pip install pyarrow'."
+            ) from e
+        table = pyarrow.table({column: [row.get(column) for row in rows] for column in columns})
+        pyarrow.parquet.write_table(table, path)
+        return
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    Read the entries already analyzed from the results of an earlier run.
+
+    Args:
+        checkpoint_path (str): Path of the JSON Lines results file, or None
+
+    Returns:
+        set: (file path, entry index) of the entries already analyzed
+    """
+    done = set()
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+                done.update((result["file"], index) for index in result["entries"])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # A line cut short by a crash: the entry is analyzed again
+                continue
+    return done
+
+
+def analyze_log_directory(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    directory_path,
+    log_analyzer=log_analyzer_agent,
+    set_up=set_up_log_analyzer,
+    tear_down=tear_down_analysis_assistant,
+    workers=ANALYSIS_WORKERS,
+    checkpoint_path=None,
+    selected=None,
+    entry_filter=None,
+    batch_tokens=None,
+):
+    """
+    Analyze all conversation entries of the log files in a directory with a pool of workers.
+
+    Entries are read lazily, filtered, grouped into requests and analyzed concurrently, each
+    worker with its own agent session and each request starting from a fresh conversation state,
+    as entries are independent of each other. At most twice as many requests as workers are read
+    ahead, so memory stays bounded however large the logs are. Results come out in log order, and
+    are appended to the checkpoint file as they do, so that a rerun after a crash skips the
+    entries already analyzed.
+
+    Args:
+        directory_path (str): Path to directory containing log files
+        log_analyzer: Function of a session, a conversation state and an input, returning the
+            analysis and the updated conversation state
+        set_up: Function returning a new session and the initial conversation state of a worker
+        tear_down: Function closing a session
+        workers (int): Number of entries analyzed concurrently
+        checkpoint_path (str): Path of the JSON Lines results file to resume from and append to, or None
+        selected (dict): (file path, entry index) of the only entries to analyze, to a note preceding
+            the entry, e.g. as returned by find_outliers(), or None for all entries
+        entry_filter (LogEntryFilter): Filter of the entries to analyze, or None for all entries
+        batch_tokens (int): Estimated tokens of the entries of a log file analyzed in one request,
+            or None for one request per entry
+
+    Yields:
+        dict: "file", "entries" and "analysis" of each request, in log order
+    """
+    sessions = []
+    sessions_lock = threading.Lock()
+    worker_state = threading.local()
+
+    def analyze(combined_input):
+        if not hasattr(worker_state, "session"):
+            worker_state.session, worker_state.initial_thread = set_up()
+            with sessions_lock:
+                sessions.append(worker_state.session)
+        analysis, _ = log_analyzer(worker_state.session, dict(worker_state.initial_thread), combined_input)
+        return analysis
+
+    def complete(file_path, indexes, future):
+        result = {"file": file_path, "entries": indexes, "analysis": future.result()}
+        if checkpoint_file is not None:
+            checkpoint_file.write(json.dumps(result) + "\n")
+            checkpoint_file.flush()
+        return result
+
+    done = load_checkpoint(checkpoint_path)
+    # pylint: disable-next=consider-using-with
+    checkpoint_file = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+    pending = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="log-analyzer") as executor:
+            try:
+                entries = iter_directory_entries(directory_path, done, selected, entry_filter)
+                for file_path, indexes, combined_input in iter_analysis_requests(entries, batch_tokens):
+                    pending.append((file_path, indexes, executor.submit(analyze, combined_input)))
+                    # Hand out the results that are ready in order, and wait when reading too far ahead
+                    while pending and (len(pending) >= 2 * workers or pending[0][2].done()):
+                        yield complete(*pending.popleft())
+                while pending:
+                    yield complete(*pending.popleft())
+            finally:
+                # Do not start the entries read ahead when stopped early
+                for _, _, future in pending:
+                    future.cancel()
+    finally:
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+        for session in sessions:
+            tear_down(session)
+
+
 def extract_system_prompt(content):
     """
     Extract the [SYSTEM] section from the log content.
@@ -155,61 +856,49 @@ def extract_conversation_entries(content):
     Returns:
         list: List of conversation entry strings
     """
-    entries = []
-
-    # Split content into sections
-    sections = re.split(r"(\[(?:HUMAN|AI|AGENT|SYSTEM)])", content)
-
-    # Remove empty sections and combine with their labels
-    labeled_sections = []
-    for i in range(0, len(sections), 2):
-        if i + 1 < len(sections):
-            label = sections[i + 1] if i + 1 < len(sections) else ""
-            content_part = sections[i + 2] if i + 2 < len(sections) else ""
-            if label and content_part.strip():
-                labeled_sections.append((label, content_part.strip()))
-
-    # Find conversation patterns: [HUMAN] -> ... -> [AI] -> [AGENT] (with metadata)
-    i = 0
-    while i < len(labeled_sections):
-        if labeled_sections[i][0] == "[HUMAN]":
-            entry_parts = []
-            current_pos = i
-
-            # Add the HUMAN section
-            entry_parts.append(f"[HUMAN]:\n{labeled_sections[current_pos][1]}")
-            current_pos += 1
-
-            # Collect everything until we find [AI]
-            while current_pos < len(labeled_sections) and labeled_sections[current_pos][0] != "[AI]":
-                label, content_part = labeled_sections[current_pos]
-                entry_parts.append(f"{label}:\n{content_part}")
-                current_pos += 1
-
-            # Add the AI section if found
-            if current_pos < len(labeled_sections) and labeled_sections[current_pos][0] == "[AI]":
-                entry_parts.append(f"[AI]:\n{labeled_sections[current_pos][1]}")
-                current_pos += 1
-
-                # Look for the following AGENT section with metadata (JSON)
-                if (
-                    current_pos < len(labeled_sections)
-                    and labeled_sections[current_pos][0] == "[AGENT]"
-                    and is_json_metadata(labeled_sections[current_pos][1])
-                ):
-                    entry_parts.append(f"[AGENT]:\n{labeled_sections[current_pos][1]}")
-                    current_pos += 1
-
-            # Combine all parts into a single log entry
-            if len(entry_parts) >= 2:  # At least HUMAN and AI
-                log_entry = "\n".join(entry_parts)
-                entries.append(log_entry)
-
-            i = current_pos
-        else:
-            i += 1
+    return list(iter_conversation_entries(iter_log_sections([content])))
 
-    return entries
+
+def section_body(content):
+    """
+    Strip the colon ending the label of a section, and the code fence around a JSON structure.
+
+    Args:
+        content (str): Text of a section
+
+    Returns:
+        str: The body of the section
+    """
+    body = content.strip()
+    if body.startswith(":"):
+        body = body[1:].strip()
+    if body.startswith("```"):
+        body = body[3:].removeprefix("json").removesuffix("```").strip()
+    return body
+
+
+def parse_metadata(content):
+    """
+    Parse the token metadata of an [AGENT] section. Sections that cannot be metadata are
+    rejected by cheap string checks before any JSON parsing.
+
+    Args:
+        content (str): Text of a section
+
+    Returns:
+        dict: The metadata, or None if the section is not metadata
+    """
+    body = section_body(content)
+    if not body.startswith("{") or "_tokens" not in body:
+        return None
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError:
+        return None
+    # Check if it has the expected metadata fields
+    if isinstance(data, dict) and any(field in data for field in METADATA_FIELDS):
+        return data
+    return None
 
 
 def is_json_metadata(content):
@@ -222,13 +911,7 @@ def is_json_metadata(content):
     Returns:
         bool: True if content appears to be metadata JSON
     """
-    try:
-        data = json.loads(content.strip())
-        # Check if it has the expected metadata fields
-        expected_fields = ["completion_tokens", "prompt_tokens", "total_tokens"]
-        return any(field in data for field in expected_fields)
-    except (json.JSONDecodeError, TypeError):
-        return False
+    return parse_metadata(content) is not None
 
 
 # Example usage:
@@ -244,10 +927,29 @@ def agentic_log_analyzer(analysis_session, analysis_thread, combined_input):
 
 # Example usage:
 if __name__ == "__main__":
-    # Replace these with your actual objects/functions
-    the_analysis_session, the_analysis_thread = set_up_log_analyzer()
-
-    # Call the parser
-    parse_log_files(AGENT_THINKING_LOGS_DIRECTORY, agentic_log_analyzer, the_analysis_session, the_analysis_thread)
-
-    tear_down_analysis_assistant(the_analysis_session)
+    # Deterministic token usage report, instantly and without any LLM
+    the_usage = collect_token_usage(AGENT_THINKING_LOGS_DIRECTORY)
+    the_summary = summarize_token_usage(the_usage)
+    write_table(the_usage, ENTRY_COLUMNS, TOKEN_USAGE_FILE)
+    write_table(the_summary, SUMMARY_COLUMNS, TOKEN_SUMMARY_FILE)
+    for the_summary_row in the_summary:
+        print(
+            f"{the_summary_row['agent']}: {the_summary_row['calls']} calls, {the_summary_row['total_tokens']} tokens, "
+            f"${the_summary_row['total_cost']:.4f}, p95 {the_summary_row['p95_seconds']} s"
+        )
+
+    # Analyze the logs with a pool of agent sessions, resuming from the results of an interrupted run
+    the_filter = LogEntryFilter(FILTER_AGENTS, FILTER_ERROR_MARKERS, FILTER_MIN_TOTAL_TOKENS, DEDUP_THRESHOLD)
+    for the_result in analyze_log_directory(
+        AGENT_THINKING_LOGS_DIRECTORY,
+        checkpoint_path=ANALYSIS_CHECKPOINT_FILE,
+        selected=find_outliers(the_usage, the_summary) if ANALYZE_OUTLIERS_ONLY else None,
+        entry_filter=the_filter,
+        batch_tokens=ANALYSIS_BATCH_TOKENS,
+    ):
+        print(f"{the_result['file']} {the_result['entries']}:")
+        print(the_result["analysis"])
+    print(
+        f"Entries read: {the_filter.stats['read']}, filtered out: {the_filter.stats['filtered']}, "
+        f"duplicates: {the_filter.stats['duplicates']}, analyzed: {the_filter.stats['kept']}"
+    )
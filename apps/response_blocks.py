@@ -0,0 +1,98 @@
+class ResponseBlockStream:
+    """
+    Parser of the blocks of an agent response, such as the say and gui blocks of the cruse assistant
+    or the thought and say blocks of the conscious assistant. A block starts with a line beginning with
+    its type and a colon, and is complete once the next block starts or the response ends. The parser
+    is fed the response chunk by chunk as it streams in from the agent, so the first blocks can be
+    shown while the agent is still writing the next ones.
+    """
+
+    def __init__(self, kinds=("say", "gui")):
+        """
+        Args:
+            kinds (tuple): The block types. A line starting with a type and a colon, in any case,
+                starts a block of that type.
+        """
+        self.prefixes = [(kind, kind + ":") for kind in kinds]
+        # The last line received, until its end is received
+        self.pending = ""
+        self.current_type = None
+        self.current_lines = []
+        # Blocks started so far
+        self.count = 0
+
+    def feed(self, chunk):
+        """
+        Args:
+            chunk (str): The next part of the response.
+
+        Returns:
+            List[Tuple[str, str]]: The (block_type, content) tuples of the blocks the chunk completed.
+        """
+        lines = (self.pending + chunk).split("\n")
+        self.pending = lines.pop()
+        blocks = []
+        for line in lines:
+            block = self.add_line(line)
+            if block is not None:
+                blocks.append(block)
+        return blocks
+
+    def close(self):
+        """
+        Returns:
+            List[Tuple[str, str]]: The (block_type, content) tuples of the blocks the end of the response completed.
+        """
+        blocks = self.feed("\n") if self.pending else []
+        if self.current_type:
+            blocks.append(self.current_block())
+        self.current_type = None
+        self.current_lines = []
+        return blocks
+
+    def partial(self):
+        """
+        Returns:
+            Tuple[str, str] or None: The type of the block being written and its content received so far,
+            None before the first block.
+        """
+        pending = self.pending.lower()
+        if not self.current_type:
+            # The first block may be starting on the last line
+            for kind, prefix in self.prefixes:
+                if pending.startswith(prefix):
+                    return kind, self.pending[len(prefix) :].strip()
+            return None
+        lines = self.current_lines
+        # Leave out a last line that may still turn out to start the next block
+        if not any(pending.startswith(prefix) or prefix.startswith(pending) for _, prefix in self.prefixes):
+            lines = lines + [self.pending]
+        return self.current_type, "\n".join(lines).strip()
+
+    def add_line(self, line):
+        """
+        Args:
+            line (str): The next complete line of the response.
+
+        Returns:
+            Tuple[str, str] or None: The block the line completed by starting the next one, if any.
+        """
+        line = line.rstrip()
+        lowered = line.lower()
+        for kind, prefix in self.prefixes:
+            # Detect new block start
+            if lowered.startswith(prefix):
+                block = self.current_block() if self.current_type else None
+                self.current_type = kind
+                self.current_lines = [line[len(prefix) :].lstrip()]  # content on same line
+                self.count += 1
+                return block
+        self.current_lines.append(line)
+        return None
+
+    def current_block(self):
+        """
+        Returns:
+            Tuple[str, str]: The type of the block being written and its content.
+        """
+        return self.current_type, "\n".join(self.current_lines).strip()
@@ -0,0 +1,475 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from neuro_san.client.agent_session_factory import AgentSessionFactory
+from neuro_san.client.streaming_input_processor import StreamingInputProcessor
+from neuro_san.interfaces.agent_session import AgentSession
+from neuro_san.internals.messages.chat_message_type import ChatMessageType
+from neuro_san.message_processing.message_processor import MessageProcessor
+
+# Sessions of one agent network open at the same time, at most
+DEFAULT_MAX_SESSIONS = 8
+
+# Seconds after which an unused session is closed
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+# Seconds a session may stay unused before its connectivity is checked again on reuse
+DEFAULT_HEALTH_CHECK_INTERVAL = 30.0
+
+# Exchanges run at the same time by the worker threads of the pool, at most
+DEFAULT_MAX_WORKERS = 32
+
+# (agent_name, connection_type, host, port) of the sessions of an agent network
+SessionKey = Tuple[str, str, str, int]
+
+logger = logging.getLogger(__name__)
+
+
+def new_agent_state_info() -> Dict[str, Any]:
+    """
+    :return: The conversation state of a new conversation with an agent network
+    """
+    return {
+        "last_chat_response": None,
+        "prompt": "Please enter your response ('quit' to terminate):\n",
+        "timeout": 5000.0,
+        "num_input": 0,
+        "user_input": None,
+        "sly_data": None,
+        "chat_filter": {"chat_filter_type": "MAXIMAL"},
+    }
+
+
+class AnswerTextForwarder(MessageProcessor):
+    """
+    MessageProcessor handing the text of the messages of the front man to a callback as they
+    stream in, so that clients can show the answer before the exchange completes.
+    """
+
+    def __init__(self):
+        self.on_text: Optional[Callable[[str], None]] = None
+
+    def process_message(self, chat_message_dict: Dict[str, Any], message_type: ChatMessageType):
+        """
+        :param chat_message_dict: The ChatMessage dictionary to process
+        :param message_type: The ChatMessageType of the chat_message_dictionary to process
+        """
+        if self.on_text is None or message_type != ChatMessageType.AI:
+            return
+        origin: Optional[List[Dict[str, Any]]] = chat_message_dict.get("origin")
+        if origin is not None and len(origin) > 1:
+            # Only the front man, whose origin is the only one of length 1, answers the client
+            return
+        text: Optional[str] = chat_message_dict.get("text")
+        if text:
+            self.on_text(text)
+
+
+class PooledSession:  # pylint: disable=too-many-instance-attributes
+    """
+    An agent session with the input processor exchanging messages over it, both reused across calls.
+    """
+
+    def __init__(self, key: SessionKey, session: AgentSession):
+        """
+        :param key: The (agent_name, connection_type, host, port) of the session
+        :param session: The agent session
+        """
+        self.key: SessionKey = key
+        self.session: AgentSession = session
+        self.input_processor = StreamingInputProcessor("DEFAULT", None, session, None)
+        self.forwarder = AnswerTextForwarder()
+        self.input_processor.get_message_processor().add_processor(self.forwarder)
+        self.last_used: float = time.monotonic()
+        self.last_checked: float = self.last_used
+        # Set when the exchange was abandoned, so the session is closed instead of reused
+        self.aborted: bool = False
+        self.closed: bool = False
+
+    def process_once(self, state: Dict[str, Any], on_text: Callable[[str], None] = None) -> Dict[str, Any]:
+        """
+        Run one exchange with the agent network.
+
+        :param state: The conversation state, with the "user_input" to send
+        :param on_text: Function called with the text of each message of the answer as it streams
+            in, None to only get the answer in the returned state
+        :return: The updated conversation state
+        """
+        self.forwarder.on_text = on_text
+        try:
+            return self.input_processor.process_once(state)
+        finally:
+            self.forwarder.on_text = None
+
+    def check_health(self) -> bool:
+        """
+        :return: True if the agent network can still be reached over the session
+        """
+        try:
+            self.session.connectivity({})
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            logger.warning("Dropping session to %s after a failed health check: %s", self.key[0], exception)
+            return False
+        self.last_checked = time.monotonic()
+        return True
+
+    def abort(self):
+        """
+        Abandon the exchange running on the session by closing it. This interrupts the stream of a
+        grpc or http session. A direct session finishes its exchange, whose result is dropped.
+        """
+        self.aborted = True
+        self.close()
+
+    def close(self):
+        """
+        Close the session.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.session.close()
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            logger.warning("Could not close session to %s: %s", self.key[0], exception)
+
+
+class AgentSessionPool:  # pylint: disable=too-many-instance-attributes
+    """
+    Process-wide pool of agent sessions keyed by (agent_name, connection_type, host, port), so that
+    agent-to-agent calls reuse warm sessions and their channels instead of opening new ones.
+
+    A session is leased to one caller at a time, as an exchange is not safe to share. Sessions left
+    unused for longer than the health check interval are checked before reuse, and sessions left
+    unused for longer than the idle timeout are closed. At most max_sessions sessions of one agent
+    network are open at once: further callers wait for one to be released.
+
+    Exchanges are blocking, so coroutines run them with async_process() in the worker threads of
+    the pool, which keeps the event loop free while the agent network answers.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+        create_session: Callable[[str, str, str, int, bool], AgentSession] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        """
+        :param max_sessions: Sessions of one agent network open at the same time, at most
+        :param idle_timeout: Seconds after which an unused session is closed
+        :param health_check_interval: Seconds a session may stay unused before it is checked on reuse
+        :param create_session: Function of the agent name, connection type, host, port and
+            local_externals_direct creating a session, None to create them with an AgentSessionFactory
+        :param max_workers: Exchanges run at the same time by async_process(), at most
+        """
+        self.max_sessions: int = max_sessions
+        self.idle_timeout: float = idle_timeout
+        self.health_check_interval: float = health_check_interval
+        self.create_session: Callable[[str, str, str, int, bool], AgentSession] = (
+            create_session or create_agent_session
+        )
+        # key -> sessions not leased, most recently used last
+        self.idle: Dict[SessionKey, List[PooledSession]] = {}
+        # key -> sessions open, leased or not, including those being created
+        self.open_counts: Dict[SessionKey, int] = {}
+        self.condition = threading.Condition()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-call")
+
+    def acquire(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        agent_name: str,
+        connection_type: str,
+        host: str,
+        port: int,
+        local_externals_direct: bool = False,
+        timeout: Optional[float] = None,
+    ) -> PooledSession:
+        """
+        Lease a session to an agent network, reusing an idle one if possible.
+
+        :param agent_name: Name of the agent network
+        :param connection_type: "direct", "http" or "grpc"
+        :param host: Host of the neuro-san server
+        :param port: Port of the neuro-san server
+        :param local_externals_direct: Whether external agents are called directly in direct sessions
+        :param timeout: Seconds to wait for a session when max_sessions are leased, None to wait forever
+        :return: The leased session, to be given back with release()
+        :raises TimeoutError: If no session was released within the timeout
+        """
+        key: SessionKey = (agent_name, connection_type, host, port)
+        deadline: Optional[float] = None if timeout is None else time.monotonic() + timeout
+        while True:
+            pooled: Optional[PooledSession] = None
+            with self.condition:
+                self.evict_idle()
+                while not self.idle.get(key) and self.open_counts.get(key, 0) >= self.max_sessions:
+                    remaining: Optional[float] = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No session to {agent_name} was released within {timeout} seconds")
+                    self.condition.wait(remaining)
+                if self.idle.get(key):
+                    pooled = self.idle[key].pop()
+                else:
+                    # Reserve the slot, then create the session without holding the lock
+                    self.open_counts[key] = self.open_counts.get(key, 0) + 1
+
+            if pooled is None:
+                return self.open(key, local_externals_direct)
+            if time.monotonic() - pooled.last_checked < self.health_check_interval or pooled.check_health():
+                return pooled
+            self.discard(pooled)
+
+    def open(self, key: SessionKey, local_externals_direct: bool) -> PooledSession:
+        """
+        Create a session in a slot reserved by acquire().
+
+        :param key: The (agent_name, connection_type, host, port) of the session
+        :param local_externals_direct: Whether external agents are called directly in direct sessions
+        :return: The new session
+        """
+        try:
+            session: AgentSession = self.create_session(key[0], key[1], key[2], key[3], local_externals_direct)
+        except BaseException:
+            with self.condition:
+                self.open_counts[key] -= 1
+                self.condition.notify_all()
+            raise
+        logger.info("Opened a session to %s", key[0])
+        return PooledSession(key, session)
+
+    def release(self, pooled: PooledSession, healthy: bool = True):
+        """
+        Give a leased session back to the pool.
+
+        :param pooled: A session returned by acquire()
+        :param healthy: False if the session failed, so that it is closed instead of reused
+        """
+        if not healthy or pooled.aborted:
+            self.discard(pooled)
+            return
+        pooled.last_used = time.monotonic()
+        with self.condition:
+            self.idle.setdefault(pooled.key, []).append(pooled)
+            self.condition.notify_all()
+
+    def discard(self, pooled: PooledSession):
+        """
+        Close a leased session and free its slot.
+
+        :param pooled: A session returned by acquire()
+        """
+        pooled.close()
+        with self.condition:
+            self.open_counts[pooled.key] -= 1
+            self.condition.notify_all()
+
+    @contextmanager
+    def session(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        agent_name: str,
+        connection_type: str,
+        host: str,
+        port: int,
+        local_externals_direct: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Iterator[PooledSession]:
+        """
+        Lease a session for the duration of a with block. The session is closed instead of
+        reused if the block raises.
+
+        See acquire() for the parameters.
+        """
+        pooled: PooledSession = self.acquire(agent_name, connection_type, host, port, local_externals_direct, timeout)
+        try:
+            yield pooled
+        except BaseException:
+            self.release(pooled, healthy=False)
+            raise
+        self.release(pooled)
+
+    async def async_process(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        agent_name: str,
+        connection_type: str,
+        host: str,
+        port: int,
+        state: Dict[str, Any],
+        local_externals_direct: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run one exchange with an agent network on a leased session, in a worker thread of the pool,
+        so that the event loop keeps serving other requests meanwhile.
+
+        If the call times out or the awaiting task is cancelled, the exchange is abandoned and its
+        session closed instead of reused.
+
+        :param agent_name: Name of the agent network
+        :param connection_type: "direct", "http" or "grpc"
+        :param host: Host of the neuro-san server
+        :param port: Port of the neuro-san server
+        :param state: The conversation state, with the "user_input" to send
+        :param local_externals_direct: Whether external agents are called directly in direct sessions
+        :param timeout: Seconds the whole call may take, waiting for a worker and a session
+            included, None to wait forever
+        :return: The updated conversation state
+        :raises TimeoutError: If the call did not complete within the timeout
+        """
+        key: SessionKey = (agent_name, connection_type, host, port)
+        call = AgentCall(self, key, local_externals_direct, state, timeout)
+        future = asyncio.get_running_loop().run_in_executor(self.executor, call.run)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            call.cancel()
+            raise
+
+    def evict_idle(self):
+        """
+        Close the sessions unused for longer than the idle timeout. Must be called with the condition held.
+        """
+        now: float = time.monotonic()
+        for key, sessions in self.idle.items():
+            expired: List[PooledSession] = [
+                pooled for pooled in sessions if now - pooled.last_used > self.idle_timeout
+            ]
+            if not expired:
+                continue
+            sessions[:] = [pooled for pooled in sessions if now - pooled.last_used <= self.idle_timeout]
+            self.open_counts[key] -= len(expired)
+            for pooled in expired:
+                # Closing a session only releases local resources, so it is quick enough to do here
+                pooled.close()
+            self.condition.notify_all()
+
+    def close(self):
+        """
+        Close all idle sessions. Leased sessions are closed when they are released.
+        """
+        with self.condition:
+            for key, sessions in self.idle.items():
+                self.open_counts[key] -= len(sessions)
+                for pooled in sessions:
+                    pooled.close()
+            self.idle = {}
+            self.condition.notify_all()
+
+
+class AgentCall:  # pylint: disable=too-many-instance-attributes
+    """
+    One exchange run by AgentSessionPool.async_process() in a worker thread, which the awaiting
+    coroutine can cancel.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        pool: AgentSessionPool,
+        key: SessionKey,
+        local_externals_direct: bool,
+        state: Dict[str, Any],
+        timeout: Optional[float],
+    ):
+        """
+        :param pool: The pool leasing the session
+        :param key: The (agent_name, connection_type, host, port) of the session
+        :param local_externals_direct: Whether external agents are called directly in direct sessions
+        :param state: The conversation state, with the "user_input" to send
+        :param timeout: Seconds the whole call may take, None to wait forever
+        """
+        self.pool: AgentSessionPool = pool
+        self.key: SessionKey = key
+        self.local_externals_direct: bool = local_externals_direct
+        self.state: Dict[str, Any] = state
+        self.deadline: Optional[float] = None if timeout is None else time.monotonic() + timeout
+        self.pooled: Optional[PooledSession] = None
+        self.cancelled: bool = False
+        self.lock = threading.Lock()
+
+    def run(self) -> Optional[Dict[str, Any]]:
+        """
+        :return: The updated conversation state, None if the call was cancelled before it started
+        """
+        if self.cancelled:
+            return None
+        remaining: Optional[float] = None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+        pooled: PooledSession = self.pool.acquire(*self.key, self.local_externals_direct, remaining)
+        with self.lock:
+            if self.cancelled:
+                self.pool.release(pooled)
+                return None
+            self.pooled = pooled
+        healthy: bool = False
+        try:
+            state: Dict[str, Any] = pooled.process_once(self.state)
+            healthy = True
+        finally:
+            # Once released, the session may be leased to another call, which a late cancel must not abort
+            with self.lock:
+                self.pooled = None
+            self.pool.release(pooled, healthy)
+        return state
+
+    def cancel(self):
+        """
+        Abandon the call, interrupting its exchange if it started.
+        """
+        with self.lock:
+            self.cancelled = True
+            if self.pooled is not None:
+                self.pooled.abort()
+
+
+def create_agent_session(
+    agent_name: str, connection_type: str, host: str, port: int, local_externals_direct: bool
+) -> AgentSession:
+    """
+    :param agent_name: Name of the agent network
+    :param connection_type: "direct", "http" or "grpc"
+    :param host: Host of the neuro-san server
+    :param port: Port of the neuro-san server
+    :param local_externals_direct: Whether external agents are called directly in direct sessions
+    :return: A new session to the agent network
+    """
+    metadata: Dict[str, Any] = {"user_id": os.environ.get("USER")}
+    factory = AgentSessionFactory()
+    return factory.create_session(connection_type, agent_name, host, port, local_externals_direct, metadata)
+
+
+_POOL: Optional[AgentSessionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_agent_session_pool() -> AgentSessionPool:
+    """
+    :return: The process-wide pool of agent sessions
+    """
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = AgentSessionPool()
+        return _POOL
@@ -11,25 +11,127 @@
 #
 # END COPYRIGHT
 
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
 from typing import Any
 from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Tuple
 
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.vectorstores import InMemoryVectorStore
 from langchain_core.documents import Document
-from langchain_core.vectorstores.base import VectorStoreRetriever
-from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from neuro_san.interfaces.coded_tool import CodedTool
 
+from coded_tools.base_rag import DEFAULT_K
+from coded_tools.base_rag import BaseRag
+from coded_tools.numpy_vector_store import NumpyVectorStore
+from coded_tools.pdf_rag import PdfRag
+from coded_tools.vector_store_registry import VectorStoreRegistry
+
 PDF_FILE_URL = "https://www.replicon.com/wp-content/uploads/2016/06/RFP-Template_Replicon.pdf"
 
+# Vector store persisted by the first build, relative to the coded_tools directory
+DEFAULT_VECTOR_STORE_PATH = "agentic_rag/rfp_vector_store.npy"
+
+# Seconds between two checks of the PDF for changes, each a HEAD request
+FINGERPRINT_INTERVAL_SECONDS = 300.0
+
+logger = logging.getLogger(__name__)
+
+# Settings key -> fingerprints of the PDF and future of the vector store built, or being built, from it
+_WARM_UPS: Dict[str, Tuple[Optional[List[str]], Future]] = {}
+_WARM_UPS_LOCK = threading.Lock()
 
-class Rag(CodedTool):
+# URL -> time of the last check and fingerprints of the PDF, empty when it could not be checked
+_FINGERPRINTS: Dict[str, Tuple[float, List[str]]] = {}
+_FINGERPRINTS_LOCK = threading.Lock()
+
+
+def get_pdf_fingerprints(url: str) -> List[str]:
+    """
+    :param url: URL of a PDF file
+    :return: The fingerprints of the last check of the PDF if it is recent, otherwise of a new check.
+        Empty if the PDF could not be checked. Concurrent callers wait for the same check.
     """
-    CodedTool implementation which provides a way to do RAG on a pdf file
+    with _FINGERPRINTS_LOCK:
+        checked: Optional[Tuple[float, List[str]]] = _FINGERPRINTS.get(url)
+        if checked is not None and time.monotonic() - checked[0] < FINGERPRINT_INTERVAL_SECONDS:
+            return checked[1]
+        fingerprint: str = PdfRag.fingerprint_url(url)
+        # PdfRag falls back to the bare URL when the PDF could not be checked
+        fingerprints: List[str] = [fingerprint] if fingerprint != url else []
+        _FINGERPRINTS[url] = (time.monotonic(), fingerprints)
+        return fingerprints
+
+
+class Rag(CodedTool, BaseRag):
     """
+    CodedTool implementation which provides a way to do RAG on a pdf file.
+
+    The vector store is built once per process in a background thread and persisted,
+    so queries only pay for embedding the query once it is warm. It is rebuilt when the PDF changes,
+    which is checked at most once every FINGERPRINT_INTERVAL_SECONDS.
+    """
+
+    def configure(self, args: Dict[str, Any]):
+        """
+        :param args: The tool args: optional "chunk_size", "chunk_overlap",
+            "vector_store_path" and "save_vector_store"
+        """
+        self.configure_chunking(args.get("chunk_size"), args.get("chunk_overlap"))
+        self.configure_vector_store_path(args.get("vector_store_path", DEFAULT_VECTOR_STORE_PATH))
+        self.save_vector_store = bool(args.get("save_vector_store", True))
+
+    @classmethod
+    def warm_up(cls, args: Optional[Dict[str, Any]] = None, fingerprints: Optional[List[str]] = None) -> Future:
+        """
+        Start building the vector store for the tool args in a background thread, unless a build
+        with the same settings already started in this process. The build loads the store persisted
+        at vector_store_path when it was built from the current PDF, and persists it there otherwise.
+        A failed build is forgotten, so that the next call retries it.
+
+        :param args: The tool args, as in the hocon
+        :param fingerprints: The current fingerprints of the PDF. A build started for other fingerprints
+            is replaced by a new one. None to reuse any build with the same settings.
+        :return: Future of the vector store, shared by all callers with the same settings
+        """
+        rag = cls()
+        rag.configure(args or {})
+        loader_args: Dict[str, Any] = {"url": PDF_FILE_URL}
+        key: str = VectorStoreRegistry.make_key(
+            namespace=cls.__name__,
+            loader_args={
+                "loader_args": loader_args,
+                "vector_store_path": rag.abs_vector_store_path,
+                "chunking": [rag.chunk_size, rag.chunk_overlap],
+            },
+        )
+        with _WARM_UPS_LOCK:
+            warm_up: Optional[Tuple[Optional[List[str]], Future]] = _WARM_UPS.get(key)
+            if warm_up is not None and (fingerprints is None or warm_up[0] == fingerprints):
+                return warm_up[1]
+            future = Future()
+            _WARM_UPS[key] = (fingerprints, future)
+
+        def build():
+            future.set_running_or_notify_cancel()
+            try:
+                # A thread and event loop of its own, so the build outlives cancelled callers
+                future.set_result(asyncio.run(rag.build_vector_store(loader_args)))
+            except Exception as exception:  # pylint: disable=broad-exception-caught
+                logger.error("Building the vector store of %s failed: %s", PDF_FILE_URL, exception)
+                with _WARM_UPS_LOCK:
+                    if _WARM_UPS.get(key, (None, None))[1] is future:
+                        del _WARM_UPS[key]
+                future.set_exception(exception)
+
+        logger.info("Warming up the vector store of %s", PDF_FILE_URL)
+        threading.Thread(target=build, name="rag-warm-up", daemon=True).start()
+        return future
 
     def invoke(self, args: Dict[str, Any], sly_data: Dict[str, Any]):
         """
@@ -53,9 +155,10 @@ class Rag(CodedTool):
 
     async def async_invoke(self, args: Dict[str, Any], sly_data: Dict[str, Any]) -> str:
         """
-        Load a PDF from URL, build a vector store, and run a query against it.
+        Run a query against the vector store of the PDF, built once per process.
 
-        :param args: Dictionary containing 'query' (search string)
+        :param args: Dictionary containing 'query' (search string), and optionally
+            'chunk_size' and 'chunk_overlap' (in tokens), 'vector_store_path' and 'save_vector_store'
         :param sly_data: A dictionary whose keys are defined by the agent
             hierarchy, but whose values are meant to be kept out of the
             chat stream.
@@ -69,7 +172,7 @@ class Rag(CodedTool):
 
             Keys expected for this implementation are:
                 None
-        :return: Text result from querying the built vector store,
+        :return: Text result from querying the vector store,
             or error message
         """
         # Extract arguments from the input dictionary
@@ -79,50 +182,56 @@ class Rag(CodedTool):
         if not query:
             return "Error: No query provided."
 
-        # Build the vector store and run the query
-        vectorstore: InMemoryVectorStore = await self.generate_vector_store(PDF_FILE_URL)
+        # Reuse the vector store warmed up in the background, waiting for its build on first use
+        # or once the PDF changed. A PDF that could not be checked keeps the current store.
+        fingerprints: List[str] = await self.get_source_fingerprints({"url": PDF_FILE_URL})
+        vectorstore: NumpyVectorStore = await asyncio.wrap_future(self.warm_up(args, fingerprints or None))
         return await self.query_vectorstore(vectorstore, query)
 
-    async def generate_vector_store(self, url: str) -> InMemoryVectorStore:
+    async def load_documents(self, loader_args: Dict[str, Any]) -> List[Document]:
         """
-        Asynchronously loads web documents from given URLs, split them into
-        chunks, and build an in-memory vector store using OpenAI embeddings.
-
-        :param urls: List of URLs to fetch and embed
-        :return: In-memory vector store containing the embedded document chunks
+        :param loader_args: Dictionary containing the "url" of the PDF file
+        :return: One document per page of the PDF
         """
+        loader = PyPDFLoader(file_path=loader_args["url"])
+        return await loader.aload()
 
-        loader = PyPDFLoader(file_path=url)
-        docs: List[Document] = await loader.aload()
-
-        # Split documents into smaller chunks for better embedding and
-        # retrieval
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(chunk_size=100, chunk_overlap=50)
-        doc_chunks: List[Document] = text_splitter.split_documents(docs)
-
-        # Create an in-memory vector store with embeddings
-        vectorstore: InMemoryVectorStore = await InMemoryVectorStore.afrom_documents(
-            documents=doc_chunks,
-            collection_name="rag-in-memory",
-            embedding=OpenAIEmbeddings(),
-        )
+    async def get_source_fingerprints(self, loader_args: Dict[str, Any]) -> List[str]:
+        """
+        Fingerprint the PDF as PdfRag does, so that a changed file replaces the vector store.
+        The PDF is checked at most once every FINGERPRINT_INTERVAL_SECONDS per process.
 
-        return vectorstore
+        :param loader_args: Dictionary containing the "url" of the PDF file
+        :return: The fingerprint of the PDF, or an empty list if it could not be checked,
+            in which case the persisted vector store is kept
+        """
+        return await asyncio.to_thread(get_pdf_fingerprints, loader_args["url"])
 
-    async def query_vectorstore(self, vectorstore: InMemoryVectorStore, query: str) -> str:
+    async def query_vectorstore(
+        self, vectorstore: NumpyVectorStore, query: str, k: int = DEFAULT_K, score_threshold: Optional[float] = None
+    ) -> str:
         """
         Query the given vector store using the provided query string
         and return the combined content of retrieved documents.
 
-        :param vectorstore: The in-memory vector store to query
+        :param vectorstore: The vector store to query
         :param query: The user query to search for relevant documents
+        :param k: Number of chunks to retrieve
+        :param score_threshold: Optional minimum cosine similarity of retrieved chunks
         :return: Concatenated text content of the retrieved documents
         """
-        # Create a retriever interface from the vector store
-        retriever: VectorStoreRetriever = vectorstore.as_retriever()
-
-        # Perform an asynchronous similarity search
-        results: List[Document] = await retriever.ainvoke(query)
+        # The store was built on the event loop of the warm-up thread, so the query
+        # is embedded with an embedding client of the calling event loop
+        query_vector: List[float] = await self.get_embeddings().aembed_query(query)
+        results: List[Document] = vectorstore.similarity_search_by_vector(
+            query_vector, k=k, score_threshold=score_threshold
+        )
 
         # Concatenate the content of all retrieved documents
         return "\n\n".join(doc.page_content for doc in results)
+
+
+if __name__ == "__main__":
+    # Prebuild and persist the vector store, e.g. when deploying the server
+    logging.basicConfig(level=logging.INFO)
+    Rag.warm_up().result()
@@ -9,37 +9,101 @@
 #
 # END COPYRIGHT
 
+import asyncio
+import json
 import os
 import re
 from abc import ABC
 from abc import abstractmethod
+from contextlib import aclosing
 from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
+from typing import Union
 import logging
 
-from langchain_community.vectorstores import InMemoryVectorStore
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStore
 from langchain_core.vectorstores.base import VectorStoreRetriever
 from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from .bm25_index import Bm25Index
+from .bm25_index import get_sparse_index_path
+from .chunking import DEFAULT_CHUNK_OVERLAP
+from .chunking import DEFAULT_CHUNK_SIZE
+from .chunking import DocumentChunker
+from .embedding_cache import DEFAULT_MAX_BYTES
+from .embedding_cache import CachedEmbeddings
+from .embedding_cache import get_embedding_cache
+from .embedding_scheduler import schedule_embeddings
+from .numpy_vector_store import NumpyVectorStore
+from .vector_index import EXACT
+from .vector_index import create_vector_index
+from .vector_index import get_index_path
+from .vector_store_registry import VectorStoreRegistry
+from .vector_store_registry import get_vector_store_registry
 
 # Invalid file path character pattern
 INVALID_PATH_PATTERN = r"[<>:\"|?*\x00-\x1F]"
 
+# Vector store file formats: langchain's JSON dump, or a memory-mapped float32 matrix with a metadata sidecar
+VECTOR_STORE_EXTENSIONS = (".json", ".npy")
+
+# Number of chunks retrieved per query unless the tool args say otherwise
+DEFAULT_K = 4
+
+# Number of chunks embedded per batch while building a vector store, bounding the chunks held in flight
+DEFAULT_INGEST_BATCH_SIZE = 256
+
 logger = logging.getLogger(__name__)
 
 
-class BaseRag(ABC):
+def get_manifest_path(vector_store_path: str) -> str:
+    """
+    :param vector_store_path: Path of the persisted vector store
+    :return: Path of the incremental sync manifest persisted alongside the vector store
+    """
+    return os.path.splitext(vector_store_path)[0] + ".manifest.json"
+
+
+def get_fingerprint_path(vector_store_path: str) -> str:
+    """
+    :param vector_store_path: Path of the persisted vector store
+    :return: Path of the fingerprints of the sources the persisted vector store was built from
+    """
+    return os.path.splitext(vector_store_path)[0] + ".sources.json"
+
+
+class BaseRag(ABC):  # pylint: disable=too-many-instance-attributes,too-many-public-methods
     """
     Abstract Base Class for different types of RAG implementations.
     """
 
     def __init__(self):
-        # Save the generated vector store as a JSON file if True
+        # Save the generated vector store to vector_store_path if True
         self.save_vector_store: bool = False
         self.abs_vector_store_path: Optional[str] = None
+        # Reuse embeddings of unchanged chunks from a local cache file if set
+        self.abs_embedding_cache_path: Optional[str] = None
+        self.embedding_cache_max_bytes: int = DEFAULT_MAX_BYTES
+        # Nearest neighbor index used for retrieval: "exact", "ivf" or "faiss"
+        self.vector_index: str = EXACT
+        self.vector_index_params: Dict[str, Any] = {}
+        # Fuse BM25 keyword search with dense search if True
+        self.hybrid_search: bool = False
+        # Chunks embedded per batch while the next documents are still being loaded
+        self.ingest_batch_size: int = DEFAULT_INGEST_BATCH_SIZE
+        # Tokens per chunk and tokens shared by consecutive chunks
+        self.chunk_size: int = DEFAULT_CHUNK_SIZE
+        self.chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
+        # Batching, concurrency and rate limit settings of the embedding requests
+        self.embedding_scheduler_params: Dict[str, Any] = {}
 
     @abstractmethod
     async def load_documents(self, loader_args: Any) -> List[Document]:
@@ -48,35 +112,183 @@ class BaseRag(ABC):
         """
         raise NotImplementedError
 
+    async def stream_documents(self, loader_args: Any) -> AsyncIterator[List[Document]]:
+        """
+        Yield the documents of the data source in groups as they are loaded, so that
+        splitting and embedding can start before all sources are loaded. Subclasses
+        able to load sources concurrently should override this.
+
+        :param loader_args: Arguments specific to the document loader
+        :return: Async iterator of lists of documents. The default yields all of load_documents() at once.
+        """
+        yield await self.load_documents(loader_args)
+
+    def configure_ingest_batch_size(self, batch_size: Optional[int]):
+        """
+        :param batch_size: Number of chunks embedded per batch while building a vector store.
+            Larger batches mean fewer embedding requests, smaller batches bound the memory held in flight.
+        :raises ValueError: If the batch size is not positive
+        """
+        if not batch_size:
+            return
+        if int(batch_size) <= 0:
+            raise ValueError(f"ingest_batch_size must be positive, got: {batch_size}")
+        self.ingest_batch_size = int(batch_size)
+
     def configure_vector_store_path(self, vector_store_path: Optional[str]):
         """
         Validate the vector store file path and set it as an absolute path.
 
-        :param vector_store_path: Relative or absolute path to the vector store JSON file.
+        :param vector_store_path: Relative or absolute path to the vector store file.
+            A ".json" file holds langchain's JSON dump, a ".npy" file holds a float32 matrix
+            that is memory-mapped on load, with chunk texts and metadata in a ".meta.json" sidecar.
         :raises ValueError: If the path contains invalid characters or has an incorrect file extension.
         """
         if not vector_store_path:
             return
 
+        self.abs_vector_store_path = self.resolve_path(vector_store_path, VECTOR_STORE_EXTENSIONS, "vector_store_path")
+
+    def configure_embedding_cache(self, embedding_cache_path: Optional[str], max_bytes: Optional[int] = None):
+        """
+        Validate the embedding cache file path and set it as an absolute path.
+
+        :param embedding_cache_path: Relative or absolute path to the SQLite embedding cache file.
+        :param max_bytes: Maximum size of the cached vectors in bytes before least recently used entries are evicted.
+        :raises ValueError: If the path contains invalid characters or has an incorrect file extension.
+        """
+        if not embedding_cache_path:
+            return
+
+        self.abs_embedding_cache_path = self.resolve_path(embedding_cache_path, ".sqlite", "embedding_cache_path")
+        if max_bytes:
+            self.embedding_cache_max_bytes = int(max_bytes)
+
+    def configure_vector_index(self, vector_index: Optional[str], params: Optional[Dict[str, Any]] = None):
+        """
+        Select the nearest neighbor index used for retrieval.
+
+        :param vector_index: "exact" for brute-force search (the default), "ivf" for a NumPy
+            inverted file index or "faiss" for a FAISS HNSW index (falls back to "ivf" if faiss is not installed)
+        :param params: Optional index parameters, e.g. {"nprobe": 16} for "ivf" or {"ef_search": 128} for "faiss"
+        :raises ValueError: If the index kind is unknown, or a parameter is not one of the index kind
+        """
+        # Validate early so that a typo fails before any indexing work
+        create_vector_index(vector_index, params)
+        self.vector_index = (vector_index or EXACT).lower()
+        self.vector_index_params = dict(params or {})
+
+    def configure_hybrid_search(self, hybrid_search: Optional[bool]):
+        """
+        :param hybrid_search: If True, a BM25 index of the chunk texts is built and persisted alongside
+            the vector store, and its ranking is fused with the dense one by reciprocal rank fusion,
+            so that exact identifiers (policy numbers, error codes, page titles) are found too.
+        """
+        self.hybrid_search = bool(hybrid_search)
+
+    def configure_chunking(self, chunk_size: Optional[int], chunk_overlap: Optional[int]):
+        """
+        :param chunk_size: Maximum tokens per chunk. Larger chunks mean fewer vectors and faster retrieval,
+            smaller chunks mean more precise retrieval.
+        :param chunk_overlap: Tokens shared by consecutive chunks
+        :raises ValueError: If the settings are inconsistent
+        """
+        chunk_size = int(chunk_size) if chunk_size else DEFAULT_CHUNK_SIZE
+        chunk_overlap = (
+            int(chunk_overlap) if chunk_overlap is not None else min(DEFAULT_CHUNK_OVERLAP, chunk_size // 2)
+        )
+        # Validate early so that a typo fails before any indexing work
+        DocumentChunker(chunk_size, chunk_overlap)
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def configure_embedding_scheduler(self, params: Optional[Dict[str, Any]]):
+        """
+        :param params: Optional settings of the embedding requests: "max_batch_tokens", "max_batch_size",
+            "max_concurrency", "tokens_per_minute", "max_retries", "initial_backoff" and "max_backoff"
+        """
+        self.embedding_scheduler_params = dict(params or {})
+
+    @staticmethod
+    def resolve_path(path: str, extensions: Union[str, Tuple[str, ...]], arg_name: str) -> str:
+        """
+        Validate a file path argument and turn it into an absolute path.
+
+        :param path: Relative (to this directory) or absolute file path
+        :param extensions: The file extension, or tuple of allowed extensions, the path must have
+        :param arg_name: Name of the tool argument, for error messages
+        :return: The absolute path
+        :raises ValueError: If the path contains invalid characters or has an incorrect file extension.
+        """
         # Check for obviously invalid characters in filenames (basic check)
-        if re.search(INVALID_PATH_PATTERN, vector_store_path):
-            logger.error("Invalid characters in vector_store_path: '%s'", vector_store_path)
-            raise ValueError(f"Invalid vector_store_path: '{vector_store_path}'")
+        if re.search(INVALID_PATH_PATTERN, path):
+            logger.error("Invalid characters in %s: '%s'", arg_name, path)
+            raise ValueError(f"Invalid {arg_name}: '{path}'")
 
         # Check file extension
-        if not vector_store_path.endswith(".json"):
-            logger.error("vector_store_path must be a .json file, got: '%s'", vector_store_path)
-            raise ValueError(f"vector_store_path must be a .json file, got: '{vector_store_path}'")
+        if not path.endswith(extensions):
+            expected: str = " or ".join(extensions) if isinstance(extensions, tuple) else extensions
+            logger.error("%s must be a %s file, got: '%s'", arg_name, expected, path)
+            raise ValueError(f"{arg_name} must be a {expected} file, got: '{path}'")
 
-        if os.path.isabs(vector_store_path):
+        if os.path.isabs(path):
             # It's already an absolute path — use it directly
-            self.abs_vector_store_path = vector_store_path
-        else:
-            # Combine to relative path to base path to make absolute path
-            base_path: str = os.path.dirname(__file__)
-            self.abs_vector_store_path = os.path.abspath(os.path.join(base_path, vector_store_path))
+            return path
+
+        # Combine to relative path to base path to make absolute path
+        base_path: str = os.path.dirname(__file__)
+        return os.path.abspath(os.path.join(base_path, path))
+
+    def get_embeddings(self) -> Embeddings:
+        """
+        :return: The embedding model for documents and queries, backed by the
+            embedding cache when one is configured.
+        """
+        # Rate limited requests are retried by the scheduler, with backoff shared by all tools using the model
+        embeddings: Embeddings = schedule_embeddings(OpenAIEmbeddings(max_retries=0), self.embedding_scheduler_params)
+        if self.abs_embedding_cache_path:
+            cache = get_embedding_cache(self.abs_embedding_cache_path, self.embedding_cache_max_bytes)
+            embeddings = CachedEmbeddings(embeddings, cache)
+        return embeddings
+
+    async def get_source_fingerprints(self, loader_args: Any) -> List[str]:
+        """
+        Describe the current state of the data sources so that a change in any of them
+        invalidates previously built vector stores. Subclasses that can cheaply detect
+        changes (file mtime/size, HTTP ETag, ...) should override this.
+
+        :param loader_args: Arguments specific to the document loader
+        :return: List of strings that change whenever a source changes.
+            The default returns an empty list, leaving invalidation to the registry TTL.
+        """
+        del loader_args
+        return []
 
     async def generate_vector_store(self, loader_args: Any) -> VectorStore:
+        """
+        Return the vector store for the given data source, reusing one already built
+        in this process for the same loader arguments and unchanged sources.
+        Concurrent callers for the same sources share a single build.
+
+        :param loader_args: Arguments specific to the document loader (e.g., Confluence params or PDF file paths).
+        :return: In-memory vector store containing the embedded document chunks
+        """
+        fingerprints: List[str] = await self.get_source_fingerprints(loader_args)
+        key: str = VectorStoreRegistry.make_key(
+            namespace=type(self).__name__,
+            loader_args={
+                "loader_args": loader_args,
+                "vector_store_path": self.abs_vector_store_path,
+                "vector_index": [self.vector_index, self.vector_index_params],
+                "chunking": [self.chunk_size, self.chunk_overlap],
+                "hybrid_search": self.hybrid_search,
+            },
+            fingerprints=fingerprints,
+        )
+        registry: VectorStoreRegistry = get_vector_store_registry()
+        return await registry.get_or_build(key, lambda: self.build_vector_store(loader_args))
+
+    async def build_vector_store(self, loader_args: Any) -> VectorStore:
         """
         Asynchronously loads documents from a given data source, split them into
         chunks, and build an in-memory vector store using OpenAI embeddings or
@@ -86,52 +298,287 @@ class BaseRag(ABC):
         :return: In-memory vector store containing the embedded document chunks
         """
         # If vector store file path is provided (abs_vector_store_path is not None), try to load vector store first.
+        fingerprints: List[str] = []
         if self.abs_vector_store_path:
+            fingerprints = await self.get_source_fingerprints(loader_args)
+        if self.abs_vector_store_path and not self.persisted_sources_changed(fingerprints):
             try:
-                vectorstore: VectorStore = InMemoryVectorStore.load(path=self.abs_vector_store_path, embedding=OpenAIEmbeddings())
+                vectorstore: VectorStore = NumpyVectorStore.load(
+                    path=self.abs_vector_store_path, embedding=self.get_embeddings()
+                )
                 logger.info("Loaded vector store from: %s", self.abs_vector_store_path)
+                self.attach_indexes(vectorstore, loaded=True)
                 return vectorstore
             except FileNotFoundError:
                 logger.error("Vector store not found at: %s. Creating from source.", self.abs_vector_store_path)
+            except (ValueError, OSError) as exception:
+                logger.error(
+                    "Vector store at %s could not be loaded: %s. Creating from source.",
+                    self.abs_vector_store_path,
+                    exception,
+                )
 
-        # Load documents and build the vector store
-        docs = await self.load_documents(loader_args)
+        # Load, split and embed documents as a pipeline: a batch of chunks is embedded
+        # while the next documents are loaded, and at most one batch is embedded at a time
+        vectorstore = NumpyVectorStore(embedding=self.get_embeddings())
+        chunks: List[Document] = []
+        embedding_task: Optional[asyncio.Task] = None
+        try:
+            async with aclosing(self.stream_documents(loader_args)) as stream:
+                async for docs in stream:
+                    # Split documents into smaller chunks for better embedding and retrieval
+                    chunks.extend(self.split_documents(docs))
+                    while len(chunks) >= self.ingest_batch_size:
+                        batch: List[Document] = chunks[: self.ingest_batch_size]
+                        chunks = chunks[self.ingest_batch_size :]
+                        if embedding_task is not None:
+                            await embedding_task
+                        embedding_task = asyncio.create_task(vectorstore.aadd_documents(batch))
+            if embedding_task is not None:
+                await embedding_task
+            embedding_task = None
+            if chunks:
+                await vectorstore.aadd_documents(chunks)
+        finally:
+            if embedding_task is not None:
+                embedding_task.cancel()
+        logger.info("Embedded %d chunks", len(vectorstore))
 
-        # Split documents into smaller chunks for better embedding and retrieval
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(chunk_size=100, chunk_overlap=50)
-        doc_chunks = text_splitter.split_documents(docs)
-
-        # Create an in-memory vector store with embeddings
-        vectorstore = await InMemoryVectorStore.afrom_documents(
-            documents=doc_chunks,
-            collection_name="rag-in-memory",
-            embedding=OpenAIEmbeddings(),
-        )
+        # Build the index once over all chunks, rather than growing it batch by batch
+        self.attach_indexes(vectorstore, loaded=False)
 
         if self.save_vector_store and self.abs_vector_store_path:
             os.makedirs(os.path.dirname(self.abs_vector_store_path), exist_ok=True)
             vectorstore.dump(path=self.abs_vector_store_path)
+            # Written last, so that an interrupted save is rebuilt rather than loaded
+            fingerprint_path: str = get_fingerprint_path(self.abs_vector_store_path)
+            with open(fingerprint_path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump(fingerprints, file)
+            os.replace(fingerprint_path + ".tmp", fingerprint_path)
             logger.info("Vector store saved to: %s", self.abs_vector_store_path)
 
         return vectorstore
 
-    async def query_vectorstore(self, vectorstore: VectorStore, query: str) -> str:
+    def persisted_sources_changed(self, fingerprints: List[str]) -> bool:
+        """
+        :param fingerprints: The current fingerprints of the sources, as returned by get_source_fingerprints()
+        :return: True if the vector store persisted at vector_store_path was built from other versions
+            of the sources, or from sources that were not recorded. Always False for sources without
+            fingerprints, whose persisted store is kept until it is deleted.
+        """
+        if not fingerprints:
+            return False
+        try:
+            with open(get_fingerprint_path(self.abs_vector_store_path), "r", encoding="utf-8") as file:
+                recorded: List[str] = json.load(file)
+        except (FileNotFoundError, ValueError):
+            recorded = None
+        if recorded == fingerprints:
+            return False
+        logger.info("Sources of the vector store at %s changed, rebuilding it", self.abs_vector_store_path)
+        return True
+
+    def split_documents(self, docs: List[Document]) -> List[Document]:
+        """
+        :param docs: Loaded documents
+        :return: The documents split into chunks for embedding and retrieval.
+            Chunks of documents already split in this process are reused.
+        """
+        return DocumentChunker(self.chunk_size, self.chunk_overlap).split_documents(docs)
+
+    async def sync_vector_store(
+        self,
+        versions: Dict[str, Any],
+        fetch_documents: Callable[[List[str]], Awaitable[List[Document]]],
+        source_key: str,
+        source: Dict[str, Any],
+    ) -> NumpyVectorStore:
+        """
+        Incrementally update the vector store persisted at vector_store_path instead of rebuilding it.
+        A manifest next to the vector store records the version of each source document (e.g. page) it holds.
+        Only new and changed documents are fetched and embedded, and chunks of changed and removed
+        documents are deleted. The updated store and manifest are then saved in place if save_vector_store
+        is set. A store or manifest that cannot be loaded is rebuilt from all documents.
+
+        :param versions: Current version of each source document, keyed on document id.
+            Any JSON-serializable value that changes when the document changes.
+        :param fetch_documents: Coroutine function loading the documents with the given ids
+        :param source_key: Metadata key holding the source document id in each loaded document
+        :param source: Identity of the document collection (e.g. url and space), a manifest recorded for
+            another collection is ignored and the store is rebuilt
+        :return: The up to date vector store
+        """
+        manifest_path: str = get_manifest_path(self.abs_vector_store_path)
+        # Chunks split with other settings cannot be kept
+        source = {**source, "chunking": [self.chunk_size, self.chunk_overlap]}
+        vectorstore: Optional[NumpyVectorStore] = None
+        recorded: Dict[str, Any] = {}
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as file:
+                manifest: Dict[str, Any] = json.load(file)
+            if manifest.get("source") == json.loads(json.dumps(source, default=str)):
+                vectorstore = NumpyVectorStore.load(path=self.abs_vector_store_path, embedding=self.get_embeddings())
+                recorded = manifest.get("documents", {})
+            else:
+                logger.info("Manifest at %s was recorded for other sources, rebuilding", manifest_path)
+        except FileNotFoundError:
+            logger.info("No vector store with a manifest at %s, building it", self.abs_vector_store_path)
+        except (ValueError, OSError) as exception:
+            # A corrupt manifest or store, e.g. left by an interrupted save
+            logger.error(
+                "Vector store at %s could not be loaded, rebuilding it: %s", self.abs_vector_store_path, exception
+            )
+            vectorstore = None
+
+        if vectorstore is None:
+            vectorstore = NumpyVectorStore(embedding=self.get_embeddings())
+        self.attach_indexes(vectorstore, loaded=bool(recorded))
+
+        changed: List[str] = [doc_id for doc_id, version in versions.items() if recorded.get(doc_id) != version]
+        stale = set(changed).union(doc_id for doc_id in recorded if doc_id not in versions)
+        logger.info(
+            "Incremental sync: %d documents, %d new or changed, %d removed",
+            len(versions),
+            len(changed),
+            len(stale) - len(changed),
+        )
+        if not stale:
+            return vectorstore
+
+        # Fetch before deleting anything, so that a failed fetch leaves the persisted store intact
+        docs: List[Document] = await fetch_documents(changed) if changed else []
+        vectorstore.delete(
+            [
+                chunk_id
+                for chunk_id, metadata in zip(vectorstore.ids, vectorstore.metadatas)
+                if str(metadata.get(source_key)) in stale
+            ]
+        )
+        await vectorstore.aadd_documents(self.split_documents(docs))
+
+        if not self.save_vector_store:
+            logger.info("Vector store synced in memory only, as save_vector_store is off")
+            return vectorstore
+        os.makedirs(os.path.dirname(self.abs_vector_store_path), exist_ok=True)
+        vectorstore.dump(path=self.abs_vector_store_path)
+        # Write the manifest last, so an interrupted sync is redone rather than recorded as done
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({"source": source, "documents": versions}, file, indent=2, default=str)
+        os.replace(manifest_path + ".tmp", manifest_path)
+        logger.info("Vector store synced to: %s", self.abs_vector_store_path)
+        return vectorstore
+
+    def attach_indexes(self, vectorstore: NumpyVectorStore, loaded: bool):
+        """
+        Attach the configured nearest neighbor index, and the BM25 index if hybrid search is enabled.
+
+        :param vectorstore: The vector store
+        :param loaded: True if the vector store was loaded from vector_store_path
+        """
+        self.attach_vector_index(vectorstore, loaded)
+        if not self.hybrid_search:
+            return
+        index_path: Optional[str] = (
+            get_sparse_index_path(self.abs_vector_store_path) if self.abs_vector_store_path else None
+        )
+        vectorstore.set_sparse_index(Bm25Index(), index_path if loaded else None)
+        if loaded and self.save_vector_store and index_path and not os.path.exists(index_path):
+            vectorstore.sparse_index.save(index_path)
+
+    def attach_vector_index(self, vectorstore: NumpyVectorStore, loaded: bool):
+        """
+        Attach the configured nearest neighbor index to the vector store. For a store loaded
+        from vector_store_path, the index persisted alongside it is reused when up to date.
+
+        :param vectorstore: The vector store
+        :param loaded: True if the vector store was loaded from vector_store_path
+        """
+        index = create_vector_index(self.vector_index, self.vector_index_params)
+        if index is None:
+            return
+        index_path: Optional[str] = None
+        if self.abs_vector_store_path:
+            index_path = get_index_path(self.abs_vector_store_path, index.kind)
+        vectorstore.set_index(index, index_path if loaded else None)
+        if loaded and self.save_vector_store and index_path and not os.path.exists(index_path):
+            index.save(index_path)
+
+    async def query_vectorstore_with_args(self, vectorstore: VectorStore, args: Dict[str, Any]) -> str:
+        """
+        Run the query tool args against the given vector store.
+
+        :param vectorstore: The in-memory vector store to query
+        :param args: Tool args containing:
+          "query": search string
+          "queries": optional list of further search strings answered in the same call
+          "k": optional number of chunks to retrieve per query
+          "score_threshold": optional minimum cosine similarity of retrieved chunks
+        :return: Concatenated text content of the retrieved documents,
+            with one section per query if several were given
+        """
+        queries: List[str] = [args.get("query", "")] + [query for query in args.get("queries") or [] if query]
+        k: int = int(args.get("k") or DEFAULT_K)
+        score_threshold: Optional[float] = args.get("score_threshold")
+        if score_threshold is not None:
+            score_threshold = float(score_threshold)
+
+        answers: List[str] = await self.query_vectorstore_batch(vectorstore, queries, k, score_threshold)
+        if len(answers) == 1:
+            return answers[0]
+        return "\n\n".join(f"Results for '{query}':\n{answer}" for query, answer in zip(queries, answers))
+
+    async def query_vectorstore(
+        self, vectorstore: VectorStore, query: str, k: int = DEFAULT_K, score_threshold: Optional[float] = None
+    ) -> str:
         """
         Query the given vector store using the provided query string
         and return the combined content of retrieved documents.
 
         :param vectorstore: The in-memory vector store to query
         :param query: The user query to search for relevant documents
+        :param k: Number of chunks to retrieve
+        :param score_threshold: Optional minimum cosine similarity of retrieved chunks
         :return: Concatenated text content of the retrieved documents
         """
-        # Create a retriever interface from the vector store
-        retriever: VectorStoreRetriever = vectorstore.as_retriever()
+        return (await self.query_vectorstore_batch(vectorstore, [query], k, score_threshold))[0]
+
+    async def query_vectorstore_batch(
+        self, vectorstore: VectorStore, queries: List[str], k: int = DEFAULT_K, score_threshold: Optional[float] = None
+    ) -> List[str]:
+        """
+        Query the given vector store with several query strings at once
+        and return the combined content of retrieved documents for each.
 
-        # Perform an asynchronous similarity search
-        results: List[Document] = await retriever.ainvoke(query)
+        :param vectorstore: The in-memory vector store to query
+        :param queries: The user queries to search for relevant documents
+        :param k: Number of chunks to retrieve per query
+        :param score_threshold: Optional minimum cosine similarity of retrieved chunks
+        :return: Concatenated text content of the retrieved documents, one string per query
+        """
+        results: List[List[Document]]
+        if isinstance(vectorstore, NumpyVectorStore) and self.hybrid_search and vectorstore.sparse_index is not None:
+            # Dense and BM25 rankings fused per query
+            scored = await vectorstore.abatch_hybrid_search_with_score(queries, k, score_threshold)
+            results = [[doc for doc, _ in hits] for hits in scored]
+        elif isinstance(vectorstore, NumpyVectorStore):
+            # Vectorized top-k over all queries at once
+            scored = await vectorstore.abatch_similarity_search_with_score(queries, k, score_threshold)
+            results = [[doc for doc, _ in hits] for hits in scored]
+        else:
+            # Create a retriever interface from the vector store
+            search_kwargs = {"k": k}
+            search_type: str = "similarity"
+            if score_threshold is not None:
+                search_kwargs["score_threshold"] = score_threshold
+                search_type = "similarity_score_threshold"
+            retriever: VectorStoreRetriever = vectorstore.as_retriever(
+                search_type=search_type, search_kwargs=search_kwargs
+            )
+            # Perform an asynchronous similarity search
+            results = [await retriever.ainvoke(query) for query in queries]
 
-        if results:
+        if any(results):
             logger.info("Retrieval completed!")
 
         # Concatenate the content of all retrieved documents
-        return "\n\n".join(doc.page_content for doc in results)
+        return ["\n\n".join(doc.page_content for doc in docs) for docs in results]
@@ -0,0 +1,225 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import logging
+import os
+import re
+from collections import Counter
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+
+# BM25 term frequency saturation and document length normalization
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+# Runs of letters and digits, possibly joined by "-", "_", ".", "/" or ":" as in
+# policy numbers (POL-2023-001), error codes (ERR_1042), versions (v2.3.1) or paths
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:[-_./:][^\W_]+)*")
+SEPARATOR_PATTERN = re.compile(r"[-_./:]")
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    :param text: A chunk or query text
+    :return: Its lowercase terms. Identifiers joined by separators are kept whole and
+        also split into their parts, so "POL-2023-001" matches both itself and "2023".
+    """
+    terms: List[str] = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        term: str = match.group()
+        terms.append(term)
+        if SEPARATOR_PATTERN.search(term):
+            terms.extend(part for part in SEPARATOR_PATTERN.split(term) if part)
+    return terms
+
+
+def get_sparse_index_path(vector_store_path: str) -> str:
+    """
+    :param vector_store_path: Path of the persisted vector store
+    :return: Path of the BM25 index persisted alongside the vector store
+    """
+    return f"{os.path.splitext(vector_store_path)[0]}.bm25.npz"
+
+
+class Bm25Index:
+    """
+    In-memory BM25 inverted index over the chunk texts of a NumpyVectorStore.
+    Rows are identified by their position in the store, like the rows of its vector matrix.
+
+    Each term maps to a posting list of (row, term frequency) held in NumPy arrays, so a query
+    is scored by a few vectorized operations over the postings of its terms only.
+    """
+
+    def __init__(self, k1: float = DEFAULT_K1, b: float = DEFAULT_B):
+        """
+        :param k1: Term frequency saturation
+        :param b: Document length normalization, 0 for none and 1 for full
+        """
+        self.k1: float = k1
+        self.b: float = b
+        self.doc_lengths: np.ndarray = np.zeros(0, dtype=np.float32)
+        # term -> (rows, term frequencies)
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        # Postings of rows added since the last query, merged lazily
+        self.pending: Dict[str, Tuple[List[int], List[int]]] = {}
+        # Length normalization of each row, computed lazily
+        self.norms: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def build(self, texts: Iterable[str]):
+        """
+        (Re)build the index from scratch, e.g. after rows were deleted.
+
+        :param texts: The chunk texts of all rows, in row order
+        """
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self.postings = {}
+        self.pending = {}
+        self.add(texts)
+
+    def add(self, texts: Iterable[str]):
+        """
+        Index chunk texts appended to the store.
+
+        :param texts: The appended chunk texts, in row order
+        """
+        start_row: int = len(self.doc_lengths)
+        lengths: List[int] = []
+        for row, text in enumerate(texts, start=start_row):
+            counts: Counter = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                rows, frequencies = self.pending.setdefault(term, ([], []))
+                rows.append(row)
+                frequencies.append(count)
+        self.doc_lengths = np.concatenate([self.doc_lengths, np.asarray(lengths, dtype=np.float32)])
+        self.norms = None
+
+    def merge_pending(self):
+        """
+        Merge the postings of recently added rows into the NumPy posting lists.
+        """
+        for term, (rows, frequencies) in self.pending.items():
+            new_rows: np.ndarray = np.asarray(rows, dtype=np.int32)
+            new_frequencies: np.ndarray = np.asarray(frequencies, dtype=np.float32)
+            existing: Optional[Tuple[np.ndarray, np.ndarray]] = self.postings.get(term)
+            if existing is not None:
+                new_rows = np.concatenate([existing[0], new_rows])
+                new_frequencies = np.concatenate([existing[1], new_frequencies])
+            self.postings[term] = (new_rows, new_frequencies)
+        self.pending = {}
+
+    def is_consistent(self, count: int) -> bool:
+        """
+        :param count: Number of rows of the store
+        :return: True if the index covers exactly the rows of the store, e.g. after loading it from a file
+        """
+        return len(self.doc_lengths) == count
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """
+        :param query: The query text
+        :param k: Number of rows to return
+        :return: Up to k (row, BM25 score) tuples of rows containing a query term, best first
+        """
+        if self.pending:
+            self.merge_pending()
+        count: int = len(self.doc_lengths)
+        terms: List[str] = [term for term in dict.fromkeys(tokenize(query)) if term in self.postings]
+        if not count or not terms:
+            return []
+
+        if self.norms is None:
+            average_length: float = float(self.doc_lengths.mean()) or 1.0
+            self.norms = self.k1 * (1.0 - self.b + self.b * self.doc_lengths / average_length)
+        # Rows are unique within a posting list, so scores accumulate with plain fancy indexing
+        scores: np.ndarray = np.zeros(count, dtype=np.float32)
+        for term in terms:
+            rows, frequencies = self.postings[term]
+            idf: float = float(np.log(1.0 + (count - len(rows) + 0.5) / (len(rows) + 0.5)))
+            scores[rows] += idf * frequencies * (self.k1 + 1.0) / (frequencies + self.norms[rows])
+        # idf is always positive, so the matching rows are those with a positive score
+        rows = np.flatnonzero(scores)
+        row_scores: np.ndarray = scores[rows]
+
+        if k < len(rows):
+            best: np.ndarray = np.argpartition(-row_scores, k - 1)[:k]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(-row_scores[best], kind="stable")]
+        return list(zip(rows[best].tolist(), row_scores[best].tolist()))
+
+    def save(self, path: str):
+        """
+        :param path: File to persist the index to
+        """
+        if self.pending:
+            self.merge_pending()
+        terms: List[str] = list(self.postings)
+        lengths: np.ndarray = np.asarray([len(self.postings[term][0]) for term in terms], dtype=np.int64)
+        with open(path + ".tmp", "wb") as file:
+            np.savez(
+                file,
+                params=np.asarray([self.k1, self.b], dtype=np.float64),
+                doc_lengths=self.doc_lengths,
+                terms=np.asarray(terms, dtype=np.str_),
+                offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+                rows=np.concatenate([self.postings[term][0] for term in terms] or [np.zeros(0, np.int32)]),
+                frequencies=np.concatenate([self.postings[term][1] for term in terms] or [np.zeros(0, np.float32)]),
+            )
+        os.replace(path + ".tmp", path)
+
+    def load(self, path: str):
+        """
+        :param path: File the index was persisted to
+        :raises FileNotFoundError: If the file does not exist
+        """
+        with np.load(path, allow_pickle=False) as data:
+            self.k1, self.b = (float(value) for value in data["params"])
+            self.doc_lengths = data["doc_lengths"]
+            terms: Sequence[str] = data["terms"].tolist()
+            offsets: np.ndarray = data["offsets"]
+            rows: np.ndarray = data["rows"]
+            frequencies: np.ndarray = data["frequencies"]
+        self.postings = {
+            term: (rows[offsets[i] : offsets[i + 1]], frequencies[offsets[i] : offsets[i + 1]])
+            for i, term in enumerate(terms)
+        }
+        self.pending = {}
+        self.norms = None
+        logger.info("Loaded BM25 index of %d terms over %d chunks from: %s", len(terms), len(self.doc_lengths), path)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int, rrf_k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Fuse several rankings of the same rows with reciprocal rank fusion:
+    each row scores the sum of 1 / (rrf_k + rank) over the rankings it appears in.
+
+    :param rankings: Lists of rows, best first
+    :param k: Number of rows to return
+    :param rrf_k: Damping constant, 60 in the original paper
+    :return: Up to k (row, fused score) tuples, best first
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])[:k]
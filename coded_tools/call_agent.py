@@ -1,20 +1,21 @@
+import asyncio
 import logging
-import os
 from typing import Any
 from typing import Dict
-from typing import Tuple
+from typing import List
 from typing import Union
 
-from neuro_san.client.agent_session_factory import AgentSessionFactory
-from neuro_san.client.streaming_input_processor import StreamingInputProcessor
-from neuro_san.interfaces.agent_session import AgentSession
 from neuro_san.interfaces.coded_tool import CodedTool
 
+from coded_tools.agent_session_pool import get_agent_session_pool
+from coded_tools.agent_session_pool import new_agent_state_info
+
 CONNECTION_TYPE = "direct"
 HOST = "localhost"
 PORT = 30012
 LOCAL_EXTERNALS_DIRECT = False
-AGENT_THINKING_PATH = "/tmp/agent_thinking.txt"  # Or wherever you want
+# Seconds a call may take before it is abandoned
+CALL_TIMEOUT = 300.0
 
 
 class CallAgent(CodedTool):
@@ -31,6 +32,8 @@ class CallAgent(CodedTool):
                 The argument dictionary expects the following keys:
                     "inquiry" the query for the agent.
                     "agent_name" the agent that answer the query.
+                Optional keys are "connection_type", "host", "port", "local_external_direct"
+                and "timeout", the seconds the call may take.
 
         :param sly_data: A dictionary whose keys are defined by the agent hierarchy,
                 but whose values are meant to be kept out of the chat stream.
@@ -67,82 +70,157 @@ class CallAgent(CodedTool):
         host: int = args.get("host", HOST)
         port: int = args.get("port", PORT)
         local_externals_direct: bool = args.get("local_external_direct", LOCAL_EXTERNALS_DIRECT)
-        agent_thinking_path: str = args.get("agent_thinking_path", AGENT_THINKING_PATH)
+        timeout: float = args.get("timeout", CALL_TIMEOUT)
 
         logger = logging.getLogger(self.__class__.__name__)
         logger.info(">>>>>>>>>>>>>>>>>>>CallAgent>>>>>>>>>>>>>>>>>>")
         logger.info("inquiry: %s", str(inquiry))
         logger.info("agent_name: %s", str(agent_name))
 
-        agent_session = sly_data.get("agent_session", None)
-        agent_state_info = sly_data.get("agent_state_info", None)
-        if not agent_state_info or not agent_session:
-            agent_session, agent_state_info = set_up_agent(
-                agent_name, connection_type, host, port, local_externals_direct
+        # A copy, so that concurrent calls in the same conversation do not share the state
+        agent_state_info = dict(sly_data.get("agent_state_info", None) or new_agent_state_info())
+        agent_state_info["user_input"] = inquiry
+        try:
+            # Run the exchange on a warm session of the process-wide pool, in one of its worker
+            # threads, so that the event loop keeps serving other requests meanwhile
+            agent_state_info = await get_agent_session_pool().async_process(
+                agent_name, connection_type, host, port, agent_state_info, local_externals_direct, timeout
             )
-        response, agent_state_info = call_agent(agent_session, agent_state_info, inquiry, agent_thinking_path)
-        sly_data["agent_session"] = agent_session
+        except TimeoutError:
+            logger.warning("%s did not answer within %s seconds", agent_name, timeout)
+            return f"Error: {agent_name} did not answer within {timeout} seconds."
         sly_data["agent_state_info"] = agent_state_info
+        response = agent_state_info.get("last_chat_response")
 
         logger.info(">>>>>>>>>>>>>>>>>>>DONE !!!>>>>>>>>>>>>>>>>>>")
         return response
 
 
-def set_up_agent(
-    agent_name: str, connection_type: str, host: int, port: int, local_externals_direct: bool
-) -> Tuple[AgentSession, Dict[str, Any]]:
-    """Configure these as needed."""
-
-    metadata = {"user_id": os.environ.get("USER")}
-
-    # Create session factory and agent session
-    factory = AgentSessionFactory()
-    agent_session = factory.create_session(connection_type, agent_name, host, port, local_externals_direct, metadata)
-    # Initialize any conversation state here
-    agent_state_info = {
-        "last_chat_response": None,
-        "prompt": "Please enter your response ('quit' to terminate):\n",
-        "timeout": 5000.0,
-        "num_input": 0,
-        "user_input": None,
-        "sly_data": None,
-        "chat_filter": {"chat_filter_type": "MAXIMAL"},
-    }
-    return agent_session, agent_state_info
-
-
-def call_agent(
-    agent_session: AgentSession, agent_state_info: Dict[str, Any], user_input: str, agent_thinking_path: str
-) -> Tuple[Union[str], Dict[str, Any]]:
+class CallAgents(CodedTool):
     """
-    Processes a single turn of user input within the selected agent's session.
-
-    This function simulates a conversational turn by:
-    1. Initializing a StreamingInputProcessor to handle the input.
-    2. Updating the agent's internal state with the user's input (`thoughts`).
-    3. Passing the updated to the processor for handling.
-    4. Extracting and returning the agent's response for this turn.
-
-    Parameters:
-        agent_session: An active session object for the selected agent.
-        agent_state_info (dict): The agent's current conversation state.
-        user_input (str): The user's input or query to be processed.
-
-    Returns:
-        tuple:
-            - last_chat_response (str or None): The agent's response to the input.
-            - agent_state_info (dict): The updated state after processing.
+    CodedTool implementation which calls several agent networks concurrently, so that fanning out
+    to them takes about as long as the slowest one answers instead of the sum of their latencies.
     """
-    # Use the processor (like in agent_cli.py)
-    input_processor = StreamingInputProcessor(
-        "DEFAULT",
-        agent_thinking_path,
-        agent_session,
-        None,  # Not using a thinking_dir for simplicity
-    )
-    # Update the conversation state with this turn's input
-    agent_state_info["user_input"] = user_input
-    agent_state_info = input_processor.process_once(agent_state_info)
-    # Get the agent response for this turn
-    last_chat_response = agent_state_info.get("last_chat_response")
-    return last_chat_response, agent_state_info
+
+    async def async_invoke(self, args: Dict[str, Any], sly_data: Dict[str, Any]) -> Union[Dict[str, Any], str]:
+        """
+        :param args: An argument dictionary whose keys are the parameters
+                to the coded tool and whose values are the values passed for them
+                by the calling agent.  This dictionary is to be treated as read-only.
+
+                The argument dictionary expects the following keys:
+                    "calls" a list of calls, each a dictionary with the "agent_name" to call,
+                        and optionally its "inquiry" and "timeout", or an [agent_name, inquiry] pair.
+                Optional keys are "inquiry", sent to the agents of calls without their own,
+                "connection_type", "host", "port", "local_external_direct"
+                and "timeout", the seconds each call may take.
+
+        :param sly_data: A dictionary whose keys are defined by the agent hierarchy,
+                but whose values are meant to be kept out of the chat stream.
+
+                Keys used by this implementation are:
+                    "agent_state_infos" the conversation state with each agent called,
+                        by agent name, which this tool creates and updates.
+
+        :return:
+            In case of successful execution:
+                A dictionary with the "results" of the calls, in the order of the calls,
+                each a dictionary with the "agent_name" and either its "answer",
+                or an "error" if that agent failed or did not answer in time.
+                The answers of the other agents are returned all the same.
+            otherwise:
+                a text string an error message in the format:
+                "Error: <error message>"
+        """
+        targets: Union[List[Dict[str, Any]], str] = self.parse_calls(args)
+        if isinstance(targets, str):
+            return targets
+
+        # Optional args
+        connection_type: str = args.get("connection_type", CONNECTION_TYPE)
+        host: int = args.get("host", HOST)
+        port: int = args.get("port", PORT)
+        local_externals_direct: bool = args.get("local_external_direct", LOCAL_EXTERNALS_DIRECT)
+
+        logger = logging.getLogger(self.__class__.__name__)
+        logger.info(">>>>>>>>>>>>>>>>>>>CallAgents>>>>>>>>>>>>>>>>>>")
+        logger.info("agent_names: %s", str([target["agent_name"] for target in targets]))
+
+        agent_state_infos: Dict[str, Dict[str, Any]] = sly_data.get("agent_state_infos") or {}
+        requests: List[Any] = []
+        for target in targets:
+            # A copy, so that the calls do not share the state of an agent called twice
+            agent_state_info = dict(agent_state_infos.get(target["agent_name"]) or new_agent_state_info())
+            agent_state_info["user_input"] = target["inquiry"]
+            requests.append(
+                get_agent_session_pool().async_process(
+                    target["agent_name"],
+                    connection_type,
+                    host,
+                    port,
+                    agent_state_info,
+                    local_externals_direct,
+                    target["timeout"],
+                )
+            )
+        # Every call runs to its own timeout, and a failed call does not cancel the others
+        outcomes: List[Any] = await asyncio.gather(*requests, return_exceptions=True)
+
+        results: List[Dict[str, Any]] = [
+            self.to_result(target, outcome, agent_state_infos) for target, outcome in zip(targets, outcomes)
+        ]
+        sly_data["agent_state_infos"] = agent_state_infos
+
+        logger.info(">>>>>>>>>>>>>>>>>>>DONE !!!>>>>>>>>>>>>>>>>>>")
+        return {"results": results}
+
+    @staticmethod
+    def parse_calls(args: Dict[str, Any]) -> Union[List[Dict[str, Any]], str]:
+        """
+        :param args: The argument dictionary of the tool
+        :return: The "agent_name", "inquiry" and "timeout" of every call, or an error message
+        """
+        calls: List[Any] = args.get("calls") or []
+        if not calls:
+            return "Error: No calls provided."
+        default_inquiry: str = args.get("inquiry", "")
+        default_timeout: float = args.get("timeout", CALL_TIMEOUT)
+
+        targets: List[Dict[str, Any]] = []
+        for call in calls:
+            if isinstance(call, dict):
+                target: Dict[str, Any] = {
+                    "agent_name": call.get("agent_name"),
+                    "inquiry": call.get("inquiry") or default_inquiry,
+                    "timeout": call.get("timeout", default_timeout),
+                }
+            elif isinstance(call, (list, tuple)) and len(call) == 2:
+                target = {"agent_name": call[0], "inquiry": call[1] or default_inquiry, "timeout": default_timeout}
+            else:
+                return f"Error: Call {call} is neither an object nor an [agent_name, inquiry] pair."
+            if not target["agent_name"]:
+                return f"Error: No 'agent_name' in call {call}."
+            if not target["inquiry"]:
+                return f"Error: No inquiry provided for {target['agent_name']}."
+            targets.append(target)
+        return targets
+
+    def to_result(
+        self, target: Dict[str, Any], outcome: Any, agent_state_infos: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        :param target: The "agent_name", "inquiry" and "timeout" of a call
+        :param outcome: The updated conversation state with the agent, or the exception the call raised
+        :param agent_state_infos: The conversation state with each agent, updated with the outcome
+        :return: The result of the call, with the "agent_name" and either its "answer" or an "error"
+        """
+        logger = logging.getLogger(self.__class__.__name__)
+        agent_name: str = target["agent_name"]
+        if isinstance(outcome, TimeoutError):
+            logger.warning("%s did not answer within %s seconds", agent_name, target["timeout"])
+            return {"agent_name": agent_name, "error": f"No answer within {target['timeout']} seconds."}
+        if isinstance(outcome, Exception):
+            logger.warning("Call to %s failed: %s", agent_name, outcome)
+            return {"agent_name": agent_name, "error": str(outcome)}
+        agent_state_infos[agent_name] = outcome
+        return {"agent_name": agent_name, "answer": outcome.get("last_chat_response")}
@@ -0,0 +1,209 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import copy
+import functools
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Chunk size and overlap in tokens, as the RAG tools have always used
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_CHUNK_OVERLAP = 50
+# Encoding used by RecursiveCharacterTextSplitter.from_tiktoken_encoder() by default
+DEFAULT_ENCODING = "gpt2"
+# Metadata key of the token count of a chunk, so that embedding batches are sized without tokenizing it again
+TOKEN_COUNT_KEY = "token_count"
+
+# Rough characters per token, used if a tiktoken encoding cannot be loaded (e.g. offline)
+CHARS_PER_TOKEN = 4
+
+# Upper bound on the characters of the chunks memoized per process (about 256 MB of text)
+DEFAULT_MAX_MEMO_CHARS = 128 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def get_token_encoder(encoding_name: str) -> Optional[Any]:
+    """
+    :param encoding_name: Name of a tiktoken encoding, e.g. "gpt2" or "cl100k_base"
+    :return: The encoding, loaded once per process, or None if it cannot be loaded
+    """
+    try:
+        # pylint: disable=import-outside-toplevel
+        import tiktoken
+
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as exception:  # pylint: disable=broad-exception-caught
+        logger.warning("Could not load tiktoken encoding %s, estimating tokens: %s", encoding_name, exception)
+        return None
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """
+    :param text: A text
+    :param encoding_name: Name of the tiktoken encoding
+    :return: Its number of tokens, estimated from its length if the encoding cannot be loaded
+    """
+    encoder = get_token_encoder(encoding_name)
+    if encoder is None:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+class ChunkMemo:
+    """
+    Process-wide memo of the chunks of each document text, with their token counts, for given chunking settings,
+    so that documents already split once, e.g. by another tool instance or a previous
+    build, are not tokenized again. Least recently used entries are evicted beyond a size limit.
+    """
+
+    def __init__(self, max_chars: int = DEFAULT_MAX_MEMO_CHARS):
+        """
+        :param max_chars: Upper bound on the characters of the memoized chunks
+        """
+        self.max_chars: int = max_chars
+        self.entries: OrderedDict[str, Tuple[Tuple[str, int], ...]] = OrderedDict()
+        self.total_chars: int = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(settings: Tuple[Any, ...], text: str) -> str:
+        """
+        :param settings: The chunking settings
+        :param text: The document text
+        :return: The memo key
+        """
+        digest = hashlib.sha256(repr(settings).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[Tuple[str, int], ...]]:
+        """
+        :param key: The memo key
+        :return: The memoized chunk texts and token counts, or None
+        """
+        with self.lock:
+            chunks: Optional[Tuple[Tuple[str, int], ...]] = self.entries.get(key)
+            if chunks is not None:
+                self.entries.move_to_end(key)
+            return chunks
+
+    def put(self, key: str, chunks: Tuple[Tuple[str, int], ...]):
+        """
+        :param key: The memo key
+        :param chunks: The chunk texts and token counts
+        """
+        size: int = self.count_chars(chunks)
+        if size > self.max_chars:
+            return
+        with self.lock:
+            previous: Optional[Tuple[Tuple[str, int], ...]] = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_chars -= self.count_chars(previous)
+            self.entries[key] = chunks
+            self.total_chars += size
+            while self.total_chars > self.max_chars:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_chars -= self.count_chars(evicted)
+
+    @staticmethod
+    def count_chars(chunks: Tuple[Tuple[str, int], ...]) -> int:
+        """
+        :param chunks: The chunk texts and token counts
+        :return: The characters of the chunk texts
+        """
+        return sum(len(chunk) for chunk, _ in chunks)
+
+
+_MEMO = ChunkMemo()
+
+
+class DocumentChunker:
+    """
+    Splits documents into chunks of a number of tokens with RecursiveCharacterTextSplitter,
+    reusing the process-wide tiktoken encoder and the memoized chunks of documents seen before.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+        encoding_name: str = DEFAULT_ENCODING,
+        length_function: Optional[Callable[[str], int]] = None,
+        memo: Optional[ChunkMemo] = None,
+    ):
+        """
+        :param chunk_size: Maximum tokens per chunk
+        :param chunk_overlap: Tokens shared by consecutive chunks
+        :param encoding_name: Name of the tiktoken encoding counting the tokens
+        :param length_function: Optional function measuring texts instead of the tiktoken encoding
+        :param memo: Memo of chunks, the process-wide one if None
+        :raises ValueError: If the settings are inconsistent
+        """
+        if chunk_size <= 0 or chunk_overlap < 0 or chunk_overlap >= chunk_size:
+            raise ValueError(
+                f"chunk_size must be positive and chunk_overlap between 0 and chunk_size, "
+                f"got: {chunk_size} and {chunk_overlap}"
+            )
+        self.settings: Tuple[Any, ...] = (
+            chunk_size,
+            chunk_overlap,
+            encoding_name if length_function is None else getattr(length_function, "__qualname__", "custom"),
+        )
+        self.memo: ChunkMemo = memo or _MEMO
+        self.length_function: Callable[[str], int] = length_function or functools.partial(
+            count_tokens, encoding_name=encoding_name
+        )
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=self.length_function
+        )
+
+    def split_text_with_counts(self, text: str) -> Tuple[Tuple[str, int], ...]:
+        """
+        :param text: A document text
+        :return: Its chunks and their token counts, memoized
+        """
+        key: str = self.memo.make_key(self.settings, text)
+        chunks: Optional[Tuple[Tuple[str, int], ...]] = self.memo.get(key)
+        if chunks is None:
+            chunks = tuple((chunk, self.length_function(chunk)) for chunk in self.splitter.split_text(text))
+            self.memo.put(key, chunks)
+        return chunks
+
+    def split_text(self, text: str) -> Tuple[str, ...]:
+        """
+        :param text: A document text
+        :return: Its chunks, memoized
+        """
+        return tuple(chunk for chunk, _ in self.split_text_with_counts(text))
+
+    def split_documents(self, docs: List[Document]) -> List[Document]:
+        """
+        :param docs: Loaded documents
+        :return: Their chunks, carrying a copy of the metadata of their document and their token count
+        """
+        return [
+            Document(page_content=chunk, metadata={**copy.deepcopy(doc.metadata), TOKEN_COUNT_KEY: tokens})
+            for doc in docs
+            for chunk, tokens in self.split_text_with_counts(doc.page_content)
+        ]
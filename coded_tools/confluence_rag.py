@@ -11,6 +11,7 @@
 #
 # END COPYRIGHT
 
+import asyncio
 import inspect
 import os
 from typing import Any
@@ -27,6 +28,7 @@ from requests.exceptions import HTTPError
 from neuro_san.interfaces.coded_tool import CodedTool
 
 from .base_rag import BaseRag
+from .numpy_vector_store import NumpyVectorStore
 
 INVALID_PATH_PATTERN = r"[<>:\"|?*\x00-\x1F]"
 
@@ -39,12 +41,20 @@ class ConfluenceRag(CodedTool, BaseRag):
     CodedTool implementation which provides a way to do RAG on confluence pages
     """
 
+    def __init__(self):
+        super().__init__()
+        # Only fetch and embed pages whose version changed since the vector store was saved if True
+        self.incremental_sync: bool = False
+
     async def async_invoke(self, args: Dict[str, Any], sly_data: Dict[str, Any]) -> str:
         """
         Load confluence pages from URLs, build a vector store, and run a query against it.
 
         :param args: Dictionary containing:
           "query": search string
+          "queries": optional list of further search strings answered in the same call
+          "k": optional number of chunks to retrieve per query
+          "score_threshold": optional minimum cosine similarity of retrieved chunks
 
         :param sly_data: A dictionary whose keys are defined by the agent
             hierarchy, but whose values are meant to be kept out of the
@@ -99,19 +109,37 @@ class ConfluenceRag(CodedTool, BaseRag):
                 "https://your-domain.atlassian.net/wiki/spaces/<space_key>/pages/<page_id>/<title>"
             )
 
-        # Save the generated vector store as a JSON file if True
+        # Save the generated vector store to vector_store_path if True
         self.save_vector_store = args.get("save_vector_store", False)
 
         # Configure the vector store path
         self.configure_vector_store_path(args.get("vector_store_path"))
 
+        # Configure the embedding cache so unchanged chunks are not re-embedded
+        self.configure_embedding_cache(args.get("embedding_cache_path"), args.get("embedding_cache_max_bytes"))
+
+        # Configure how documents are split into chunks
+        self.configure_chunking(args.get("chunk_size"), args.get("chunk_overlap"))
+
+        # Configure batching, concurrency and rate limit handling of the embedding requests
+        self.configure_embedding_scheduler(args.get("embedding_scheduler"))
+
+        # Configure the nearest neighbor index used for retrieval
+        self.configure_vector_index(args.get("vector_index"), args.get("vector_index_params"))
+
+        # Configure hybrid BM25 and dense retrieval
+        self.configure_hybrid_search(args.get("hybrid_search"))
+
+        # Update the saved vector store with changed pages only, instead of reloading the whole space
+        self.incremental_sync = bool(args.get("incremental_sync", False))
+
         # Prepare the vector store
         vectorstore = await self.generate_vector_store(
             loader_args=loader_args
         )
 
         # Run the query against the vector store
-        return await self.query_vectorstore(vectorstore, query)
+        return await self.query_vectorstore_with_args(vectorstore, args)
 
     async def load_documents(self, loader_args: Dict[str, Any]) -> List[Document]:
         """
@@ -133,4 +161,133 @@ class ConfluenceRag(CodedTool, BaseRag):
             logger.error("API Permission error while loading from %s: %s", url, api_error)
 
         return docs
-    
\ No newline at end of file
+
+    async def build_vector_store(self, loader_args: Dict[str, Any]) -> NumpyVectorStore:
+        """
+        Build the vector store, incrementally syncing the one saved at vector_store_path
+        when incremental_sync is enabled.
+
+        :param loader_args: Dictionary containing 'url', 'space_key', and/or 'page_ids' of the Confluence pages to load
+        :return: In-memory vector store containing the embedded page chunks
+        """
+        if not self.incremental_sync or not self.abs_vector_store_path:
+            return await super().build_vector_store(loader_args)
+        if loader_args.get("label") or loader_args.get("cql"):
+            logger.warning("incremental_sync supports 'space_key' and 'page_ids' only, reloading all pages")
+            return await super().build_vector_store(loader_args)
+
+        url = loader_args.get("url")
+        try:
+            loader = ConfluenceLoader(**loader_args)
+            versions: Dict[str, Any] = await asyncio.to_thread(self.list_page_versions, loader)
+        except (HTTPError, ApiPermissionError) as error:
+            logger.error("Error while listing page versions from %s: %s", url, error)
+            return await super().build_vector_store(loader_args)
+
+        source: Dict[str, Any] = {
+            "url": url,
+            "space_key": loader_args.get("space_key"),
+            "page_ids": loader_args.get("page_ids"),
+        }
+        return await self.sync_vector_store(
+            versions=versions,
+            fetch_documents=lambda page_ids: self.fetch_pages(loader_args, page_ids),
+            source_key="id",
+            source=source,
+        )
+
+    async def get_source_fingerprints(self, loader_args: Dict[str, Any]) -> List[str]:
+        """
+        With incremental_sync, fingerprint the pages so that an edit replaces the registered vector
+        store and runs the sync, rather than serving the registered store until its TTL expires.
+        Fingerprinting takes one search request for the space and one request per page id, and does
+        not list all pages of the space.
+
+        :param loader_args: Dictionary containing 'url', 'space_key', and/or 'page_ids' of the Confluence pages to load
+        :return: The fingerprints of the space and pages, or an empty list without incremental_sync
+        """
+        if not self.incremental_sync or not self.abs_vector_store_path:
+            return []
+        if loader_args.get("label") or loader_args.get("cql"):
+            return []
+        try:
+            loader = ConfluenceLoader(**loader_args)
+            return await asyncio.to_thread(self.fingerprint_pages, loader)
+        except (HTTPError, ApiPermissionError) as error:
+            # Unknown state, rely on the registry TTL
+            logger.warning("Could not fingerprint the pages of %s: %s", loader_args.get("url"), error)
+            return []
+
+    @staticmethod
+    def fingerprint_pages(loader: ConfluenceLoader) -> List[str]:
+        """
+        :param loader: ConfluenceLoader configured with 'space_key' and/or 'page_ids'
+        :return: For the space, its number of pages and its most recently modified page, which change
+            when a page is added, removed or edited. Then the version of each page id.
+        """
+        fingerprints: List[str] = []
+        if loader.space_key:
+            search: Dict[str, Any] = loader.confluence.cql(
+                f'type = page and space = "{loader.space_key}" order by lastmodified desc',
+                limit=1,
+                include_archived_spaces=loader.include_archived_content,
+            )
+            latest: List[Dict[str, Any]] = search.get("results") or [{}]
+            fingerprints.append(
+                "|".join(
+                    [
+                        loader.space_key,
+                        str(search.get("totalSize")),
+                        str((latest[0].get("content") or {}).get("id")),
+                        str(latest[0].get("lastModified")),
+                    ]
+                )
+            )
+        for page_id in loader.page_ids or []:
+            page: Dict[str, Any] = loader.confluence.get_page_by_id(page_id=page_id, expand="version")
+            fingerprints.append(f"{page_id}|{(page.get('version') or {}).get('number')}")
+        return fingerprints
+
+    @staticmethod
+    def list_page_versions(loader: ConfluenceLoader) -> Dict[str, Any]:
+        """
+        List the pages to index with their version, without downloading their content.
+
+        :param loader: ConfluenceLoader configured with 'space_key' and/or 'page_ids'
+        :return: Dictionary of page id to {"number": version number, "when": last modified time}
+        """
+        pages: List[Dict[str, Any]] = []
+        if loader.space_key:
+            pages.extend(
+                loader.paginate_request(
+                    loader.confluence.get_all_pages_from_space,
+                    space=loader.space_key,
+                    limit=loader.limit,
+                    max_pages=loader.max_pages,
+                    status="any" if loader.include_archived_content else "current",
+                    expand="version",
+                )
+            )
+        for page_id in loader.page_ids or []:
+            pages.append(loader.confluence.get_page_by_id(page_id=page_id, expand="version"))
+
+        versions: Dict[str, Any] = {}
+        for page in pages:
+            version: Dict[str, Any] = page.get("version") or {}
+            versions[str(page["id"])] = {"number": version.get("number"), "when": version.get("when")}
+        return versions
+
+    @staticmethod
+    async def fetch_pages(loader_args: Dict[str, Any], page_ids: List[str]) -> List[Document]:
+        """
+        Load the content of the given pages only. Errors are raised rather than logged,
+        so that a failed fetch does not record the pages as synced.
+
+        :param loader_args: Dictionary containing the ConfluenceLoader arguments
+        :param page_ids: Ids of the pages to load
+        :return: List of loaded Confluence pages
+        """
+        page_args: Dict[str, Any] = {**loader_args, "space_key": None, "page_ids": page_ids}
+        docs: List[Document] = await ConfluenceLoader(**page_args).aload()
+        logger.info("Fetched %d changed Confluence pages from %s", len(docs), loader_args.get("url"))
+        return docs
@@ -1,16 +1,18 @@
 import logging
-import os
 from typing import Any
 from typing import Dict
 from typing import Union
 
-from neuro_san.client.agent_session_factory import AgentSessionFactory
-from neuro_san.client.streaming_input_processor import StreamingInputProcessor
 from neuro_san.interfaces.coded_tool import CodedTool
 
+from coded_tools.agent_session_pool import get_agent_session_pool
+from coded_tools.agent_session_pool import new_agent_state_info
+
 CONNECTION_TYPE = "direct"
 HOST = "localhost"
 PORT = 30011
+# Seconds a call may take before it is abandoned
+CALL_TIMEOUT = 300.0
 
 
 class CallAgent(CodedTool):
@@ -72,71 +74,20 @@ class CallAgent(CodedTool):
         logger.info("mode: %s", str(mode))
         logger.info("agent_name: %s", str(self.agent_name))
 
-        agent_session = sly_data.get("agent_session", None)
-        self.agent_state_info = sly_data.get("agent_state_info", None)
-        if not self.agent_state_info or not agent_session:
-            agent_session, self.agent_state_info = self.set_up_agent()
-        response, self.agent_state_info = self.call_agent(agent_session, inquiry + mode)
-        sly_data["agent_session"] = agent_session
+        # A copy, so that concurrent calls in the same conversation do not share the state
+        self.agent_state_info = dict(sly_data.get("agent_state_info", None) or new_agent_state_info())
+        self.agent_state_info["user_input"] = inquiry + mode
+        try:
+            # Run the exchange on a warm session of the process-wide pool, in one of its worker
+            # threads, so that the event loop keeps serving other requests meanwhile
+            self.agent_state_info = await get_agent_session_pool().async_process(
+                self.agent_name, CONNECTION_TYPE, HOST, PORT, self.agent_state_info, timeout=CALL_TIMEOUT
+            )
+        except TimeoutError:
+            logger.warning("%s did not answer within %s seconds", self.agent_name, CALL_TIMEOUT)
+            return f"Error: {self.agent_name} did not answer within {CALL_TIMEOUT} seconds."
         sly_data["agent_state_info"] = self.agent_state_info
+        response = self.agent_state_info.get("last_chat_response")
 
         logger.info(">>>>>>>>>>>>>>>>>>>DONE !!!>>>>>>>>>>>>>>>>>>")
         return response
-
-    def set_up_agent(self):
-        """Configure these as needed."""
-        connection = CONNECTION_TYPE
-        host = HOST
-        port = PORT
-        local_externals_direct = False
-        metadata = {"user_id": os.environ.get("USER")}
-
-        # Create session factory and agent session
-        factory = AgentSessionFactory()
-        agent_session = factory.create_session(
-            connection, self.agent_name, host, port, local_externals_direct, metadata
-        )
-        # Initialize any conversation state here
-        agent_state_info = {
-            "last_chat_response": None,
-            "prompt": "Please enter your response ('quit' to terminate):\n",
-            "timeout": 5000.0,
-            "num_input": 0,
-            "user_input": None,
-            "sly_data": None,
-            "chat_filter": {"chat_filter_type": "MAXIMAL"},
-        }
-        return agent_session, agent_state_info
-
-    def call_agent(self, agent_session, user_input):
-        """
-        Processes a single turn of user input within the selected agent's session.
-
-        This function simulates a conversational turn by:
-        1. Initializing a StreamingInputProcessor to handle the input.
-        2. Updating the agent's internal state with the user's input (`thoughts`).
-        3. Passing the updated to the processor for handling.
-        4. Extracting and returning the agent's response for this turn.
-
-        Parameters:
-            agent_session: An active session object for the selected agent.
-            user_input (str): The user's input or query to be processed.
-
-        Returns:
-            tuple:
-                - last_chat_response (str or None): The agent's response to the input.
-                - agent_state_info (dict): The updated state after processing.
-        """
-        # Use the processor (like in agent_cli.py)
-        input_processor = StreamingInputProcessor(
-            "DEFAULT",
-            "/tmp/agent_thinking.txt",  # Or wherever you want
-            agent_session,
-            None,  # Not using a thinking_dir for simplicity
-        )
-        # Update the conversation state with this turn's input
-        self.agent_state_info["user_input"] = user_input
-        agent_state_info = input_processor.process_once(self.agent_state_info)
-        # Get the agent response for this turn
-        last_chat_response = agent_state_info.get("last_chat_response")
-        return last_chat_response, agent_state_info
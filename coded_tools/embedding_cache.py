@@ -0,0 +1,258 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from langchain_core.embeddings import Embeddings
+
+# Default upper bound on the size of the cached vectors (256 MB)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# SQLite limits the number of host parameters in a single statement
+SQLITE_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache persisted in a local SQLite file.
+
+    Vectors are keyed on the hash of the embedding model name and the chunk text,
+    so any process embedding the same chunk with the same model can reuse them.
+    When the total size of the stored vectors exceeds max_bytes, the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param path: Absolute path to the SQLite file holding the cache
+        :param max_bytes: Maximum total size of the cached vectors in bytes
+        """
+        self.path: str = path
+        self.max_bytes: int = max_bytes
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets readers in other server processes proceed while one process writes
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+        self.connection.commit()
+        self.total_bytes: int = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """
+        :param model: Name of the embedding model
+        :param text: Chunk text that is embedded
+        :return: Content address of the embedding of text under model
+        """
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the cached embeddings of the given texts.
+
+        :param model: Name of the embedding model
+        :param texts: Chunk texts to look up
+        :return: List aligned with texts holding the cached vector or None on a miss
+        """
+        keys: List[str] = [self.make_key(model, text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        now: float = time.time()
+
+        with self.lock:
+            for start in range(0, len(keys), SQLITE_BATCH_SIZE):
+                batch: List[str] = keys[start : start + SQLITE_BATCH_SIZE]
+                placeholders: str = ",".join("?" * len(batch))
+                rows = self.connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+                if rows:
+                    self.connection.execute(
+                        f"UPDATE embeddings SET last_access = ? WHERE key IN ({placeholders})", [now, *batch]
+                    )
+            self.connection.commit()
+
+        return [found.get(key) for key in keys]
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """
+        Store the embeddings of the given texts and evict old entries if the cache is over budget.
+
+        :param model: Name of the embedding model
+        :param texts: Chunk texts that were embedded
+        :param vectors: Embeddings aligned with texts
+        """
+        now: float = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            blob: bytes = array("f", vector).tobytes()
+            rows.append((self.make_key(model, text), blob, len(blob), now))
+
+        with self.lock:
+            for key, _, size, _ in rows:
+                previous = self.connection.execute("SELECT size FROM embeddings WHERE key = ?", (key,)).fetchone()
+                self.total_bytes += size - (previous[0] if previous else 0)
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)", rows
+            )
+            self.evict()
+            self.connection.commit()
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+        Must be called with the lock held.
+        """
+        excess: int = self.total_bytes - self.max_bytes
+        if excess <= 0:
+            return
+
+        freed: int = 0
+        victims: List[str] = []
+        for key, size in self.connection.execute("SELECT key, size FROM embeddings ORDER BY last_access"):
+            victims.append(key)
+            freed += size
+            if freed >= excess:
+                break
+
+        for start in range(0, len(victims), SQLITE_BATCH_SIZE):
+            batch: List[str] = victims[start : start + SQLITE_BATCH_SIZE]
+            self.connection.execute(f"DELETE FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch)
+        self.total_bytes -= freed
+        logger.info("Evicted %d embeddings (%d bytes) from %s", len(victims), freed, self.path)
+
+    def close(self):
+        """
+        Close the underlying SQLite connection.
+        """
+        with self.lock:
+            self.connection.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that consults an EmbeddingCache before calling the wrapped model,
+    so only new or changed chunks are sent to the embedding API.
+    Query embeddings are not cached since queries rarely repeat verbatim.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: Optional[str] = None):
+        """
+        :param embeddings: The embedding model doing the actual work on cache misses
+        :param cache: The cache to consult
+        :param model_name: Name used to key the cache. Defaults to the "model" attribute of embeddings.
+        """
+        self.embeddings: Embeddings = embeddings
+        self.cache: EmbeddingCache = cache
+        self.model_name: str = model_name or str(getattr(embeddings, "model", type(embeddings).__name__))
+        # Token counts of the documents are passed on to the embedding model if it takes them
+        self.accepts_token_counts: bool = getattr(embeddings, "accepts_token_counts", False)
+
+    def split_misses(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[str]]:
+        """
+        :param texts: Texts to embed
+        :return: A tuple of (cached vectors aligned with texts, unique texts that still need embedding)
+        """
+        vectors: List[Optional[List[float]]] = self.cache.get_many(self.model_name, texts)
+        misses: List[str] = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        logger.info("Embedding cache: %d hits, %d unique misses", len(texts) - vectors.count(None), len(misses))
+        return vectors, misses
+
+    @staticmethod
+    def merge(
+        texts: List[str], vectors: List[Optional[List[float]]], misses: List[str], new_vectors: List[List[float]]
+    ) -> List[List[float]]:
+        """
+        :return: The cached vectors with the gaps filled by the freshly computed ones
+        """
+        computed: Dict[str, List[float]] = dict(zip(misses, new_vectors))
+        return [vector if vector is not None else computed[text] for text, vector in zip(texts, vectors)]
+
+    def get_miss_options(
+        self, texts: List[str], token_counts: Optional[List[int]], misses: List[str]
+    ) -> Dict[str, Any]:
+        """
+        :param texts: Texts to embed
+        :param token_counts: Optional token counts of the texts
+        :param misses: The texts that need embedding
+        :return: The keyword arguments passing the token counts of the misses to the embedding model, if it takes them
+        """
+        if token_counts is None or not self.accepts_token_counts:
+            return {}
+        counts: Dict[str, int] = dict(zip(texts, token_counts))
+        return {"token_counts": [counts[text] for text in misses]}
+
+    def embed_documents(self, texts: List[str], token_counts: Optional[List[int]] = None) -> List[List[float]]:
+        vectors, misses = self.split_misses(texts)
+        if not misses:
+            return vectors
+        new_vectors: List[List[float]] = self.embeddings.embed_documents(
+            misses, **self.get_miss_options(texts, token_counts, misses)
+        )
+        self.cache.put_many(self.model_name, misses, new_vectors)
+        return self.merge(texts, vectors, misses, new_vectors)
+
+    async def aembed_documents(self, texts: List[str], token_counts: Optional[List[int]] = None) -> List[List[float]]:
+        vectors, misses = self.split_misses(texts)
+        if not misses:
+            return vectors
+        new_vectors: List[List[float]] = await self.embeddings.aembed_documents(
+            misses, **self.get_miss_options(texts, token_counts, misses)
+        )
+        self.cache.put_many(self.model_name, misses, new_vectors)
+        return self.merge(texts, vectors, misses, new_vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
+
+
+# One cache per file per process so that every tool instance shares the same connection
+_CACHES: Dict[str, EmbeddingCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_embedding_cache(path: str, max_bytes: int = DEFAULT_MAX_BYTES) -> EmbeddingCache:
+    """
+    :param path: Absolute path to the SQLite file holding the cache
+    :param max_bytes: Maximum total size of the cached vectors in bytes
+    :return: The process-wide EmbeddingCache for the given path
+    """
+    with _CACHES_LOCK:
+        cache: Optional[EmbeddingCache] = _CACHES.get(path)
+        if cache is None:
+            cache = EmbeddingCache(path, max_bytes)
+            _CACHES[path] = cache
+        cache.max_bytes = max_bytes
+        return cache
@@ -0,0 +1,426 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from . import chunking
+
+# Upper bound on the tokens sent in one embedding request
+DEFAULT_MAX_BATCH_TOKENS = 50000
+# Upper bound on the texts sent in one embedding request
+DEFAULT_MAX_BATCH_SIZE = 512
+# Upper bound on the embedding requests in flight at once
+DEFAULT_MAX_CONCURRENCY = 4
+# Retries of a batch that was rate limited
+DEFAULT_MAX_RETRIES = 6
+# Backoff before the first retry of a rate limited batch, doubled on each retry
+DEFAULT_INITIAL_BACKOFF_SECONDS = 1.0
+DEFAULT_MAX_BACKOFF_SECONDS = 60.0
+
+# Tokenizer used to size batches, the one of the OpenAI embedding models
+TOKEN_ENCODING = "cl100k_base"
+# Longest sleep between two checks of the rate limiter
+MAX_POLL_SECONDS = 0.05
+TOKENS_PER_MINUTE_WINDOW_SECONDS = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+def count_tokens(text: str) -> int:
+    """
+    :param text: A text to embed
+    :return: Its number of tokens in the encoding of the OpenAI embedding models
+    """
+    return chunking.count_tokens(text, TOKEN_ENCODING)
+
+
+def is_rate_limit_error(exception: BaseException) -> bool:
+    """
+    :param exception: An exception raised by an embedding request
+    :return: True if it is an HTTP 429 rate limit response
+    """
+    if getattr(exception, "status_code", None) == 429:
+        return True
+    if getattr(getattr(exception, "response", None), "status_code", None) == 429:
+        return True
+    return "RateLimit" in type(exception).__name__
+
+
+def is_transient_error(exception: BaseException) -> bool:
+    """
+    :param exception: An exception raised by an embedding request
+    :return: True if the request may succeed when sent again: a timeout, a connection error
+        or an HTTP 408, 409 or 5xx response
+    """
+    status_code: Any = getattr(exception, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(exception, "response", None), "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in (408, 409) or status_code >= 500
+    if isinstance(exception, (TimeoutError, ConnectionError)):
+        return True
+    name: str = type(exception).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+def get_retry_after(exception: BaseException) -> Optional[float]:
+    """
+    :param exception: A rate limit exception
+    :return: Seconds to wait advertised by the server in a Retry-After header, if any
+    """
+    retry_after: Any = getattr(exception, "retry_after", None)
+    headers: Any = getattr(getattr(exception, "response", None), "headers", None)
+    if retry_after is None and headers is not None:
+        retry_after = headers.get("retry-after")
+    try:
+        return float(retry_after) if retry_after is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:  # pylint: disable=too-many-instance-attributes
+    """
+    Limits the embedding requests in flight and the tokens sent per minute.
+
+    The concurrency limit adapts: it is halved whenever a request is rate limited and grows
+    back by about one request per round of successful requests, up to the configured maximum.
+    The limiter is thread-safe and is shared by all tools embedding with the same model,
+    as they draw on the same quota.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, tokens_per_minute: Optional[int] = None):
+        """
+        :param max_concurrency: Upper bound on the requests in flight
+        :param tokens_per_minute: Optional quota of tokens sent per minute
+        """
+        self.max_concurrency: int = max(1, max_concurrency)
+        self.tokens_per_minute: Optional[int] = tokens_per_minute
+        self.limit: float = float(self.max_concurrency)
+        self.in_flight: int = 0
+        # (time sent, tokens) of the requests of the last minute
+        self.window: Deque[Tuple[float, int]] = deque()
+        self.window_tokens: int = 0
+        self.paused_until: float = 0.0
+        self.lock = threading.Lock()
+
+    def try_acquire(self, tokens: int) -> float:
+        """
+        :param tokens: Tokens of the request about to be sent
+        :return: 0 if the request may be sent now, otherwise the seconds to wait before trying again
+        """
+        with self.lock:
+            now: float = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.in_flight >= int(self.limit):
+                return MAX_POLL_SECONDS
+            while self.window and now - self.window[0][0] > TOKENS_PER_MINUTE_WINDOW_SECONDS:
+                self.window_tokens -= self.window.popleft()[1]
+            if self.tokens_per_minute and self.window and self.window_tokens + tokens > self.tokens_per_minute:
+                return self.window[0][0] + TOKENS_PER_MINUTE_WINDOW_SECONDS - now
+            self.in_flight += 1
+            self.window.append((now, tokens))
+            self.window_tokens += tokens
+            return 0.0
+
+    async def acquire(self, tokens: int):
+        """
+        Wait until a request of the given size may be sent.
+
+        :param tokens: Tokens of the request about to be sent
+        """
+        while (wait := self.try_acquire(tokens)) > 0:
+            await asyncio.sleep(min(wait, MAX_POLL_SECONDS))
+
+    def acquire_blocking(self, tokens: int):
+        """
+        Block the calling thread until a request of the given size may be sent.
+
+        :param tokens: Tokens of the request about to be sent
+        """
+        while (wait := self.try_acquire(tokens)) > 0:
+            time.sleep(min(wait, MAX_POLL_SECONDS))
+
+    def release(self, rate_limited_for: Optional[float] = None, succeeded: bool = True):
+        """
+        Record the end of a request.
+
+        :param rate_limited_for: Seconds to pause all requests if the request was rate limited, None if it was not
+        :param succeeded: False if the request failed for another reason, which leaves the limit unchanged
+        """
+        with self.lock:
+            self.in_flight -= 1
+            if rate_limited_for is None:
+                if not succeeded:
+                    return
+                # Additive increase: about +1 once every request of the current limit succeeded
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+                return
+            # Multiplicative decrease
+            self.limit = max(1.0, self.limit / 2)
+            self.paused_until = max(self.paused_until, time.monotonic() + rate_limited_for)
+            logger.warning(
+                "Embedding requests rate limited, pausing %.1fs and lowering concurrency to %d",
+                rate_limited_for,
+                int(self.limit),
+            )
+
+
+class EmbeddingScheduler(Embeddings):  # pylint: disable=too-many-instance-attributes
+    """
+    Embeddings wrapper sending documents to the wrapped model in token-packed batches,
+    with a bounded number of concurrent requests and adaptive backoff on rate limit responses.
+    Timeouts, connection errors and server errors are retried with backoff as well.
+    """
+
+    # Documents may come with the token counts recorded by the chunker, sparing their tokenization
+    accepts_token_counts: bool = True
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        embeddings: Embeddings,
+        limiter: Optional[RateLimiter] = None,
+        max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        initial_backoff: float = DEFAULT_INITIAL_BACKOFF_SECONDS,
+        max_backoff: float = DEFAULT_MAX_BACKOFF_SECONDS,
+        token_counter: Callable[[str], int] = count_tokens,
+    ):
+        """
+        :param embeddings: The embedding model doing the actual work.
+            It should not retry failed requests itself, e.g. OpenAIEmbeddings(max_retries=0),
+            as the scheduler retries them.
+        :param limiter: Limiter of concurrent requests and tokens per minute, a private one if None
+        :param max_batch_tokens: Upper bound on the tokens sent in one request
+        :param max_batch_size: Upper bound on the texts sent in one request
+        :param max_retries: Retries of a rate limited or transiently failed batch before giving up
+        :param initial_backoff: Seconds to wait before the first retry, doubled on each retry
+        :param max_backoff: Upper bound on the seconds to wait before a retry
+        :param token_counter: Function counting the tokens of a text
+        """
+        self.embeddings: Embeddings = embeddings
+        self.limiter: RateLimiter = limiter or RateLimiter()
+        self.max_batch_tokens: int = max_batch_tokens
+        self.max_batch_size: int = max_batch_size
+        self.max_retries: int = max_retries
+        self.initial_backoff: float = initial_backoff
+        self.max_backoff: float = max_backoff
+        self.token_counter: Callable[[str], int] = token_counter
+        # The model attribute keys the embedding cache when the scheduler is wrapped by CachedEmbeddings
+        self.model: str = str(getattr(embeddings, "model", type(embeddings).__name__))
+
+    def pack(self, texts: List[str], token_counts: Optional[List[int]] = None) -> List[Tuple[int, List[str], int]]:
+        """
+        Greedily pack consecutive texts into batches within the token and size limits.
+        A single text above the token limit gets a batch of its own.
+
+        :param texts: Texts to embed
+        :param token_counts: Optional token counts of the texts, counted with the token counter if None
+        :return: List of (index of the first text, texts, tokens) batches
+        """
+        batches: List[Tuple[int, List[str], int]] = []
+        start: int = 0
+        batch: List[str] = []
+        batch_tokens: int = 0
+        for index, text in enumerate(texts):
+            tokens: int = token_counts[index] if token_counts is not None else self.token_counter(text)
+            if batch and (batch_tokens + tokens > self.max_batch_tokens or len(batch) >= self.max_batch_size):
+                batches.append((start, batch, batch_tokens))
+                start, batch, batch_tokens = index, [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append((start, batch, batch_tokens))
+        return batches
+
+    def get_backoff(self, exception: BaseException, attempt: int) -> float:
+        """
+        :param exception: The rate limit or transient exception
+        :param attempt: Number of the failed attempt, from 0
+        :return: Seconds to wait before retrying, the server's Retry-After if given,
+            otherwise exponential backoff with jitter
+        """
+        retry_after: Optional[float] = get_retry_after(exception)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        backoff: float = min(self.max_backoff, self.initial_backoff * 2**attempt)
+        return backoff * random.uniform(0.5, 1.0)
+
+    def release_failed(self, exception: BaseException, attempt: int) -> Optional[float]:
+        """
+        Record a failed request in the limiter.
+
+        :param exception: The exception raised by the request
+        :param attempt: Number of the failed attempt, from 0
+        :return: Seconds to wait before retrying the request, None if it should not be retried
+        """
+        if attempt < self.max_retries:
+            if is_rate_limit_error(exception):
+                # The limiter pauses every request of the model
+                self.limiter.release(rate_limited_for=self.get_backoff(exception, attempt))
+                return 0.0
+            if is_transient_error(exception):
+                self.limiter.release(succeeded=False)
+                logger.warning("Embedding request failed, retrying: %s", exception)
+                return self.get_backoff(exception, attempt)
+        self.limiter.release(succeeded=False)
+        return None
+
+    async def asend(self, request: Callable[[], Awaitable[Any]], tokens: int) -> Any:
+        """
+        Send one embedding request through the limiter, retrying it while it is rate limited
+        or fails transiently.
+
+        :param request: Coroutine function sending the request
+        :param tokens: Tokens of the request
+        :return: The result of the request
+        """
+        attempt: int = 0
+        while True:
+            await self.limiter.acquire(tokens)
+            try:
+                result: Any = await request()
+            except Exception as exception:  # pylint: disable=broad-exception-caught
+                wait: Optional[float] = self.release_failed(exception, attempt)
+                if wait is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(wait)
+                continue
+            except BaseException:
+                # Cancelled
+                self.limiter.release(succeeded=False)
+                raise
+            self.limiter.release()
+            return result
+
+    def send(self, request: Callable[[], Any], tokens: int) -> Any:
+        """
+        Send one embedding request through the limiter from a synchronous caller,
+        retrying it while it is rate limited or fails transiently.
+
+        :param request: Function sending the request
+        :param tokens: Tokens of the request
+        :return: The result of the request
+        """
+        attempt: int = 0
+        while True:
+            self.limiter.acquire_blocking(tokens)
+            try:
+                result: Any = request()
+            except Exception as exception:  # pylint: disable=broad-exception-caught
+                wait: Optional[float] = self.release_failed(exception, attempt)
+                if wait is None:
+                    raise
+                attempt += 1
+                time.sleep(wait)
+                continue
+            self.limiter.release()
+            return result
+
+    async def aembed_documents(self, texts: List[str], token_counts: Optional[List[int]] = None) -> List[List[float]]:
+        batches: Deque[Tuple[int, List[str], int]] = deque(self.pack(texts, token_counts))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+
+        async def worker():
+            while batches:
+                start, batch, tokens = batches.popleft()
+                vectors[start : start + len(batch)] = await self.asend(
+                    functools.partial(self.embeddings.aembed_documents, batch), tokens
+                )
+
+        # The limiter decides how many of the workers actually send requests at once
+        tasks: List[asyncio.Task] = [
+            asyncio.create_task(worker()) for _ in range(min(self.limiter.max_concurrency, len(batches)))
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return vectors
+
+    def embed_documents(self, texts: List[str], token_counts: Optional[List[int]] = None) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for _, batch, tokens in self.pack(texts, token_counts):
+            vectors.extend(self.send(functools.partial(self.embeddings.embed_documents, batch), tokens))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.send(functools.partial(self.embeddings.embed_query, text), self.token_counter(text))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.asend(functools.partial(self.embeddings.aembed_query, text), self.token_counter(text))
+
+
+# One limiter per embedding model per process, as all tools draw on the same quota
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(
+    model: str, max_concurrency: Optional[int] = None, tokens_per_minute: Optional[int] = None
+) -> RateLimiter:
+    """
+    :param model: Name of the embedding model
+    :param max_concurrency: Optional upper bound on the requests in flight
+    :param tokens_per_minute: Optional quota of tokens sent per minute
+    :return: The process-wide RateLimiter of the model. As all tools share the quota of the model,
+        the limiter keeps the tightest of the limits given by any of them, and a tool configuring
+        no limit leaves the limits of the others unchanged.
+    """
+    with _LIMITERS_LOCK:
+        limiter: Optional[RateLimiter] = _LIMITERS.get(model)
+        if limiter is None:
+            limiter = RateLimiter(max_concurrency or DEFAULT_MAX_CONCURRENCY, tokens_per_minute)
+            _LIMITERS[model] = limiter
+            return limiter
+        with limiter.lock:
+            if max_concurrency is not None and max(1, max_concurrency) < limiter.max_concurrency:
+                limiter.max_concurrency = max(1, max_concurrency)
+                limiter.limit = min(limiter.limit, float(limiter.max_concurrency))
+            if tokens_per_minute and (not limiter.tokens_per_minute or tokens_per_minute < limiter.tokens_per_minute):
+                limiter.tokens_per_minute = tokens_per_minute
+        return limiter
+
+
+def schedule_embeddings(embeddings: Embeddings, params: Optional[Dict[str, Any]] = None) -> EmbeddingScheduler:
+    """
+    :param embeddings: The embedding model doing the actual work
+    :param params: Optional scheduler settings: "max_batch_tokens", "max_batch_size", "max_concurrency",
+        "tokens_per_minute", "max_retries", "initial_backoff" and "max_backoff"
+    :return: The embedding model wrapped in a scheduler sharing the process-wide limiter of the model
+    """
+    params = dict(params or {})
+    model: str = str(getattr(embeddings, "model", type(embeddings).__name__))
+    limiter: RateLimiter = get_rate_limiter(
+        model,
+        max_concurrency=params.pop("max_concurrency", None),
+        tokens_per_minute=params.pop("tokens_per_minute", None),
+    )
+    return EmbeddingScheduler(embeddings, limiter=limiter, **params)
@@ -1,6 +1,5 @@
-import json
+import asyncio
 import logging
-import os
 from datetime import datetime
 from typing import Any
 from typing import Dict
@@ -9,7 +8,10 @@ from neuro_san.interfaces.coded_tool import CodedTool
 
 from coded_tools.kwik_agents.list_topics import LONG_TERM_MEMORY_FILE
 from coded_tools.kwik_agents.list_topics import MEMORY_DATA_STRUCTURE
-from coded_tools.kwik_agents.list_topics import MEMORY_FILE_PATH
+from coded_tools.kwik_agents.list_topics import get_long_term_memory
+from coded_tools.kwik_agents.memory_summarizer import DEFAULT_SUMMARY_LLM_CONFIG
+from coded_tools.kwik_agents.memory_summarizer import get_topic_summarizer
+from coded_tools.kwik_agents.semantic_memory import get_semantic_memory_index
 
 
 class CommitToMemory(CodedTool):
@@ -49,12 +51,12 @@ class CommitToMemory(CodedTool):
                 a text string an error message in the format:
                 "Error: <error message>"
         """
-        self.topic_memory = sly_data.get(MEMORY_DATA_STRUCTURE, None)
-        if not self.topic_memory:
-            if LONG_TERM_MEMORY_FILE:
-                self.read_memory_from_file()
-            else:
-                self.topic_memory = {}
+        if LONG_TERM_MEMORY_FILE:
+            # The store appends the fact to the file, which holds the facts committed by all sessions,
+            # so only the memory of the topic is read back
+            self.topic_memory = {}
+        else:
+            self.topic_memory = sly_data.get(MEMORY_DATA_STRUCTURE, None) or {}
         the_new_fact: str = args.get("new_fact", "")
         if the_new_fact == "":
             return "Error: No new_fact provided."
@@ -67,42 +69,33 @@ class CommitToMemory(CodedTool):
         logger.info("New Fact: %s", str(the_new_fact))
         logger.info("Topic: %s", str(the_topic))
         the_memory_str = self.add_memory(the_topic, the_new_fact)
+        if LONG_TERM_MEMORY_FILE and args.get("max_topic_tokens"):
+            # Roll the oldest facts of a topic over budget into a summary, in the background
+            get_topic_summarizer(get_long_term_memory()).check(
+                the_topic,
+                the_memory_str,
+                int(args["max_topic_tokens"]),
+                args.get("summary_llm_config") or DEFAULT_SUMMARY_LLM_CONFIG,
+            )
+        if LONG_TERM_MEMORY_FILE and args.get("semantic_recall", False):
+            # Embed the new fact in the background, so that recalling it later costs only the query embedding
+            get_semantic_memory_index(get_long_term_memory()).update_in_background()
         logger.info("Memory on this topic: \n %s", str(the_memory_str))
-        sly_data[MEMORY_DATA_STRUCTURE] = self.topic_memory
+        if not LONG_TERM_MEMORY_FILE:
+            sly_data[MEMORY_DATA_STRUCTURE] = self.topic_memory
         logger.info(">>>>>>>>>>>>>>>>>>>DONE !!!>>>>>>>>>>>>>>>>>>")
         return the_memory_str
 
     async def async_invoke(self, args: Dict[str, Any], sly_data: Dict[str, Any]) -> str:
         """
-        Delegates to the synchronous invoke method for now.
-        """
-        return self.invoke(args, sly_data)
-
-    def write_memory_to_file(self):
-        """
-        Writes the topic memory dictionary to a JSON file.
-        """
-        file_path = MEMORY_FILE_PATH + MEMORY_DATA_STRUCTURE + ".json"
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "w", encoding="utf-8") as file:
-            file.write(json.dumps(self.topic_memory, indent=2))
-
-    def read_memory_from_file(self):
-        """
-        Reads the topic memory dictionary from a JSON file if it exists.
-        Otherwise initializes an empty dictionary.
+        Runs the synchronous invoke method in a worker thread, so that the file lock of the memory
+        does not block the event loop of the server.
         """
-        file_path = MEMORY_FILE_PATH + MEMORY_DATA_STRUCTURE + ".json"
-        if os.path.exists(file_path):
-            with open(file_path, "r", encoding="utf-8") as file:
-                content = file.read()
-                self.topic_memory = json.loads(content) if content else {}
-        else:
-            self.topic_memory = {}
+        return await asyncio.to_thread(self.invoke, args, sly_data)
 
     def add_memory(self, topic: str, new_fact: str) -> str:
         """
-        Adds a new fact to memory and saves the memory dictionary to a JSON file.
+        Adds a new fact to memory and appends it to the long-term memory file.
 
         Parameters:
         - topic (str): A topic to store the memory under.
@@ -114,12 +107,12 @@ class CommitToMemory(CodedTool):
 
         time_stamp = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] "
 
-        if topic not in self.topic_memory or not self.topic_memory[topic]:
+        if LONG_TERM_MEMORY_FILE:
+            # Appending costs the same however large the memory is, and never overwrites facts of other sessions
+            self.topic_memory[topic] = get_long_term_memory().add(topic, time_stamp + new_fact)
+        elif topic not in self.topic_memory or not self.topic_memory[topic]:
             self.topic_memory[topic] = time_stamp + new_fact
         else:
             self.topic_memory[topic] = self.topic_memory[topic] + "\n" + time_stamp + new_fact
 
-        if LONG_TERM_MEMORY_FILE:
-            self.write_memory_to_file()
-
         return self.topic_memory[topic]
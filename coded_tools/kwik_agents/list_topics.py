@@ -1,16 +1,24 @@
-import json
 import logging
-import os
 from typing import Any
 from typing import Dict
 
 from neuro_san.interfaces.coded_tool import CodedTool
 
+from coded_tools.kwik_agents.memory_store import TopicMemoryStore
+from coded_tools.kwik_agents.memory_store import get_memory_store
+
 LONG_TERM_MEMORY_FILE = True  # Store and read memory from file
 MEMORY_FILE_PATH = "./"
 MEMORY_DATA_STRUCTURE = "TopicMemory"
 
 
+def get_long_term_memory() -> TopicMemoryStore:
+    """
+    :return: The process-wide store of the long-term memory file
+    """
+    return get_memory_store(MEMORY_FILE_PATH + MEMORY_DATA_STRUCTURE)
+
+
 class ListTopics(CodedTool):
     """
     CodedTool implementation which provides a way to replace the instructions of an agent in an agent network in sly
@@ -48,18 +56,17 @@ class ListTopics(CodedTool):
                 a text string an error message in the format:
                 "Error: <error message>"
         """
-        self.topic_memory = sly_data.get(MEMORY_DATA_STRUCTURE, None)
-        if not self.topic_memory:
-            if LONG_TERM_MEMORY_FILE:
-                self.read_memory_from_file()
-            else:
+        if not LONG_TERM_MEMORY_FILE:
+            self.topic_memory = sly_data.get(MEMORY_DATA_STRUCTURE, None)
+            if not self.topic_memory:
                 return "NO TOPICS YET!"
 
         logger = logging.getLogger(self.__class__.__name__)
         logger.info(">>>>>>>>>>>>>>>>>>>ListTopics>>>>>>>>>>>>>>>>>>")
         topics_str = self.get_memory_topics()
         logger.info("The resulting list of topics: \n %s", str(topics_str))
-        sly_data[MEMORY_DATA_STRUCTURE] = self.topic_memory
+        if not LONG_TERM_MEMORY_FILE:
+            sly_data[MEMORY_DATA_STRUCTURE] = self.topic_memory
         logger.info(">>>>>>>>>>>>>>>>>>>DONE !!!>>>>>>>>>>>>>>>>>>")
         return topics_str
 
@@ -69,19 +76,6 @@ class ListTopics(CodedTool):
         """
         return self.invoke(args, sly_data)
 
-    def read_memory_from_file(self):
-        """
-        Reads the topic memory dictionary from a JSON file if it exists.
-        Otherwise initializes an empty dictionary.
-        """
-        file_path = MEMORY_FILE_PATH + MEMORY_DATA_STRUCTURE + ".json"
-        if os.path.exists(file_path):
-            with open(file_path, "r", encoding="utf-8") as file:
-                content = file.read()
-                self.topic_memory = json.loads(content) if content else {}
-        else:
-            self.topic_memory = {}
-
     def get_memory_topics(self) -> str:
         """
         Retrieves the full list of memory topics.
@@ -89,4 +83,6 @@ class ListTopics(CodedTool):
         Returns:
         - list: A sorted list of all memory topics.
         """
+        if LONG_TERM_MEMORY_FILE:
+            return str(get_long_term_memory().list_topics())
         return str(sorted(list(self.topic_memory.keys())))
@@ -0,0 +1,367 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import json
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import IO
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+try:
+    import fcntl
+
+    msvcrt = None  # pylint: disable=invalid-name
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Extension of the append-only log of facts, and of the JSON file of the former whole-file format
+LOG_EXTENSION = ".jsonl"
+LEGACY_EXTENSION = ".json"
+
+# The log is compacted into one record per topic once it holds more than this many
+# records per topic, and at least DEFAULT_COMPACT_MIN_RECORDS records
+DEFAULT_COMPACT_FACTOR = 4
+DEFAULT_COMPACT_MIN_RECORDS = 10000
+
+logger = logging.getLogger(__name__)
+
+
+class TopicMemoryStore:  # pylint: disable=too-many-instance-attributes
+    """
+    Long-term topic memory kept in an append-only JSON Lines log, with an in-memory index of the
+    memory of each topic.
+
+    Committing a fact appends one line to the log, so it costs the same however large the memory
+    grows. Writers are serialized by a lock across threads and an exclusive file lock across
+    processes. Before each operation the store reads the lines other processes appended since it
+    last looked, so every process sees all facts without re-parsing the whole log. Once the log
+    holds many records per topic it is compacted into one record per topic, written to a
+    temporary file and moved into place.
+    """
+
+    def __init__(
+        self,
+        base_path: str,
+        compact_factor: int = DEFAULT_COMPACT_FACTOR,
+        compact_min_records: int = DEFAULT_COMPACT_MIN_RECORDS,
+    ):
+        """
+        :param base_path: Path of the memory files without extension
+        :param compact_factor: Records per topic beyond which the log is compacted
+        :param compact_min_records: Records below which the log is never compacted
+        """
+        self.log_path: str = base_path + LOG_EXTENSION
+        self.legacy_path: str = base_path + LEGACY_EXTENSION
+        self.compact_factor: int = compact_factor
+        self.compact_min_records: int = compact_min_records
+        # topic -> memory of the topic, one time stamped fact per line
+        self.topic_memory: Dict[str, str] = {}
+        self.sorted_topics: Optional[List[str]] = None
+        # Records in the log, and the first line and bytes of the log read so far. The first line
+        # tells a log replaced by a compaction apart, as the new file may reuse the inode of the old one
+        self.records: int = 0
+        self.head: Optional[bytes] = None
+        self.offset: int = 0
+        # Callbacks told of every fact applied to the index, of every summary replacing facts, and of every reset
+        self.fact_listeners: List[Callable[[str, str], None]] = []
+        self.summary_listeners: List[Callable[[str, str, int], None]] = []
+        self.reset_listeners: List[Callable[[], None]] = []
+        self.lock = threading.Lock()
+
+        directory: str = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.locked():
+            if not os.path.exists(self.log_path) and os.path.exists(self.legacy_path):
+                self.migrate_legacy_file()
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """
+        Hold the store exclusively across threads and processes, with the index up to date.
+        """
+        with self.lock:
+            with open(self.log_path + ".lock", "a+b") as lock_file:
+                lock_exclusive(lock_file)
+                try:
+                    self.refresh()
+                    yield
+                finally:
+                    unlock(lock_file)
+
+    def refresh(self):
+        """
+        Apply the records appended to the log since it was last read, or reload it
+        from scratch if it was replaced by a compaction.
+        """
+        try:
+            file = open(self.log_path, "rb")
+        except FileNotFoundError:
+            if self.head is not None:
+                self.reset()
+            return
+        with file:
+            head: bytes = file.readline()
+            size: int = os.fstat(file.fileno()).st_size
+            if head != self.head or size < self.offset:
+                self.reset()
+                self.head = head
+            if size == self.offset:
+                return
+            file.seek(self.offset)
+            data: bytes = file.read()
+        # A line without its newline is still being written, or was cut short by a crash
+        end: int = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                self.apply_line(line)
+        self.offset += end
+
+    def reset(self):
+        """
+        Forget the index, so that the log is read again from its start.
+        """
+        self.topic_memory = {}
+        self.sorted_topics = None
+        self.records = 0
+        self.head = None
+        self.offset = 0
+        for listener in self.reset_listeners:
+            listener()
+
+    def apply_line(self, line: bytes):
+        """
+        :param line: One record of the log
+        """
+        try:
+            record: Dict[str, Any] = json.loads(line)
+            if "generation" in record:
+                # Header of a compacted log
+                return
+            if "summary" in record:
+                self.apply_summary(record["topic"], record["summary"], int(record["replaces"]))
+            else:
+                self.apply(record["topic"], record["fact"])
+        except (ValueError, KeyError, TypeError) as exception:
+            logger.warning("Skipping malformed memory record in %s: %s", self.log_path, exception)
+
+    def apply(self, topic: str, fact: str):
+        """
+        :param topic: A topic
+        :param fact: Fact, or facts one per line, to add to the memory of the topic
+        """
+        memory: Optional[str] = self.topic_memory.get(topic)
+        if not memory:
+            self.topic_memory[topic] = fact
+            self.sorted_topics = None
+        else:
+            self.topic_memory[topic] = memory + "\n" + fact
+        self.records += 1
+        for listener in self.fact_listeners:
+            listener(topic, fact)
+
+    def apply_summary(self, topic: str, summary: str, replaces: int):
+        """
+        :param topic: A topic
+        :param summary: Summary of the oldest facts of the topic
+        :param replaces: Number of oldest lines of the memory of the topic the summary replaces
+        """
+        lines: List[str] = self.topic_memory.get(topic, "").split("\n")
+        self.topic_memory[topic] = "\n".join([summary] + lines[replaces:])
+        self.records += 1
+        for listener in self.summary_listeners:
+            listener(topic, self.topic_memory[topic], replaces)
+
+    def add_listener(
+        self,
+        on_fact: Callable[[str, str], None],
+        on_reset: Callable[[], None],
+        on_summary: Callable[[str, str, int], None],
+    ):
+        """
+        Follow the facts of the store, e.g. to index them. The listeners are called with the store
+        locked, so they must be quick and must not call the store.
+
+        :param on_fact: Called with the topic and the fact, or facts one per line, of every record
+            applied to the index, starting with the memory of every topic already in the store
+        :param on_reset: Called when the index is reset, before the whole log is applied again
+        :param on_summary: Called when the oldest facts of a topic are replaced by their summary, with
+            the topic, its memory after the summary and the number of oldest lines the summary replaced
+        """
+        with self.locked():
+            self.fact_listeners.append(on_fact)
+            self.summary_listeners.append(on_summary)
+            self.reset_listeners.append(on_reset)
+            for topic, memory in self.topic_memory.items():
+                on_fact(topic, memory)
+
+    def sync(self):
+        """
+        Apply the facts other processes committed since the store was last used.
+        """
+        with self.locked():
+            pass
+
+    def append_line(self, line: bytes):
+        """
+        Append a record to the log. Must be called with the store locked.
+
+        :param line: The JSON record, ending with a newline
+        """
+        with open(self.log_path, "ab") as file:
+            if file.tell() > self.offset:
+                # Terminate a partial line left by a crashed writer
+                line = b"\n" + line
+            elif file.tell() == 0:
+                self.head = line
+            file.write(line)
+            self.offset = file.tell()
+
+    def add(self, topic: str, fact: str) -> str:
+        """
+        Append a fact to the memory of a topic.
+
+        :param topic: A topic
+        :param fact: The time stamped fact
+        :return: The memory of the topic, including the new fact
+        """
+        line: bytes = (json.dumps({"topic": topic, "fact": fact}) + "\n").encode("utf-8")
+        with self.locked():
+            self.append_line(line)
+            self.apply(topic, fact)
+            if self.records > max(self.compact_min_records, self.compact_factor * len(self.topic_memory)):
+                self.compact()
+            return self.topic_memory[topic]
+
+    def summarize(self, topic: str, replaced: List[str], summary: str) -> bool:
+        """
+        Replace the oldest facts of a topic with their summary.
+
+        :param topic: A topic
+        :param replaced: The oldest lines of the memory of the topic that were summarized
+        :param summary: Their summary
+        :return: False if those are no longer the oldest lines, e.g. as they were summarized by
+            another process meanwhile, in which case nothing is replaced
+        """
+        with self.locked():
+            memory: str = self.topic_memory.get(topic, "")
+            if not replaced or memory.split("\n")[: len(replaced)] != replaced:
+                return False
+            line: bytes = (json.dumps({"topic": topic, "summary": summary, "replaces": len(replaced)}) + "\n").encode(
+                "utf-8"
+            )
+            self.append_line(line)
+            self.apply_summary(topic, summary, len(replaced))
+            return True
+
+    def get(self, topic: str) -> Optional[str]:
+        """
+        :param topic: A topic
+        :return: The memory of the topic, or None if nothing was committed to it
+        """
+        with self.locked():
+            return self.topic_memory.get(topic)
+
+    def list_topics(self) -> List[str]:
+        """
+        :return: All topics, sorted
+        """
+        with self.locked():
+            if self.sorted_topics is None:
+                self.sorted_topics = sorted(self.topic_memory)
+            return list(self.sorted_topics)
+
+    def snapshot(self) -> Dict[str, str]:
+        """
+        :return: A copy of the memory of all topics
+        """
+        with self.locked():
+            return dict(self.topic_memory)
+
+    def compact(self):
+        """
+        Rewrite the log with one record per topic. Must be called with the store locked.
+        """
+        tmp_path: str = self.log_path + ".tmp"
+        # A unique first line, so other processes notice the log was replaced
+        head: bytes = (json.dumps({"generation": uuid.uuid4().hex}) + "\n").encode("utf-8")
+        with open(tmp_path, "wb") as file:
+            file.write(head)
+            for topic, memory in self.topic_memory.items():
+                file.write((json.dumps({"topic": topic, "fact": memory}) + "\n").encode("utf-8"))
+            file.flush()
+            os.fsync(file.fileno())
+            offset: int = file.tell()
+        os.replace(tmp_path, self.log_path)
+        logger.info("Compacted %d memory records into %d topics", self.records, len(self.topic_memory))
+        self.records = len(self.topic_memory)
+        self.head = head
+        self.offset = offset
+
+    def migrate_legacy_file(self):
+        """
+        Seed the log from the JSON file of the former whole-file format. Must be called with the store locked.
+        """
+        with open(self.legacy_path, "r", encoding="utf-8") as file:
+            content: str = file.read()
+        for topic, memory in (json.loads(content) if content else {}).items():
+            self.apply(topic, memory)
+        self.compact()
+        logger.info("Migrated %d topics from %s", len(self.topic_memory), self.legacy_path)
+
+
+def lock_exclusive(file: IO):
+    """
+    :param file: An open file to hold an exclusive lock on, waiting for other processes to release it
+    """
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def unlock(file: IO):
+    """
+    :param file: A file locked with lock_exclusive()
+    """
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+_STORES: Dict[str, TopicMemoryStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_memory_store(base_path: str) -> TopicMemoryStore:
+    """
+    :param base_path: Path of the memory files without extension
+    :return: The process-wide store of the memory files
+    """
+    key: str = os.path.abspath(base_path)
+    with _STORES_LOCK:
+        store: Optional[TopicMemoryStore] = _STORES.get(key)
+        if store is None:
+            store = TopicMemoryStore(key)
+            _STORES[key] = store
+        return store
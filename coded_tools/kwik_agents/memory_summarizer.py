@@ -0,0 +1,183 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import logging
+import threading
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Set
+
+from langchain.chat_models import init_chat_model
+from langchain_core.language_models import BaseChatModel
+
+from coded_tools.chunking import count_tokens
+from coded_tools.embedding_scheduler import TOKEN_ENCODING
+from coded_tools.kwik_agents.memory_store import TopicMemoryStore
+
+# LLM summarizing the oldest facts of a topic, in the form of the llm_config of an agent:
+# "model_name", an optional "class" naming the provider, and any other argument of the chat model
+DEFAULT_SUMMARY_LLM_CONFIG: Dict[str, Any] = {"model_name": "gpt-4.1-mini"}
+
+# Share of the budget kept as verbatim recent facts, and share the summary may take
+RECENT_SHARE = 0.5
+SUMMARY_SHARE = 0.25
+
+# Start of the summary line replacing the oldest facts of a topic
+SUMMARY_PREFIX = "[Summary as of "
+
+SUMMARY_PROMPT = """Summarize the following facts remembered about the topic "{topic}" in at most {max_tokens} tokens.
+Keep names, numbers, dates and preferences. Merge duplicates, and prefer later facts when facts contradict each other.
+Answer with the summary only.
+
+{facts}"""
+
+logger = logging.getLogger(__name__)
+
+
+def create_summary_llm(llm_config: Dict[str, Any], max_tokens: int) -> BaseChatModel:
+    """
+    :param llm_config: The llm_config of the summarizer, with the same keys as the llm_config of an agent
+    :param max_tokens: Upper bound on the tokens of the summary
+    :return: The chat model summarizing the facts
+    """
+    config: Dict[str, Any] = dict(llm_config)
+    model: str = config.pop("model_name", None) or DEFAULT_SUMMARY_LLM_CONFIG["model_name"]
+    provider: Optional[str] = config.pop("class", None)
+    if provider:
+        # Providers are named as in agent llm_configs, e.g. "azure-openai"
+        provider = provider.replace("-", "_")
+    config.setdefault("max_tokens", max_tokens)
+    return init_chat_model(model, model_provider=provider, **config)
+
+
+def summarize_with_llm(
+    topic: str, facts: List[str], max_tokens: int, llm_config: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    :param topic: A topic
+    :param facts: The oldest facts of the topic, possibly starting with an earlier summary
+    :param max_tokens: Upper bound on the tokens of the summary
+    :param llm_config: The llm_config of the summarizer, DEFAULT_SUMMARY_LLM_CONFIG if None
+    :return: The summary
+    """
+    llm: BaseChatModel = create_summary_llm(llm_config or DEFAULT_SUMMARY_LLM_CONFIG, max_tokens)
+    prompt: str = SUMMARY_PROMPT.format(topic=topic, max_tokens=max_tokens, facts="\n".join(facts))
+    return str(llm.invoke(prompt).content).strip()
+
+
+class TopicSummarizer:
+    """
+    Keeps the memory of every topic of a TopicMemoryStore within a token budget. When a commit
+    takes a topic over budget, its oldest facts are rolled into a summary line by a background
+    worker, so the commit itself never waits for the summarization. The most recent facts are kept
+    verbatim, and the summary is summarized again with the next oldest facts when the topic grows
+    over budget again.
+    """
+
+    def __init__(self, store: TopicMemoryStore, summarize: Callable[[str, List[str], int, Dict[str, Any]], str]):
+        """
+        :param store: The topic memory store
+        :param summarize: Function of the topic, the facts to summarize, the token budget of the
+            summary and the llm_config of the summarizer, returning the summary
+        """
+        self.store: TopicMemoryStore = store
+        self.summarize: Callable[[str, List[str], int, Dict[str, Any]], str] = summarize
+        # Topics whose summarization is queued or running
+        self.in_flight: Set[str] = set()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summarizer")
+
+    def check(
+        self, topic: str, memory: str, max_tokens: int, llm_config: Optional[Dict[str, Any]] = None
+    ) -> Optional[Future]:
+        """
+        Schedule the summarization of a topic if its memory is over budget.
+
+        :param topic: A topic a fact was just committed to
+        :param memory: The memory of the topic
+        :param max_tokens: Tokens the memory of a topic may take
+        :param llm_config: The llm_config of the summarizer, DEFAULT_SUMMARY_LLM_CONFIG if None
+        :return: Future of the summarization if one was scheduled, None otherwise
+        """
+        if count_tokens(memory, TOKEN_ENCODING) <= max_tokens:
+            return None
+        with self.lock:
+            if topic in self.in_flight:
+                return None
+            self.in_flight.add(topic)
+        return self.executor.submit(self.run, topic, max_tokens, llm_config or DEFAULT_SUMMARY_LLM_CONFIG)
+
+    def run(self, topic: str, max_tokens: int, llm_config: Dict[str, Any]) -> bool:
+        """
+        Summarize the oldest facts of a topic, keeping the most recent ones within the budget.
+
+        :param topic: A topic
+        :param max_tokens: Tokens the memory of a topic may take
+        :param llm_config: The llm_config of the summarizer
+        :return: True if the oldest facts were replaced by their summary
+        """
+        try:
+            lines: List[str] = (self.store.get(topic) or "").split("\n")
+            split: int = self.split_recent(lines, int(max_tokens * RECENT_SHARE))
+            if split == 0:
+                return False
+            summary: str = self.summarize(topic, lines[:split], int(max_tokens * SUMMARY_SHARE), llm_config)
+            time_stamp = f"{SUMMARY_PREFIX}{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] "
+            # Facts committed meanwhile come after the summarized ones, so they are kept
+            replaced: bool = self.store.summarize(topic, lines[:split], time_stamp + " ".join(summary.split()))
+            logger.info("Summarized %d facts of topic %s: %s", split, topic, replaced)
+            return replaced
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            logger.warning("Could not summarize topic %s, retrying on the next commit: %s", topic, exception)
+            return False
+        finally:
+            with self.lock:
+                self.in_flight.discard(topic)
+
+    @staticmethod
+    def split_recent(lines: List[str], recent_tokens: int) -> int:
+        """
+        :param lines: The lines of the memory of a topic, oldest first
+        :param recent_tokens: Tokens of the most recent lines to keep verbatim
+        :return: Number of oldest lines to summarize, keeping at least the most recent line
+        """
+        used: int = 0
+        split: int = len(lines)
+        while split > 0:
+            cost: int = count_tokens(lines[split - 1], TOKEN_ENCODING) + 1
+            if split < len(lines) and used + cost > recent_tokens:
+                break
+            used += cost
+            split -= 1
+        return split
+
+
+_SUMMARIZERS: Dict[str, TopicSummarizer] = {}
+_SUMMARIZERS_LOCK = threading.Lock()
+
+
+def get_topic_summarizer(store: TopicMemoryStore) -> TopicSummarizer:
+    """
+    :param store: A topic memory store
+    :return: The process-wide summarizer of the store, summarizing with the LLM of its llm_config
+    """
+    with _SUMMARIZERS_LOCK:
+        summarizer: Optional[TopicSummarizer] = _SUMMARIZERS.get(store.log_path)
+        if summarizer is None:
+            summarizer = TopicSummarizer(store, summarize_with_llm)
+            _SUMMARIZERS[store.log_path] = summarizer
+        return summarizer
@@ -1,10 +1,24 @@
+import asyncio
 import logging
 from typing import Any
 from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
 
 from neuro_san.interfaces.coded_tool import CodedTool
 
+from coded_tools.chunking import count_tokens
+from coded_tools.embedding_scheduler import TOKEN_ENCODING
+from coded_tools.kwik_agents.list_topics import LONG_TERM_MEMORY_FILE
 from coded_tools.kwik_agents.list_topics import MEMORY_DATA_STRUCTURE
+from coded_tools.kwik_agents.list_topics import get_long_term_memory
+from coded_tools.kwik_agents.memory_store import TopicMemoryStore
+from coded_tools.kwik_agents.memory_summarizer import SUMMARY_PREFIX
+from coded_tools.kwik_agents.semantic_memory import DEFAULT_MAX_RECALL_TOKENS
+from coded_tools.kwik_agents.semantic_memory import DEFAULT_RECALL_K
+from coded_tools.kwik_agents.semantic_memory import cap_to_token_budget
+from coded_tools.kwik_agents.semantic_memory import get_semantic_memory_index
 
 
 class RecallMemory(CodedTool):
@@ -44,38 +58,91 @@ class RecallMemory(CodedTool):
                 a text string an error message in the format:
                 "Error: <error message>"
         """
-        self.topic_memory = sly_data.get(MEMORY_DATA_STRUCTURE, None)
-        if not self.topic_memory:
-            return "NO TOPICS YET!"
         the_topic: str = args.get("topic", "")
+        if LONG_TERM_MEMORY_FILE:
+            # Facts committed by other sessions are in the file only. Only the memory of the topic is read,
+            # rather than a copy of the memory of all topics.
+            store: TopicMemoryStore = get_long_term_memory()
+            memory: Optional[str] = store.get(the_topic) if the_topic else None
+            self.topic_memory = {the_topic: memory} if memory is not None else {}
+            if memory is None and not store.list_topics():
+                return "NO TOPICS YET!"
+        else:
+            self.topic_memory = sly_data.get(MEMORY_DATA_STRUCTURE, None)
+            if not self.topic_memory:
+                return "NO TOPICS YET!"
         if the_topic == "":
             return "Error: No topic provided."
 
         logger = logging.getLogger(self.__class__.__name__)
         logger.info(">>>>>>>>>>>>>>>>>>>RecallMemory>>>>>>>>>>>>>>>>>>")
         logger.info("Topic: %s", str(the_topic))
-        the_memory_str = self.recall_memory(the_topic)
+        the_memory_str = self.recall_memory(
+            the_topic,
+            query=args.get("query", ""),
+            semantic_recall=bool(args.get("semantic_recall", False)),
+            k=int(args.get("recall_k") or DEFAULT_RECALL_K),
+            max_tokens=int(args["max_recall_tokens"]) if args.get("max_recall_tokens") else None,
+        )
         logger.info("Memories on this topic: \n %s", str(the_memory_str))
-        sly_data[MEMORY_DATA_STRUCTURE] = self.topic_memory
+        if not LONG_TERM_MEMORY_FILE:
+            sly_data[MEMORY_DATA_STRUCTURE] = self.topic_memory
         logger.info(">>>>>>>>>>>>>>>>>>>DONE !!!>>>>>>>>>>>>>>>>>>")
         return the_memory_str
 
     async def async_invoke(self, args: Dict[str, Any], sly_data: Dict[str, Any]) -> str:
         """
-        Delegates to the synchronous invoke method for now.
+        Runs the synchronous invoke method in a worker thread, so that the file lock of the memory
+        and the embedding requests of a semantic recall do not block the event loop of the server.
         """
-        return self.invoke(args, sly_data)
-
-    def recall_memory(self, topic: str) -> str:
+        return await asyncio.to_thread(self.invoke, args, sly_data)
+
+    def recall_memory(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        topic: str,
+        query: str = "",
+        semantic_recall: bool = False,
+        k: int = DEFAULT_RECALL_K,
+        max_tokens: Optional[int] = None,
+    ) -> str:
         """
         Recall all facts related to this topic from memory.
 
         Parameters:
         - topic (str): A topic to retrieve memories for.
+        - query (str): An optional question the memories should answer, for semantic recall.
+        - semantic_recall (bool): If the topic doesn't exist, recall the k facts closest to the query or topic.
+        - k (int): The number of facts recalled semantically.
+        - max_tokens (int): The maximum number of tokens of the returned memories. The summary of the oldest
+          facts is kept first, then the most recent facts.
 
         Returns:
         - str: The list of memories related to the topic, or an empty string if the topic doesn't exist.
         """
         if topic in self.topic_memory:
-            return self.topic_memory[topic]
+            facts: List[str] = self.topic_memory[topic].split("\n")
+            summary: List[str] = []
+            if facts[0].startswith(SUMMARY_PREFIX):
+                summary = cap_to_token_budget(facts[:1], max_tokens)
+                facts = facts[1:]
+                if summary and max_tokens is not None:
+                    # One more token for the newline joining the lines, as in cap_to_token_budget
+                    max_tokens -= count_tokens(summary[0], TOKEN_ENCODING) + 1
+            # Keep the most recent facts within the rest of the budget, in their original order
+            return "\n".join(summary + list(reversed(cap_to_token_budget(facts[::-1], max_tokens))))
+
+        if semantic_recall and LONG_TERM_MEMORY_FILE:
+            try:
+                memories: List[Tuple[str, str]] = get_semantic_memory_index(get_long_term_memory()).recall(
+                    query or topic, k
+                )
+            except Exception as exception:  # pylint: disable=broad-exception-caught
+                logging.getLogger(self.__class__.__name__).warning("Semantic recall failed: %s", exception)
+                memories = []
+            lines: List[str] = cap_to_token_budget(
+                [f"[{memory_topic}] {fact}" for memory_topic, fact in memories],
+                max_tokens or DEFAULT_MAX_RECALL_TOKENS,
+            )
+            if lines:
+                return f"No memories under topic '{topic}'. Closest memories:\n" + "\n".join(lines)
         return "NO RELATED MEMORIES!"
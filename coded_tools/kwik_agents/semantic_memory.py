@@ -0,0 +1,295 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import logging
+import threading
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from coded_tools.chunking import count_tokens
+from coded_tools.embedding_cache import CachedEmbeddings
+from coded_tools.embedding_cache import get_embedding_cache
+from coded_tools.embedding_scheduler import TOKEN_ENCODING
+from coded_tools.embedding_scheduler import schedule_embeddings
+from coded_tools.kwik_agents.memory_store import TopicMemoryStore
+from coded_tools.numpy_vector_store import NumpyVectorStore
+
+# Facts returned by a semantic recall, and the tokens they may take at most
+DEFAULT_RECALL_K = 8
+DEFAULT_MAX_RECALL_TOKENS = 1000
+
+# Closest topics whose facts are considered by a semantic recall
+RECALL_TOPICS = 3
+
+# Facts and topics a recall embeds itself before searching, e.g. those committed just before.
+# A longer queue, e.g. the whole memory on the first recall of a process, is left to the background worker.
+RECALL_MAX_EMBED_TEXTS = 64
+
+# Suffix of the SQLite cache of fact embeddings next to the memory log, so restarts do not re-embed
+EMBEDDING_CACHE_SUFFIX = ".embeddings.sqlite"
+
+logger = logging.getLogger(__name__)
+
+
+def create_embeddings(store: TopicMemoryStore) -> Embeddings:
+    """
+    :param store: A topic memory store
+    :return: The embedding model of its facts, backed by a cache file next to its log
+    """
+    cache_path: str = store.log_path.rsplit(".", 1)[0] + EMBEDDING_CACHE_SUFFIX
+    return CachedEmbeddings(schedule_embeddings(OpenAIEmbeddings(max_retries=0)), get_embedding_cache(cache_path))
+
+
+def cap_to_token_budget(lines: List[str], max_tokens: Optional[int]) -> List[str]:
+    """
+    :param lines: Lines of text, most important first
+    :param max_tokens: Upper bound on the tokens of the returned lines, None for no bound
+    :return: The longest prefix of lines within the budget
+    """
+    if max_tokens is None:
+        return lines
+    kept: List[str] = []
+    used: int = 0
+    for line in lines:
+        # One more token for the newline joining the lines
+        used += count_tokens(line, TOKEN_ENCODING) + 1
+        if used > max_tokens:
+            break
+        kept.append(line)
+    return kept
+
+
+class SemanticMemoryIndex:  # pylint: disable=too-many-instance-attributes
+    """
+    Embedding index of the facts and topic names of a TopicMemoryStore, for recalling the facts
+    closest to a topic or question when the agent does not name an existing topic exactly.
+
+    The index follows the store: facts committed in this process or read from other processes
+    are queued and embedded in batches by update(). The tools run it on a background worker at
+    commit time, so that a commit never waits for the embedding requests.
+    """
+
+    def __init__(self, store: TopicMemoryStore, embeddings: Embeddings):
+        """
+        :param store: The topic memory store to index
+        :param embeddings: The embedding model of facts, topics and queries
+        """
+        self.embeddings: Embeddings = embeddings
+        self.facts: NumpyVectorStore = NumpyVectorStore(embedding=embeddings)
+        self.topics: NumpyVectorStore = NumpyVectorStore(embedding=embeddings)
+        # topic -> rows of its facts in self.facts, oldest first
+        self.topic_rows: Dict[str, List[int]] = {}
+        # Facts and topics applied to the store but not embedded yet
+        self.pending_facts: List[Tuple[str, str]] = []
+        self.pending_topics: List[str] = []
+        # topic -> number of times its facts were replaced by a summary, so that embeddings of
+        # facts computed before the summary are dropped
+        self.summaries: Dict[str, int] = {}
+        # Incremented on every reset, so that embeddings computed before a reset are dropped
+        self.generation: int = 0
+        self.lock = threading.Lock()
+        self.update_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="semantic-memory")
+        self.store: TopicMemoryStore = store
+        store.add_listener(self.on_fact, self.on_reset, self.on_summary)
+
+    def on_fact(self, topic: str, facts: str):
+        """
+        :param topic: A topic
+        :param facts: Facts applied to the topic, one per line
+        """
+        with self.lock:
+            if topic not in self.topic_rows:
+                self.topic_rows[topic] = []
+                self.pending_topics.append(topic)
+            self.pending_facts.extend((topic, fact) for fact in facts.split("\n") if fact.strip())
+
+    def on_summary(self, topic: str, memory: str, replaces: int):
+        """
+        Index a topic again once its oldest facts were replaced by their summary: the rows of its
+        facts are dropped and its current memory is queued. The facts kept verbatim are in the
+        embedding cache, so only the summary is sent to the embedding model.
+
+        :param topic: A topic
+        :param memory: The memory of the topic after the summary, one fact per line
+        :param replaces: Number of oldest facts the summary replaced
+        """
+        del replaces
+        with self.lock:
+            rows: List[int] = self.topic_rows.get(topic, [])
+            if rows:
+                self.facts.delete([self.facts.ids[row] for row in rows])
+                # Rows after the deleted ones shifted
+                self.topic_rows = {name: [] for name in self.topic_rows}
+                for row, metadata in enumerate(self.facts.metadatas):
+                    self.topic_rows[metadata["topic"]].append(row)
+            if topic not in self.topic_rows:
+                self.topic_rows[topic] = []
+                self.pending_topics.append(topic)
+            self.summaries[topic] = self.summaries.get(topic, 0) + 1
+            self.pending_facts = [(name, fact) for name, fact in self.pending_facts if name != topic]
+            self.pending_facts.extend((topic, fact) for fact in memory.split("\n") if fact.strip())
+
+    def on_reset(self):
+        """
+        Forget all facts and topics, as the store applies its whole log again.
+        """
+        with self.lock:
+            self.facts = NumpyVectorStore(embedding=self.embeddings)
+            self.topics = NumpyVectorStore(embedding=self.embeddings)
+            self.topic_rows = {}
+            self.pending_facts = []
+            self.pending_topics = []
+            self.summaries = {}
+            self.generation += 1
+
+    def update(self, max_texts: Optional[int] = None, wait: bool = True) -> bool:
+        """
+        Embed the facts and topics queued since the last update, in one batch.
+
+        :param max_texts: Optional upper bound on the facts and topics embedded, the others stay queued
+        :param wait: False to return at once if another update is running
+        :return: True if the update ran, False if another one was running
+        """
+        self.store.sync()
+        if not self.update_lock.acquire(blocking=wait):  # pylint: disable=consider-using-with
+            return False
+        try:
+            self.embed_pending(max_texts)
+        finally:
+            self.update_lock.release()
+        return True
+
+    def embed_pending(self, max_texts: Optional[int]):
+        """
+        Embed queued facts and topics. Must be called with the update lock held.
+
+        :param max_texts: Optional upper bound on the facts and topics embedded, the others stay queued
+        """
+        with self.lock:
+            facts: List[Tuple[str, str]] = self.pending_facts[:max_texts]
+            topics: List[str] = self.pending_topics[: None if max_texts is None else max(0, max_texts - len(facts))]
+            generation: int = self.generation
+            summaries: Dict[str, int] = dict(self.summaries)
+            self.pending_facts = self.pending_facts[len(facts) :]
+            self.pending_topics = self.pending_topics[len(topics) :]
+        if not facts and not topics:
+            return
+
+        texts: List[str] = [fact for _, fact in facts] + topics
+        try:
+            vectors: List[List[float]] = self.embeddings.embed_documents(texts)
+        except Exception:
+            # Queue them again, so the next update retries
+            with self.lock:
+                if generation == self.generation:
+                    # Facts of topics summarized meanwhile were queued again by the summary
+                    self.pending_facts = [
+                        (topic, fact) for topic, fact in facts if self.summaries.get(topic) == summaries.get(topic)
+                    ] + self.pending_facts
+                    self.pending_topics = topics + self.pending_topics
+            raise
+
+        with self.lock:
+            if generation != self.generation:
+                return
+            kept: List[int] = [
+                position
+                for position, (topic, _) in enumerate(facts)
+                if self.summaries.get(topic) == summaries.get(topic)
+            ]
+            start_row: int = len(self.facts)
+            self.facts.add_vectors(
+                [vectors[position] for position in kept],
+                [facts[position][1] for position in kept],
+                [{"topic": facts[position][0]} for position in kept],
+            )
+            for row, position in enumerate(kept, start=start_row):
+                self.topic_rows[facts[position][0]].append(row)
+            if topics:
+                self.topics.add_vectors(vectors[len(facts) :], topics)
+
+    def update_in_background(self) -> Future:
+        """
+        Schedule an update on the background worker of the index.
+
+        :return: Future of the update, True if it succeeded
+        """
+        return self.executor.submit(self.try_update)
+
+    def try_update(self) -> bool:
+        """
+        :return: True if the queued facts and topics were embedded. On failure they stay queued
+            for the next update.
+        """
+        try:
+            self.update()
+            return True
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            logger.warning(
+                "Could not embed the memory of %s, retrying on the next commit: %s", self.store.log_path, exception
+            )
+            return False
+
+    def recall(self, query: str, k: int = DEFAULT_RECALL_K) -> List[Tuple[str, str]]:
+        """
+        Find the facts closest to a query. A fact scores the higher of the similarity of its text
+        and the similarity of its topic name to the query, so a fuzzy topic name recalls the most
+        recent facts of the topics it resembles.
+
+        The facts committed just before are embedded first, but a recall never waits for a long queue,
+        such as the whole memory when the index was just created: it searches the facts already
+        embedded while the background worker embeds the others.
+
+        :param query: A topic name or a question
+        :param k: Number of facts to return
+        :return: Up to k (topic, fact) tuples, most relevant first
+        """
+        self.update(max_texts=RECALL_MAX_EMBED_TEXTS, wait=False)
+        with self.lock:
+            queued: bool = bool(self.pending_facts or self.pending_topics)
+        if queued:
+            self.update_in_background()
+        query_vector: List[float] = self.embeddings.embed_query(query)
+        with self.lock:
+            scores: Dict[int, float] = dict(self.facts.top_k([query_vector], k)[0])
+            for topic_row, topic_score in self.topics.top_k([query_vector], RECALL_TOPICS)[0]:
+                for row in self.topic_rows[self.topics.texts[topic_row]][-k:]:
+                    scores[row] = max(scores.get(row, topic_score), topic_score)
+            # Most recent first among equal scores
+            best: List[int] = sorted(scores, key=lambda row: (-scores[row], -row))[:k]
+            return [(self.facts.metadatas[row]["topic"], self.facts.texts[row]) for row in best]
+
+
+_INDEXES: Dict[str, SemanticMemoryIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_semantic_memory_index(store: TopicMemoryStore) -> SemanticMemoryIndex:
+    """
+    :param store: A topic memory store
+    :return: The process-wide semantic index of the store. The memory already in the store is
+        embedded in the background when the index is created.
+    """
+    with _INDEXES_LOCK:
+        index: Optional[SemanticMemoryIndex] = _INDEXES.get(store.log_path)
+        if index is None:
+            index = SemanticMemoryIndex(store, create_embeddings(store))
+            _INDEXES[store.log_path] = index
+            index.update_in_background()
+        return index
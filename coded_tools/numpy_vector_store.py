@@ -0,0 +1,572 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+import zlib
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from .bm25_index import Bm25Index
+from .bm25_index import get_sparse_index_path
+from .bm25_index import reciprocal_rank_fusion
+from .chunking import TOKEN_COUNT_KEY
+from .vector_index import VectorIndex
+from .vector_index import get_index_path
+
+# Suffix of the sidecar file holding chunk ids, texts and metadata next to the .npy matrix
+METADATA_SUFFIX = ".meta.json"
+
+# Damping constant of reciprocal rank fusion, as in the original paper
+DEFAULT_RRF_K = 60
+# Dense and BM25 candidates fused per query: this many times k, and at least HYBRID_MIN_CANDIDATES
+HYBRID_CANDIDATE_FACTOR = 4
+HYBRID_MIN_CANDIDATES = 20
+
+logger = logging.getLogger(__name__)
+
+
+def get_metadata_path(path: str) -> str:
+    """
+    :param path: Path to the .npy vector matrix
+    :return: Path to its metadata sidecar file
+    """
+    return os.path.splitext(path)[0] + METADATA_SUFFIX
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    :param vectors: 2D array of vectors, one per row
+    :return: float32 copy of the vectors scaled to unit length, so that a dot product is a cosine similarity
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms: np.ndarray = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return vectors / norms
+
+
+class NumpyVectorStore(VectorStore):  # pylint: disable=too-many-public-methods
+    """
+    Vector store keeping unit-normalized float32 embeddings in one contiguous matrix,
+    so cosine top-k retrieval is a single matrix product plus a partial sort,
+    for one query or a batch of them.
+
+    It is persisted as a raw .npy matrix plus a compact JSON sidecar with the chunk
+    texts and metadata. Loading memory-maps the matrix read-only, so a saved store
+    opens in milliseconds regardless of its size and its pages are shared between
+    server worker processes.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        embedding: Embeddings,
+        vectors: Optional[np.ndarray] = None,
+        texts: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ):
+        """
+        :param embedding: Embedding model used for queries and newly added texts
+        :param vectors: Unit-normalized float32 matrix of shape (number of chunks, dimension)
+        :param texts: Chunk texts aligned with the rows of vectors
+        :param metadatas: Chunk metadata aligned with the rows of vectors
+        :param ids: Chunk ids aligned with the rows of vectors
+        """
+        self.embedding: Embeddings = embedding
+        self.vectors: Optional[np.ndarray] = vectors
+        self.texts: List[str] = texts or []
+        self.metadatas: List[Dict[str, Any]] = metadatas or [{} for _ in self.texts]
+        self.ids: List[str] = ids or [str(uuid.uuid4()) for _ in self.texts]
+        # Optional approximate nearest neighbor index, exact search if None
+        self.index: Optional[VectorIndex] = None
+        # Optional BM25 index of the chunk texts for hybrid search
+        self.sparse_index: Optional[Bm25Index] = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :return: Approximate number of bytes held by the store
+        """
+        matrix_bytes: int = 0 if self.vectors is None else int(self.vectors.nbytes)
+        return matrix_bytes + sum(len(text) for text in self.texts)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add_vectors(
+        self,
+        vectors: Sequence[Sequence[float]],
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Append already-computed embeddings to the store.
+
+        :param vectors: Embeddings aligned with texts
+        :param texts: Chunk texts
+        :param metadatas: Optional chunk metadata aligned with texts
+        :param ids: Optional chunk ids aligned with texts
+        :return: The ids of the added chunks
+        """
+        if not texts:
+            return []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        new_vectors: np.ndarray = normalize(np.asarray(vectors, dtype=np.float32))
+        start_row: int = len(self.texts)
+        # Appending to a memory-mapped matrix copies it into memory, which is what we want once it is modified
+        self.vectors = new_vectors if self.vectors is None else np.vstack([self.vectors, new_vectors])
+        self.texts.extend(texts)
+        self.metadatas.extend(metadatas or [{} for _ in texts])
+        self.ids.extend(ids)
+        if self.index is not None:
+            self.index.add(self.vectors, start_row)
+        if self.sparse_index is not None:
+            self.sparse_index.add(texts)
+        return ids
+
+    def get_embedding_options(self, metadatas: Optional[List[dict]]) -> Dict[str, Any]:
+        """
+        :param metadatas: Optional metadata of the texts to embed
+        :return: The keyword arguments passing the token counts recorded by the chunker to the embeddings,
+            if they take them and every text has one
+        """
+        if not metadatas or not getattr(self.embedding, "accepts_token_counts", False):
+            return {}
+        if not all(TOKEN_COUNT_KEY in metadata for metadata in metadatas):
+            return {}
+        return {"token_counts": [int(metadata[TOKEN_COUNT_KEY]) for metadata in metadatas]}
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        vectors: List[List[float]] = self.embedding.embed_documents(texts, **self.get_embedding_options(metadatas))
+        return self.add_vectors(vectors, texts, metadatas, ids)
+
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        vectors: List[List[float]] = await self.embedding.aembed_documents(
+            texts, **self.get_embedding_options(metadatas)
+        )
+        return self.add_vectors(vectors, texts, metadatas, ids)
+
+    def delete(self, ids: Optional[Sequence[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        to_delete = set(ids)
+        keep: List[int] = [row for row, chunk_id in enumerate(self.ids) if chunk_id not in to_delete]
+        if len(keep) == len(self.ids):
+            return False
+        self.vectors = None if not keep else np.ascontiguousarray(self.vectors[keep])
+        self.texts = [self.texts[row] for row in keep]
+        self.metadatas = [self.metadatas[row] for row in keep]
+        self.ids = [self.ids[row] for row in keep]
+        if self.index is not None:
+            # Row numbers shifted, so the index has to be rebuilt
+            self.index.build(self.vectors)
+        if self.sparse_index is not None:
+            self.sparse_index.build(self.texts)
+        return True
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        rows: Dict[str, int] = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        return [self.make_document(rows[chunk_id]) for chunk_id in ids if chunk_id in rows]
+
+    def set_index(self, index: Optional[VectorIndex], index_path: Optional[str] = None):
+        """
+        Attach an approximate nearest neighbor index to the store, loading it from
+        index_path if it was persisted there and still matches the matrix, building it otherwise.
+
+        :param index: The index, or None for exact search
+        :param index_path: Optional file the index may have been persisted to
+        """
+        self.index = index
+        if index is None:
+            return
+        if index_path:
+            try:
+                index.load(index_path)
+                if index.is_consistent(self.vectors):
+                    logger.info("Loaded %s index from: %s", index.kind, index_path)
+                    return
+                logger.info("Index at %s is out of date, rebuilding it", index_path)
+            except FileNotFoundError:
+                logger.info("No %s index at %s, building it", index.kind, index_path)
+        index.build(self.vectors)
+
+    def set_sparse_index(self, sparse_index: Optional[Bm25Index], index_path: Optional[str] = None):
+        """
+        Attach a BM25 index of the chunk texts to the store for hybrid search, loading it from
+        index_path if it was persisted there and still matches the store, building it otherwise.
+
+        :param sparse_index: The index, or None for dense search only
+        :param index_path: Optional file the index may have been persisted to
+        """
+        self.sparse_index = sparse_index
+        if sparse_index is None:
+            return
+        if index_path:
+            try:
+                sparse_index.load(index_path)
+                if sparse_index.is_consistent(len(self.texts)):
+                    return
+                logger.info("BM25 index at %s is out of date, rebuilding it", index_path)
+            except FileNotFoundError:
+                logger.info("No BM25 index at %s, building it", index_path)
+        sparse_index.build(self.texts)
+
+    def make_document(self, row: int) -> Document:
+        """
+        :param row: Row of a chunk in the matrix
+        :return: The chunk as a Document
+        """
+        return Document(id=self.ids[row], page_content=self.texts[row], metadata=self.metadatas[row])
+
+    def top_k(
+        self, query_vectors: Sequence[Sequence[float]], k: int = 4, score_threshold: Optional[float] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Find the k most similar chunks for a batch of query embeddings, through the
+        approximate nearest neighbor index if one is set, otherwise exactly with a single
+        matrix product and a partial sort, without any per-chunk Python loop.
+
+        :param query_vectors: Query embeddings, one per row
+        :param k: Number of chunks to return per query
+        :param score_threshold: Optional minimum cosine similarity of returned chunks
+        :return: For each query, a list of (row, cosine similarity) tuples, best first
+        """
+        if self.vectors is None or not self.texts or k <= 0:
+            return [[] for _ in query_vectors]
+
+        queries: np.ndarray = normalize(np.asarray(query_vectors, dtype=np.float32))
+        k = min(k, len(self.texts))
+        results: List[List[Tuple[int, float]]] = (
+            self.index.search(self.vectors, queries, k) if self.index is not None else self.exact_top_k(queries, k)
+        )
+        if score_threshold is not None:
+            results = [[(row, score) for row, score in hits if score >= score_threshold] for hits in results]
+        return results
+
+    def exact_top_k(self, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """
+        :param queries: Unit-normalized query embeddings, one per row
+        :param k: Number of chunks to return per query, at most the number of chunks
+        :return: For each query, a list of (row, cosine similarity) tuples, best first
+        """
+        # (number of queries, number of chunks)
+        scores: np.ndarray = queries @ self.vectors.T
+        if k < scores.shape[1]:
+            # Unordered indices of the k best scores of each row, then order only those
+            candidates: np.ndarray = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(k), (scores.shape[0], k))
+        candidate_scores: np.ndarray = np.take_along_axis(scores, candidates, axis=1)
+        order: np.ndarray = np.argsort(-candidate_scores, axis=1)
+        rows: np.ndarray = np.take_along_axis(candidates, order, axis=1)
+        row_scores: np.ndarray = np.take_along_axis(candidate_scores, order, axis=1)
+        return [
+            list(zip(query_rows, query_scores)) for query_rows, query_scores in zip(rows.tolist(), row_scores.tolist())
+        ]
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: Sequence[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """
+        :param embedding: Query embedding
+        :param k: Number of chunks to return
+        :param kwargs: May contain "score_threshold", the minimum cosine similarity of returned chunks
+        :return: The k most similar chunks with their cosine similarity, best first
+        """
+        hits: List[Tuple[int, float]] = self.top_k([embedding], k, kwargs.get("score_threshold"))[0]
+        return [(self.make_document(row), score) for row, score in hits]
+
+    async def abatch_similarity_search_with_score(
+        self, queries: List[str], k: int = 4, score_threshold: Optional[float] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Answer several queries with one matrix product.
+
+        :param queries: Query strings
+        :param k: Number of chunks to return per query
+        :param score_threshold: Optional minimum cosine similarity of returned chunks
+        :return: For each query, the k most similar chunks with their cosine similarity, best first
+        """
+        if not queries:
+            return []
+        embeddings: List[List[float]] = list(
+            await asyncio.gather(*(self.embedding.aembed_query(query) for query in queries))
+        )
+        return [
+            [(self.make_document(row), score) for row, score in hits]
+            for hits in self.top_k(embeddings, k, score_threshold)
+        ]
+
+    def hybrid_top_k(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        queries: List[str],
+        query_vectors: Sequence[Sequence[float]],
+        k: int = 4,
+        score_threshold: Optional[float] = None,
+        rrf_k: int = DEFAULT_RRF_K,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Fuse the dense and BM25 rankings of each query with reciprocal rank fusion, so that
+        chunks containing exact identifiers rank high even when their embedding is not the closest.
+        Falls back to dense search if no BM25 index is set.
+
+        :param queries: Query strings
+        :param query_vectors: Query embeddings aligned with queries
+        :param k: Number of chunks to return per query
+        :param score_threshold: Optional minimum cosine similarity of the returned chunks to the query,
+            applied to the fused results, so that chunks found by BM25 only are filtered too
+        :param rrf_k: Damping constant of reciprocal rank fusion
+        :return: For each query, a list of (row, fused score) tuples, best first
+        """
+        if self.sparse_index is None:
+            return self.top_k(query_vectors, k, score_threshold)
+        candidates: int = max(k * HYBRID_CANDIDATE_FACTOR, HYBRID_MIN_CANDIDATES)
+        dense: List[List[Tuple[int, float]]] = self.top_k(query_vectors, candidates)
+        results: List[List[Tuple[int, float]]] = []
+        for query, query_vector, dense_hits in zip(queries, query_vectors, dense):
+            fused: List[Tuple[int, float]] = reciprocal_rank_fusion(
+                [[row for row, _ in dense_hits], [row for row, _ in self.sparse_index.search(query, candidates)]],
+                k if score_threshold is None else candidates,
+                rrf_k,
+            )
+            if score_threshold is not None and fused:
+                scores: np.ndarray = self.dense_scores([row for row, _ in fused], query_vector)
+                fused = [hit for hit, score in zip(fused, scores) if score >= score_threshold][:k]
+            results.append(fused)
+        return results
+
+    def dense_scores(self, rows: List[int], query_vector: Sequence[float]) -> np.ndarray:
+        """
+        :param rows: Rows of chunks
+        :param query_vector: A query embedding
+        :return: The cosine similarity of each chunk to the query
+        """
+        query: np.ndarray = normalize(np.asarray([query_vector], dtype=np.float32))[0]
+        return self.vectors[np.asarray(rows)] @ query
+
+    async def abatch_hybrid_search_with_score(
+        self, queries: List[str], k: int = 4, score_threshold: Optional[float] = None, rrf_k: int = DEFAULT_RRF_K
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Answer several queries with hybrid dense and BM25 search.
+
+        :param queries: Query strings
+        :param k: Number of chunks to return per query
+        :param score_threshold: Optional minimum cosine similarity of the returned chunks to the query
+        :param rrf_k: Damping constant of reciprocal rank fusion
+        :return: For each query, the k best chunks with their fused score, best first
+        """
+        if not queries:
+            return []
+        embeddings: List[List[float]] = list(
+            await asyncio.gather(*(self.embedding.aembed_query(query) for query in queries))
+        )
+        return [
+            [(self.make_document(row), score) for row, score in hits]
+            for hits in self.hybrid_top_k(queries, embeddings, k, score_threshold, rrf_k)
+        ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(  # pylint: disable=arguments-differ
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    async def asimilarity_search_with_score(  # pylint: disable=arguments-differ
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        embedding: List[float] = await self.embedding.aembed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._cosine_relevance_score_fn
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding=embedding)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    @classmethod
+    async def afrom_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding=embedding)
+        await store.aadd_texts(texts, metadatas, ids=ids)
+        return store
+
+    def dump(self, path: str):
+        """
+        Save the store. A ".json" path is written in the format of langchain's
+        InMemoryVectorStore.dump(). Any other path gets a float32 .npy matrix plus a
+        JSON metadata sidecar. Files are written to temporary files first and then moved into place.
+        The approximate nearest neighbor and BM25 indexes, if set, are saved alongside.
+
+        :param path: Path of the .npy or .json file
+        """
+        if path.endswith(".json"):
+            self.dump_json(path)
+        else:
+            self.dump_npy(path)
+        if self.index is not None:
+            self.index.save(get_index_path(path, self.index.kind))
+        if self.sparse_index is not None:
+            self.sparse_index.save(get_sparse_index_path(path))
+
+    def dump_npy(self, path: str):
+        """
+        Save the store as a float32 .npy matrix plus a JSON metadata sidecar.
+
+        :param path: Path of the .npy file
+        """
+        metadata_path: str = get_metadata_path(path)
+        vectors: np.ndarray = self.vectors if self.vectors is not None else np.zeros((0, 0), dtype=np.float32)
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with open(path + ".tmp", "wb") as file:
+            np.save(file, vectors)
+        with open(metadata_path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(
+                # The checksum ties the sidecar to its matrix, as the two files are not replaced atomically together
+                {"checksum": zlib.crc32(vectors), "ids": self.ids, "texts": self.texts, "metadatas": self.metadatas},
+                file,
+                separators=(",", ":"),
+                ensure_ascii=False,
+                default=str,
+            )
+        os.replace(path + ".tmp", path)
+        os.replace(metadata_path + ".tmp", metadata_path)
+
+    def dump_json(self, path: str):
+        """
+        Save the store in the JSON format of langchain's InMemoryVectorStore.dump().
+
+        :param path: Path of the .json file
+        """
+        vectors: List[List[float]] = [] if self.vectors is None else self.vectors.tolist()
+        store: Dict[str, Dict[str, Any]] = {
+            chunk_id: {"id": chunk_id, "vector": vector, "text": text, "metadata": metadata}
+            for chunk_id, vector, text, metadata in zip(self.ids, vectors, self.texts, self.metadatas)
+        }
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(store, file, indent=2, default=str)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str, embedding: Embeddings) -> "NumpyVectorStore":
+        """
+        Load a store saved with dump(). The matrix of a .npy store is memory-mapped read-only.
+        A ".json" path is read in the format of langchain's InMemoryVectorStore.dump().
+
+        :param path: Path of the .npy or .json file
+        :param embedding: Embedding model used for queries and newly added texts
+        :return: The loaded store
+        :raises FileNotFoundError: If a file is missing
+        :raises ValueError: If a file is corrupt, or the matrix and its sidecar were not saved together
+        """
+        if path.endswith(".json"):
+            return cls.load_json(path, embedding)
+
+        with open(get_metadata_path(path), "r", encoding="utf-8") as file:
+            metadata: Dict[str, List[Any]] = json.load(file)
+        vectors: np.ndarray = np.load(path, mmap_mode="r")
+        if "checksum" in metadata and zlib.crc32(vectors) != metadata["checksum"]:
+            raise ValueError(f"Vector store at {path} does not match its metadata {get_metadata_path(path)}")
+        if vectors.size == 0:
+            vectors = None
+        elif vectors.shape[0] != len(metadata["texts"]):
+            raise ValueError(
+                f"Vector store at {path} has {vectors.shape[0]} vectors but {len(metadata['texts'])} texts"
+            )
+        return cls(
+            embedding=embedding,
+            vectors=vectors,
+            texts=metadata["texts"],
+            metadatas=metadata["metadatas"],
+            ids=metadata["ids"],
+        )
+
+    @classmethod
+    def load_json(cls, path: str, embedding: Embeddings) -> "NumpyVectorStore":
+        """
+        Load a store saved by langchain's InMemoryVectorStore.dump() or by dump_json().
+
+        :param path: Path of the .json file
+        :param embedding: Embedding model used for queries and newly added texts
+        :return: The loaded store
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            store: Dict[str, Dict[str, Any]] = json.load(file)
+        entries: List[Dict[str, Any]] = list(store.values())
+        return cls(
+            embedding=embedding,
+            vectors=normalize(np.asarray([entry["vector"] for entry in entries])) if entries else None,
+            texts=[entry["text"] for entry in entries],
+            metadatas=[entry.get("metadata") or {} for entry in entries],
+            ids=[entry["id"] for entry in entries],
+        )
@@ -11,11 +11,23 @@
 #
 # END COPYRIGHT
 
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Any
+from typing import AsyncIterator
 from typing import Dict
 from typing import List
+from typing import Set
+from typing import Tuple
 import logging
 
+import requests
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_core.documents import Document
 
@@ -28,21 +40,102 @@ INVALID_PATH_PATTERN = r"[<>:\"|?*\x00-\x1F]"
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Timeout in seconds for the HEAD request used to fingerprint remote PDFs
+FINGERPRINT_TIMEOUT = 10
+
+# Upper bound on the default number of processes parsing PDFs in parallel
+MAX_DEFAULT_PARSE_WORKERS = 4
+
+
+def parse_pdf(url: str) -> List[Document]:
+    """
+    Parse one PDF into one document per page. Runs in a worker process, as parsing is CPU-bound.
+
+    :param url: Local path or http(s) URL of a PDF file
+    :return: List of page documents
+    """
+    return PyMuPDFLoader(file_path=url).load()
+
+
+def log_parse_error(url: str, exception: Exception):
+    """
+    Log a PDF that could not be parsed, which is then skipped.
+
+    :param url: Local path or http(s) URL of the PDF file
+    :param exception: The exception raised while parsing it
+    """
+    if isinstance(exception, FileNotFoundError):
+        logger.error("File not found: %s", url)
+    elif isinstance(exception, ValueError):
+        logger.error("Invalid file path or unsupported input: %s – %s", url, exception)
+    else:
+        logger.error("Could not load PDF file from %s – %s", url, exception)
+
+
+# Number of workers -> process pool parsing PDFs, shared by all calls of the process,
+# so that the worker processes are spawned once rather than on every call
+_PARSE_POOLS: Dict[int, ProcessPoolExecutor] = {}
+_PARSE_POOLS_LOCK = threading.Lock()
+
+
+def get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    :param workers: Number of processes parsing PDFs in parallel
+    :return: The process-wide pool with that many workers, created on first use
+    """
+    with _PARSE_POOLS_LOCK:
+        pool: ProcessPoolExecutor = _PARSE_POOLS.get(workers)
+        if pool is None:
+            # Spawn rather than fork, as forking a multi-threaded server process is unsafe
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _PARSE_POOLS[workers] = pool
+        return pool
+
+
+def discard_parse_pool(pool: ProcessPoolExecutor):
+    """
+    Forget a pool whose worker process died, so that the next call creates a new one.
+
+    :param pool: A pool returned by get_parse_pool()
+    """
+    with _PARSE_POOLS_LOCK:
+        for workers, registered in list(_PARSE_POOLS.items()):
+            if registered is pool:
+                del _PARSE_POOLS[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
 
 class PdfRag(CodedTool, BaseRag):
     """
     CodedTool implementation which provides a way to do RAG on pdf files
     """
 
+    def __init__(self):
+        super().__init__()
+        # Number of processes parsing PDFs in parallel, 0 to parse in a thread of this process
+        self.parse_workers: int = min(MAX_DEFAULT_PARSE_WORKERS, os.cpu_count() or 1)
+
     async def async_invoke(self, args: Dict[str, Any], sly_data: Dict[str, Any]) -> str:
         """
         Load a PDF from URL, build a vector store, and run a query against it.
 
         :param args: Dictionary containing:
           "query": search string
+          "queries": optional list of further search strings answered in the same call
+          "k": optional number of chunks to retrieve per query
+          "score_threshold": optional minimum cosine similarity of retrieved chunks
           "urls": list of pdf files
-          "save_vector_store": save to JSON file if True
-          "vector_store_path": relative path to this file
+          "save_vector_store": save to vector_store_path if True
+          "vector_store_path": relative path to this file, ".json" or ".npy"
+          "embedding_cache_path": relative path to the SQLite embedding cache
+          "embedding_cache_max_bytes": size limit of the embedding cache
+          "chunk_size": optional maximum tokens per chunk
+          "chunk_overlap": optional tokens shared by consecutive chunks
+          "embedding_scheduler": optional batching, concurrency and rate limit settings of embedding requests
+          "vector_index": "exact", "ivf" or "faiss"
+          "vector_index_params": optional parameters of the vector index
+          "ingest_batch_size": number of chunks embedded per batch while indexing
+          "pdf_parse_workers": number of processes parsing PDFs in parallel
 
         :param sly_data: A dictionary whose keys are defined by the agent
             hierarchy, but whose values are meant to be kept out of the
@@ -70,17 +163,37 @@ class PdfRag(CodedTool, BaseRag):
         if not urls:
             return "❌ Missing required input: 'urls'."
 
-        # Save the generated vector store as a JSON file if True
+        # Save the generated vector store to vector_store_path if True
         self.save_vector_store = args.get("save_vector_store", False)
 
         # Configure the vector store path
         self.configure_vector_store_path(args.get("vector_store_path"))
 
+        # Configure the embedding cache so unchanged chunks are not re-embedded
+        self.configure_embedding_cache(args.get("embedding_cache_path"), args.get("embedding_cache_max_bytes"))
+
+        # Configure how documents are split into chunks
+        self.configure_chunking(args.get("chunk_size"), args.get("chunk_overlap"))
+
+        # Configure batching, concurrency and rate limit handling of the embedding requests
+        self.configure_embedding_scheduler(args.get("embedding_scheduler"))
+
+        # Configure the nearest neighbor index used for retrieval
+        self.configure_vector_index(args.get("vector_index"), args.get("vector_index_params"))
+
+        # Configure hybrid BM25 and dense retrieval
+        self.configure_hybrid_search(args.get("hybrid_search"))
+
+        # Configure the ingestion pipeline
+        self.configure_ingest_batch_size(args.get("ingest_batch_size"))
+        if args.get("pdf_parse_workers") is not None:
+            self.parse_workers = max(0, int(args.get("pdf_parse_workers")))
+
         # Prepare the vector store
         vectorstore = await self.generate_vector_store(loader_args={"urls": urls})
 
         # Run the query against the vector store
-        return await self.query_vectorstore(vectorstore, query)
+        return await self.query_vectorstore_with_args(vectorstore, args)
 
     async def load_documents(self, loader_args: Dict[str, Any]) -> List[Document]:
         """
@@ -88,19 +201,98 @@ class PdfRag(CodedTool, BaseRag):
 
         :param loader_args: Dictionary containing 'urls' (list of PDF file URLs)
         :return: List of loaded PDF documents
-        """     
+        """
         docs: List[Document] = []
-        urls = loader_args.get("urls", [])
+        async for pages in self.stream_documents(loader_args):
+            docs.extend(pages)
+        return docs
+
+    async def stream_documents(self, loader_args: Dict[str, Any]) -> AsyncIterator[List[Document]]:
+        """
+        Parse PDFs in parallel in a process pool and yield the pages of each PDF as soon as it is parsed,
+        so that its chunks are embedded while the next PDFs are parsed. At most one PDF per worker is
+        parsed ahead of the consumer, which bounds the pages held in memory.
+
+        :param loader_args: Dictionary containing 'urls' (list of PDF file URLs)
+        :return: Async iterator of the pages of each PDF, in order of completion
+        """
+        urls: List[str] = loader_args.get("urls", [])
+        if not urls:
+            return
+
+        executor: Executor
+        if self.parse_workers > 0:
+            executor = get_parse_pool(self.parse_workers)
+            max_in_flight: int = self.parse_workers
+        else:
+            executor = ThreadPoolExecutor(max_workers=1)
+            max_in_flight = 1
+
+        loop = asyncio.get_running_loop()
+        remaining: List[str] = list(reversed(urls))
+        # Future of each PDF being parsed -> its URL and the executor parsing it
+        in_flight: Dict[asyncio.Future, Tuple[str, Executor]] = {}
+        try:
+            while remaining or in_flight:
+                while remaining and len(in_flight) < max_in_flight:
+                    url: str = remaining.pop()
+                    in_flight[loop.run_in_executor(executor, parse_pdf, url)] = (url, executor)
+                done: Set[asyncio.Future]
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    url, parser = in_flight.pop(future)
+                    try:
+                        pages: List[Document] = future.result()
+                    except BrokenProcessPool as e:
+                        # A worker died, e.g. on a PDF crashing the parser. The PDFs not parsed yet go to a new pool.
+                        logger.error("PDF parser process died while parsing %s – %s", url, e)
+                        if parser is executor:
+                            discard_parse_pool(executor)
+                            executor = get_parse_pool(self.parse_workers)
+                        continue
+                    except Exception as e:  # pylint: disable=broad-exception-caught
+                        log_parse_error(url, e)
+                        continue
+                    logger.info("Successfully loaded PDF file from %s", url)
+                    yield pages
+        finally:
+            # The process pool is shared, so only the PDFs of this call are cancelled
+            for future in in_flight:
+                future.cancel()
+            if not isinstance(executor, ProcessPoolExecutor):
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    async def get_source_fingerprints(self, loader_args: Dict[str, Any]) -> List[str]:
+        """
+        Fingerprint each PDF so that a changed file invalidates the registered vector store.
+        Local files are fingerprinted with their mtime and size, remote files with
+        the ETag/Last-Modified/Content-Length headers of a HEAD request.
+
+        :param loader_args: Dictionary containing 'urls' (list of PDF file URLs)
+        :return: One fingerprint per URL
+        """
+        urls: List[str] = loader_args.get("urls", [])
+        return list(await asyncio.gather(*(asyncio.to_thread(self.fingerprint_url, url) for url in urls)))
+
+    @staticmethod
+    def fingerprint_url(url: str) -> str:
+        """
+        :param url: Local path or http(s) URL of a PDF file
+        :return: A string that changes whenever the file changes, as far as can be told cheaply
+        """
+        if os.path.isfile(url):
+            stat = os.stat(url)
+            return f"{url}|{stat.st_mtime_ns}|{stat.st_size}"
 
-        for url in urls:
+        if url.startswith(("http://", "https://")):
             try:
-                loader = PyMuPDFLoader(file_path=url)
-                doc: List[Document] = await loader.aload()
-                docs.extend(doc)
-                logger.info("Successfully loaded PDF file from %s", url)
-            except FileNotFoundError:
-                logger.error("File not found: %s", url)
-            except ValueError as e:
-                logger.error("Invalid file path or unsupported input: %s – %s", url, e)
+                response = requests.head(url, allow_redirects=True, timeout=FINGERPRINT_TIMEOUT)
+                headers = response.headers
+                return "|".join(
+                    [url, headers.get("ETag", ""), headers.get("Last-Modified", ""), headers.get("Content-Length", "")]
+                )
+            except requests.RequestException as e:
+                logger.warning("Could not fingerprint %s: %s", url, e)
 
-        return docs
+        # Unknown state, rely on the registry TTL
+        return url
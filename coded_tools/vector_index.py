@@ -0,0 +1,352 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import logging
+import math
+import os
+from abc import ABC
+from abc import abstractmethod
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+# Exact brute-force search over the whole matrix, no index
+EXACT = "exact"
+# Inverted file index: k-means clusters of the vectors, searching only the clusters closest to the query
+IVF = "ivf"
+# FAISS HNSW graph index, available when the faiss package is installed
+FAISS = "faiss"
+VECTOR_INDEX_KINDS = (EXACT, IVF, FAISS)
+
+# Parameters of the constructor of each kind of index
+IVF_PARAMS = ("nlist", "nprobe", "iterations", "seed")
+FAISS_PARAMS = ("m", "ef_construction", "ef_search")
+# Parameters accepted for each kind. "faiss" also takes those of "ivf", used when it falls back to it.
+VECTOR_INDEX_PARAMS = {EXACT: (), IVF: IVF_PARAMS, FAISS: FAISS_PARAMS + IVF_PARAMS}
+
+# Below this many vectors an IVF index is not worth training and search stays exact
+IVF_MIN_TRAIN_SIZE = 1024
+# Rows scored at once while assigning vectors to clusters, to bound temporary memory
+ASSIGN_BATCH_SIZE = 65536
+
+logger = logging.getLogger(__name__)
+
+
+def exact_top_k(scores: np.ndarray, rows: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """
+    :param scores: Similarity of each candidate row to a query
+    :param rows: Candidate row numbers aligned with scores
+    :param k: Number of rows to keep
+    :return: The k best (row, score) tuples, best first
+    """
+    if k < len(scores):
+        best: np.ndarray = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    best = best[np.argsort(-scores[best])]
+    return list(zip(rows[best].tolist(), scores[best].tolist()))
+
+
+class VectorIndex(ABC):
+    """
+    Approximate nearest neighbor index over the unit-normalized rows of a NumpyVectorStore matrix.
+    Rows are identified by their position in the matrix.
+    """
+
+    kind: str = ""
+
+    @abstractmethod
+    def build(self, vectors: np.ndarray):
+        """
+        (Re)build the index from scratch, e.g. after rows were deleted.
+
+        :param vectors: The whole matrix of unit-normalized vectors
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def add(self, vectors: np.ndarray, start_row: int):
+        """
+        Incrementally insert rows appended to the matrix.
+
+        :param vectors: The whole matrix of unit-normalized vectors, after the append
+        :param start_row: Row number of the first appended vector
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def is_consistent(self, vectors: np.ndarray) -> bool:
+        """
+        :param vectors: The whole matrix of unit-normalized vectors
+        :return: True if the index covers exactly the rows of the matrix, e.g. after loading it from a file
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def search(self, vectors: np.ndarray, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """
+        :param vectors: The whole matrix of unit-normalized vectors
+        :param queries: Unit-normalized query vectors, one per row
+        :param k: Number of rows to return per query
+        :return: For each query, up to k (row, cosine similarity) tuples, best first
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def save(self, path: str):
+        """
+        :param path: File to persist the index to
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def load(self, path: str):
+        """
+        :param path: File the index was persisted to
+        :raises FileNotFoundError: If the file does not exist
+        """
+        raise NotImplementedError
+
+
+class IvfIndex(VectorIndex):
+    """
+    Pure NumPy inverted file index. Vectors are clustered with spherical k-means and a
+    query is only scored against the vectors of the nprobe clusters with the closest centroids.
+    New vectors are inserted into the existing clusters without retraining.
+    """
+
+    kind: str = IVF
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = 8, iterations: int = 10, seed: int = 0):
+        """
+        :param nlist: Number of clusters. Defaults to about 4 * sqrt(number of vectors).
+        :param nprobe: Number of clusters searched per query. Higher is slower but has better recall.
+        :param iterations: Number of k-means iterations when training
+        :param seed: Seed of the k-means initialization
+        """
+        self.nlist: Optional[int] = nlist
+        self.nprobe: int = nprobe
+        self.iterations: int = iterations
+        self.seed: int = seed
+        self.centroids: Optional[np.ndarray] = None
+        # Cluster number of each row
+        self.assignments: np.ndarray = np.zeros(0, dtype=np.int32)
+        # Row numbers of each cluster
+        self.lists: List[np.ndarray] = []
+
+    @property
+    def trained(self) -> bool:
+        """
+        :return: True if the clusters have been trained
+        """
+        return self.centroids is not None
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        :param vectors: Unit-normalized vectors
+        :return: The number of the closest cluster of each vector
+        """
+        assignments: np.ndarray = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), ASSIGN_BATCH_SIZE):
+            batch: np.ndarray = vectors[start : start + ASSIGN_BATCH_SIZE]
+            assignments[start : start + len(batch)] = np.argmax(batch @ self.centroids.T, axis=1)
+        return assignments
+
+    def rebuild_lists(self):
+        """
+        Group row numbers by cluster from the assignments.
+        """
+        order: np.ndarray = np.argsort(self.assignments, kind="stable").astype(np.int64)
+        bounds: np.ndarray = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+        self.lists = [order[bounds[i] : bounds[i + 1]] for i in range(len(self.centroids))]
+
+    def build(self, vectors: np.ndarray):
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.lists = []
+        if vectors is None or len(vectors) < IVF_MIN_TRAIN_SIZE:
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        nlist: int = min(self.nlist or int(4 * math.sqrt(len(vectors))), len(vectors))
+        rng = np.random.default_rng(self.seed)
+        self.centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            self.assignments = self.assign(vectors)
+            # Sum the vectors of each cluster by sorting them by cluster and reducing each segment
+            order: np.ndarray = np.argsort(self.assignments, kind="stable")
+            counts: np.ndarray = np.bincount(self.assignments, minlength=nlist)
+            starts: np.ndarray = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            # Keep the previous centroid for empty clusters
+            non_empty: np.ndarray = counts > 0
+            sums: np.ndarray = np.add.reduceat(vectors[order], starts[non_empty], axis=0)
+            self.centroids[non_empty] = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+        self.assignments = self.assign(vectors)
+        self.rebuild_lists()
+        logger.info("Trained IVF index with %d clusters over %d vectors", nlist, len(vectors))
+
+    def add(self, vectors: np.ndarray, start_row: int):
+        if not self.trained:
+            # Train once there are enough vectors, until then search stays exact
+            if len(vectors) >= IVF_MIN_TRAIN_SIZE:
+                self.build(vectors)
+            return
+        new_assignments: np.ndarray = self.assign(vectors[start_row:])
+        self.assignments = np.concatenate([self.assignments, new_assignments])
+        rows: np.ndarray = np.arange(start_row, len(vectors), dtype=np.int64)
+        for cluster in np.unique(new_assignments):
+            self.lists[cluster] = np.concatenate([self.lists[cluster], rows[new_assignments == cluster]])
+
+    def is_consistent(self, vectors: np.ndarray) -> bool:
+        count: int = 0 if vectors is None else len(vectors)
+        if not self.trained:
+            return count < IVF_MIN_TRAIN_SIZE
+        return len(self.assignments) == count
+
+    def search(self, vectors: np.ndarray, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        if not self.trained or len(self.assignments) != len(vectors):
+            # Untrained, or out of sync with the matrix: fall back to exact search
+            all_rows: np.ndarray = np.arange(len(vectors))
+            return [exact_top_k(vectors @ query, all_rows, k) for query in queries]
+
+        nprobe: int = min(self.nprobe, len(self.centroids))
+        probes: np.ndarray = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        results: List[List[Tuple[int, float]]] = []
+        for query, clusters in zip(queries, probes):
+            rows: np.ndarray = np.concatenate([self.lists[cluster] for cluster in clusters])
+            if len(rows) == 0:
+                results.append([])
+                continue
+            results.append(exact_top_k(vectors[rows] @ query, rows, k))
+        return results
+
+    def save(self, path: str):
+        centroids: np.ndarray = self.centroids if self.trained else np.zeros((0, 0), dtype=np.float32)
+        with open(path + ".tmp", "wb") as file:
+            np.savez(file, centroids=centroids, assignments=self.assignments)
+        os.replace(path + ".tmp", path)
+
+    def load(self, path: str):
+        with np.load(path) as data:
+            centroids: np.ndarray = data["centroids"]
+            self.assignments = data["assignments"]
+        self.centroids = centroids if centroids.size else None
+        if self.trained:
+            self.rebuild_lists()
+
+
+class FaissIndex(VectorIndex):
+    """
+    FAISS HNSW graph index on inner product, which is the cosine similarity for normalized vectors.
+    HNSW supports incremental insertion natively.
+    """
+
+    kind: str = FAISS
+
+    def __init__(self, m: int = 32, ef_construction: int = 200, ef_search: int = 64):
+        """
+        :param m: Number of neighbors of each node in the graph
+        :param ef_construction: Size of the candidate list while inserting
+        :param ef_search: Size of the candidate list while searching. Higher is slower but has better recall.
+        """
+        # pylint: disable=import-outside-toplevel,import-error
+        import faiss
+
+        self.faiss = faiss
+        self.m: int = m
+        self.ef_construction: int = ef_construction
+        self.ef_search: int = ef_search
+        self.index = None
+
+    def new_index(self, dimension: int):
+        """
+        :param dimension: Dimension of the vectors
+        :return: An empty HNSW index
+        """
+        index = self.faiss.IndexHNSWFlat(dimension, self.m, self.faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = self.ef_construction
+        return index
+
+    def build(self, vectors: np.ndarray):
+        self.index = None
+        if vectors is None or len(vectors) == 0:
+            return
+        self.index = self.new_index(vectors.shape[1])
+        self.index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+
+    def add(self, vectors: np.ndarray, start_row: int):
+        if self.index is None:
+            self.index = self.new_index(vectors.shape[1])
+        self.index.add(np.ascontiguousarray(vectors[start_row:], dtype=np.float32))
+
+    def is_consistent(self, vectors: np.ndarray) -> bool:
+        count: int = 0 if vectors is None else len(vectors)
+        return (self.index.ntotal if self.index is not None else 0) == count
+
+    def search(self, vectors: np.ndarray, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        if self.index is None:
+            return [[] for _ in queries]
+        self.index.hnsw.efSearch = max(self.ef_search, k)
+        scores, rows = self.index.search(np.ascontiguousarray(queries, dtype=np.float32), k)
+        return [
+            [(row, score) for row, score in zip(query_rows, query_scores) if row >= 0]
+            for query_rows, query_scores in zip(rows.tolist(), scores.tolist())
+        ]
+
+    def save(self, path: str):
+        if self.index is not None:
+            self.faiss.write_index(self.index, path + ".tmp")
+            os.replace(path + ".tmp", path)
+
+    def load(self, path: str):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.index = self.faiss.read_index(path)
+
+
+def create_vector_index(kind: Optional[str], params: Optional[Dict[str, Any]] = None) -> Optional[VectorIndex]:
+    """
+    :param kind: One of "exact", "ivf" or "faiss". "faiss" falls back to "ivf" if faiss is not installed.
+    :param params: Keyword arguments of the index constructor, e.g. {"nprobe": 16} or {"ef_search": 128}
+    :return: A new empty index, or None for exact search
+    :raises ValueError: If the kind is unknown, or a parameter is not one of the kind
+    """
+    kind = (kind or EXACT).lower()
+    params = params or {}
+    if kind not in VECTOR_INDEX_KINDS:
+        raise ValueError(f"vector_index must be one of {', '.join(VECTOR_INDEX_KINDS)}, got: '{kind}'")
+    for key in params:
+        if key not in VECTOR_INDEX_PARAMS[kind]:
+            raise ValueError(
+                f"Unknown vector_index_params key '{key}' for vector_index '{kind}', "
+                f"expected one of: {', '.join(VECTOR_INDEX_PARAMS[kind]) or 'none'}"
+            )
+    if kind == EXACT:
+        return None
+    if kind == FAISS:
+        try:
+            return FaissIndex(**{key: value for key, value in params.items() if key in FAISS_PARAMS})
+        except ImportError:
+            logger.warning("faiss is not installed, falling back to the NumPy IVF index")
+    return IvfIndex(**{key: value for key, value in params.items() if key in IVF_PARAMS})
+
+
+def get_index_path(vector_store_path: str, kind: str) -> str:
+    """
+    :param vector_store_path: Path of the persisted vector store
+    :param kind: The kind of index
+    :return: Path of the index file persisted alongside the vector store
+    """
+    return f"{os.path.splitext(vector_store_path)[0]}.{kind}.index"
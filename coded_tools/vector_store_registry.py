@@ -0,0 +1,215 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+# END COPYRIGHT
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from langchain_core.vectorstores import VectorStore
+
+# Seconds a built vector store is reused before it is rebuilt from source
+DEFAULT_TTL_SECONDS = 3600.0
+# Upper bound on the estimated memory held by all registered vector stores (1 GB)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Rough per-float cost of a vector held as a python list of floats
+BYTES_PER_LIST_FLOAT = 8
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_vector_store_size(vectorstore: VectorStore) -> int:
+    """
+    :param vectorstore: A built vector store
+    :return: Approximate number of bytes of memory the vector store holds
+    """
+    nbytes: Optional[int] = getattr(vectorstore, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+
+    # InMemoryVectorStore keeps a dict of {id: {"vector": [...], "text": "...", "metadata": {...}}}
+    store: Optional[Dict[str, Dict[str, Any]]] = getattr(vectorstore, "store", None)
+    if not isinstance(store, dict):
+        return 0
+    return sum(
+        len(entry.get("vector", [])) * BYTES_PER_LIST_FLOAT + len(entry.get("text", "")) for entry in store.values()
+    )
+
+
+class VectorStoreRegistry:
+    """
+    Process-wide registry of already-built vector stores.
+
+    Stores are keyed on the loader arguments and the fingerprints of their sources,
+    expire after a TTL, and are evicted least recently used first when the estimated
+    memory of all stores exceeds the cap. Concurrent callers asking for the same key
+    wait on a single in-flight build instead of each starting their own.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param ttl_seconds: Seconds a built vector store is reused
+        :param max_bytes: Upper bound on the estimated memory of all registered stores
+        """
+        self.ttl_seconds: float = ttl_seconds
+        self.max_bytes: int = max_bytes
+        # key -> (vector store, estimated size, time built)
+        self.entries: OrderedDict[str, Tuple[VectorStore, int, float]] = OrderedDict()
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.total_bytes: int = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(namespace: str, loader_args: Any, fingerprints: Optional[List[str]] = None) -> str:
+        """
+        Build a registry key. The arguments are hashed so that secrets in the
+        loader arguments (e.g. API keys) are never kept in memory as keys.
+
+        :param namespace: Distinguishes stores built by different RAG implementations
+        :param loader_args: Arguments used to load the source documents
+        :param fingerprints: Strings that change whenever a source changes (mtime, size, ETag, ...)
+        :return: The registry key
+        """
+        normalized: str = json.dumps(
+            {"namespace": namespace, "loader_args": loader_args, "fingerprints": fingerprints or []},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[VectorStore]:
+        """
+        :param key: The registry key
+        :return: The registered vector store, or None if absent or expired
+        """
+        with self.lock:
+            entry: Optional[Tuple[VectorStore, int, float]] = self.entries.get(key)
+            if entry is None:
+                return None
+            vectorstore, size, built_at = entry
+            if time.monotonic() - built_at > self.ttl_seconds:
+                del self.entries[key]
+                self.total_bytes -= size
+                return None
+            self.entries.move_to_end(key)
+            return vectorstore
+
+    def put(self, key: str, vectorstore: VectorStore):
+        """
+        Register a vector store, evicting least recently used stores when over the memory cap.
+
+        :param key: The registry key
+        :param vectorstore: The built vector store
+        """
+        size: int = estimate_vector_store_size(vectorstore)
+        if size > self.max_bytes:
+            logger.info("Vector store of ~%d bytes exceeds the registry cap, not registering it", size)
+            return
+
+        with self.lock:
+            previous: Optional[Tuple[VectorStore, int, float]] = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self.entries[key] = (vectorstore, size, time.monotonic())
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def invalidate(self, key: str):
+        """
+        Drop a registered vector store so the next caller rebuilds it.
+
+        :param key: The registry key
+        """
+        with self.lock:
+            entry: Optional[Tuple[VectorStore, int, float]] = self.entries.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry[1]
+
+    def clear(self):
+        """
+        Drop all registered vector stores.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    async def get_or_build(self, key: str, build: Callable[[], Awaitable[VectorStore]]) -> VectorStore:
+        """
+        Return the registered vector store for the key, building it at most once
+        across concurrent callers if it is not registered yet.
+
+        :param key: The registry key
+        :param build: Coroutine function building the vector store on a miss
+        :return: The vector store
+        """
+        vectorstore: Optional[VectorStore] = self.get(key)
+        if vectorstore is not None:
+            logger.info("Reusing registered vector store")
+            return vectorstore
+
+        loop = asyncio.get_running_loop()
+        pending: Optional[asyncio.Future] = self.in_flight.get(key)
+        if pending is not None and pending.get_loop() is loop:
+            logger.info("Waiting for in-flight vector store build")
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future = loop.create_future()
+        self.in_flight[key] = future
+        try:
+            vectorstore = await build()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exception:
+            future.set_exception(exception)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+        self.put(key, vectorstore)
+        future.set_result(vectorstore)
+        return vectorstore
+
+
+_REGISTRY: Optional[VectorStoreRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_vector_store_registry() -> VectorStoreRegistry:
+    """
+    :return: The process-wide VectorStoreRegistry, configured from the
+        RAG_VECTOR_STORE_TTL_SECONDS and RAG_VECTOR_STORE_MAX_BYTES environment variables.
+    """
+    global _REGISTRY  # pylint: disable=global-statement
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = VectorStoreRegistry(
+                ttl_seconds=float(os.getenv("RAG_VECTOR_STORE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS))),
+                max_bytes=int(os.getenv("RAG_VECTOR_STORE_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+            )
+        return _REGISTRY
@@ -0,0 +1,74 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import threading
+import time
+from unittest import TestCase
+
+from apps.conscious_assistant.conscious_assistant import ThinkingScheduler
+
+
+class TestThinkingScheduler(TestCase):
+    """
+    Unit tests for the pacing of the turns of the conscious agent.
+    """
+
+    def test_idle_backoff_up_to_the_ceiling(self):
+        """
+        Each silent turn should double the interval up to the ceiling, and the user speaking should
+        bring it back down.
+        """
+        scheduler = ThinkingScheduler(interval=1.0, backoff=2.0, max_idle_interval=5.0)
+        intervals = []
+        for _ in range(4):
+            scheduler.record_turn(False)
+            intervals.append(scheduler.next_interval)
+        self.assertEqual(intervals, [2.0, 4.0, 5.0, 5.0])
+        scheduler.record_turn(True)
+        self.assertEqual(scheduler.next_interval, 1.0)
+
+    def test_user_input_wakes_the_agent(self):
+        """
+        A message of the user should start the next turn right away, however long the interval.
+        """
+        scheduler = ThinkingScheduler(interval=0.01, max_idle_interval=60.0)
+        for _ in range(12):
+            scheduler.record_turn(False)
+        threading.Timer(0.05, scheduler.put_user_input, ["Hello"]).start()
+        start = time.monotonic()
+        self.assertEqual(scheduler.wait(), ["Hello"])
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_token_budget_delays_silent_turns(self):
+        """
+        Silent turns should wait for the tokens spent to fall back under the budget, while the user
+        still gets an answer right away.
+        """
+        scheduler = ThinkingScheduler(interval=0.0, backoff=1.0, tokens_per_hour=100, budget_window=0.3)
+        scheduler.record_turn(False, {"total_tokens": 60})
+        start = time.monotonic()
+        self.assertEqual(scheduler.wait(), [])
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        scheduler.record_turn(False, {"total_tokens": 60})
+        scheduler.put_user_input("Still there?")
+        self.assertEqual(scheduler.wait(), ["Still there?"])
+        scheduler.record_turn(True, {"total_tokens": 10})
+
+        start = time.monotonic()
+        self.assertEqual(scheduler.wait(), [])
+        self.assertGreater(time.monotonic() - start, 0.1)
+
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics["turns"], 3)
+        self.assertEqual(metrics["user_turns"], 1)
+        self.assertEqual(metrics["idle_turns"], 2)
+        self.assertEqual(metrics["tokens"], 130)
+        self.assertEqual(metrics["deferred_turns"], 1)
+        self.assertGreater(metrics["idle_seconds"], 0.1)
@@ -0,0 +1,180 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import threading
+import time
+from unittest import TestCase
+
+from apps.cruse.cruse_assistant import AgentInbox
+from apps.cruse.cruse_assistant import CruseConversations
+from apps.cruse.cruse_assistant import parse_response_blocks
+
+
+class TestAgentInbox(TestCase):
+    """
+    Unit tests for the combined queue the cruse agent loop blocks on.
+    """
+
+    def test_wakes_up_on_input(self):
+        """
+        The agent loop should get a message as soon as it is sent, instead of at the next poll.
+        """
+        inbox = AgentInbox(coalesce_seconds=0.01)
+        sent = []
+
+        def send():
+            time.sleep(0.1)
+            sent.append(time.monotonic())
+            inbox.put_user_input("Hello")
+
+        threading.Thread(target=send).start()
+        self.assertEqual(inbox.get(), ("Hello", None))
+        self.assertLess(time.monotonic() - sent[0], 0.05)
+
+    def test_updates_during_a_turn_are_coalesced(self):
+        """
+        Everything sent while the agent is busy should be merged into one turn, the latest value of
+        a form field winning.
+        """
+        inbox = AgentInbox()
+        inbox.put_user_input("<form submitted>")
+        inbox.put_gui_context({"name": "Ada", "city": "Paris"})
+        inbox.put_gui_context({"city": "London"})
+        inbox.put_user_input("Book it")
+        self.assertEqual(inbox.get(), ("<form submitted>\nBook it", {"name": "Ada", "city": "London"}))
+
+    def test_gui_context_sent_after_its_message(self):
+        """
+        The gui context the browser emits right after a message should go in the same turn.
+        """
+        inbox = AgentInbox(coalesce_seconds=0.2)
+        inbox.put_user_input("<form submitted>")
+        threading.Timer(0.05, inbox.put_gui_context, [{"choice": "dogs"}]).start()
+        self.assertEqual(inbox.get(), ("<form submitted>", {"choice": "dogs"}))
+
+    def test_exit(self):
+        """
+        The loop should stop when the inbox is closed or the user sends "exit".
+        """
+        inbox = AgentInbox()
+        inbox.put_user_input("exit")
+        self.assertIsNone(inbox.get())
+        inbox.close()
+        self.assertIsNone(inbox.get())
+
+
+class TestCruseConversations(TestCase):
+    """
+    Unit tests for serving the conversations of many browsers at once.
+    """
+
+    def setUp(self):
+        self.turns = []
+        self.lock = threading.Lock()
+        self.done = threading.Semaphore(0)
+
+    def handle_turn(self, conversation, user_input, gui_context):
+        """
+        Record a turn, which takes a while like an agent answering.
+        """
+        time.sleep(0.2)
+        with self.lock:
+            self.turns.append((conversation.conversation_id, user_input, gui_context))
+        self.done.release()
+
+    def wait_turns(self, count):
+        """
+        Wait for the given number of turns to complete.
+        """
+        for _ in range(count):
+            self.assertTrue(self.done.acquire(timeout=5))  # pylint: disable=consider-using-with
+
+    def test_conversations_run_concurrently(self):
+        """
+        Turns of different browsers should run at the same time, each in its own conversation.
+        """
+        conversations = CruseConversations(self.handle_turn, workers=4)
+        for index in range(4):
+            self.assertTrue(conversations.open(f"sid{index}", "hello_world.hocon"))
+        start = time.monotonic()
+        for index in range(4):
+            conversations.put_user_input(f"sid{index}", f"Hi from {index}")
+        self.wait_turns(4)
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(sorted(self.turns), [(f"sid{index}", f"Hi from {index}", None) for index in range(4)])
+        self.assertFalse(conversations.put_user_input("unknown", "Hi"))
+
+    def test_input_during_a_turn_goes_into_one_next_turn(self):
+        """
+        A conversation should run one turn at a time, and what its browser sends meanwhile should
+        make up a single next turn.
+        """
+        conversations = CruseConversations(self.handle_turn, workers=4)
+        conversations.open("sid", "hello_world.hocon")
+        conversations.put_user_input("sid", "First")
+        time.sleep(0.1)
+        conversations.put_user_input("sid", "Second")
+        conversations.put_gui_context("sid", {"size": "S"})
+        conversations.put_gui_context("sid", {"size": "L"})
+        self.wait_turns(2)
+        time.sleep(0.3)
+        self.assertEqual(self.turns, [("sid", "First", None), ("sid", "Second", {"size": "L"})])
+
+    def test_cap_and_idle_eviction(self):
+        """
+        Connections beyond the cap should be refused, until idle conversations are dropped.
+        """
+        conversations = CruseConversations(self.handle_turn, max_conversations=2, idle_timeout=0.1)
+        self.assertTrue(conversations.open("sid0", "hello_world.hocon"))
+        self.assertTrue(conversations.open("sid1", "hello_world.hocon"))
+        self.assertFalse(conversations.open("sid2", "hello_world.hocon"))
+        # Starting a new chat replaces the conversation instead of taking another slot
+        self.assertTrue(conversations.open("sid1", "music_nerd.hocon"))
+        time.sleep(0.15)
+        self.assertTrue(conversations.open("sid2", "hello_world.hocon"))
+        self.assertEqual(sorted(conversations.conversations), ["sid2"])
+
+    def test_reconnecting_browser_resumes_its_conversation(self):
+        """
+        A browser reconnecting with the id of its conversation should find it with its state,
+        until the conversation is dropped while idle.
+        """
+        conversations = CruseConversations(self.handle_turn, max_conversations=2, idle_timeout=0.2)
+        conversations.open("page0", "hello_world.hocon")
+        state = conversations.conversations["page0"].state
+        time.sleep(0.15)
+        self.assertTrue(conversations.resume("page0"))
+        time.sleep(0.1)
+        # Resuming counts as activity, so the conversation is not dropped
+        conversations.open("page1", "hello_world.hocon")
+        self.assertIs(conversations.conversations["page0"].state, state)
+        self.assertTrue(conversations.put_user_input("page0", "Hi again"))
+        self.wait_turns(1)
+        self.assertEqual(self.turns, [("page0", "Hi again", None)])
+        self.assertFalse(conversations.resume("unknown"))
+
+
+class TestParseResponseBlocks(TestCase):
+    """
+    Unit tests for parsing the say and gui blocks of a whole response.
+    """
+
+    def test_say_and_gui_blocks(self):
+        """
+        The lines before the first block are left out, and blocks span lines until the next one starts.
+        """
+        response = (
+            "Let me see.\nsay: Here is a form\nto fill in.\nGUI: <form>\n<input name='city'>\n</form>\nsay: Done?\n"
+        )
+        expected = [
+            ("say", "Here is a form\nto fill in."),
+            ("gui", "<form>\n<input name='city'>\n</form>"),
+            ("say", "Done?"),
+        ]
+        self.assertEqual(parse_response_blocks(response), expected)
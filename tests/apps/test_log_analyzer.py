@@ -0,0 +1,287 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import csv
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from apps.log_analyzer import log_analyzer
+
+METADATA = '{"completion_tokens": 12, "prompt_tokens": 340, "total_tokens": 352}'
+
+
+def make_log(turns: int, file_index: int = 0) -> str:
+    """
+    :return: A thinking log with a system prompt and the given number of turns
+    """
+    parts = ["[SYSTEM]:\nYou are a helpful agent.\n"]
+    for turn in range(turns):
+        parts.append(f"[HUMAN]:\nQuestion {file_index}.{turn}\n")
+        parts.append(f"[AGENT]:\nCalling a tool for {turn}\n")
+        parts.append(f"[AI]:\nAnswer {file_index}.{turn}\n")
+        parts.append(f"[AGENT]:\n{METADATA}\n")
+    return "".join(parts)
+
+
+class TestLogAnalyzer(TestCase):
+    """
+    Unit tests for the streaming, parallel log analysis pipeline.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.logs = os.path.join(self.tmp.name, "logs")
+        os.makedirs(self.logs)
+        for file_index in range(3):
+            with open(os.path.join(self.logs, f"agent_{file_index}.txt"), "w", encoding="utf-8") as f:
+                f.write(make_log(6, file_index))
+        self.checkpoint = os.path.join(self.tmp.name, "results.jsonl")
+        self.sessions = []
+        self.closed = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def set_up(self):
+        """
+        :return: A fake session, owned by the calling worker thread, and its conversation state
+        """
+        session = {"thread": threading.get_ident()}
+        with self.lock:
+            self.sessions.append(session)
+        return session, {"user_input": None}
+
+    def tear_down(self, session):
+        """
+        :param session: A fake session to close
+        """
+        self.closed.append(session)
+
+    def analyze(self, session, analysis_thread, log_entry):
+        """
+        :return: A fake analysis naming the question of the entry
+        """
+        self.assertEqual(session["thread"], threading.get_ident())
+        self.assertIsNone(analysis_thread["user_input"])
+        analysis_thread["user_input"] = log_entry
+        time.sleep(random.uniform(0, 0.01))
+        return re.search(r"Question \d+\.\d+", log_entry).group(0), analysis_thread
+
+    def test_streamed_entries_match_whole_file_parsing(self):
+        """
+        Parsing a log file section by section should find the same entries as parsing it whole,
+        also when a label does not start a line.
+        """
+        content = make_log(5).replace("\n[HUMAN]", " [HUMAN]", 2)
+        path = os.path.join(self.tmp.name, "log.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        streamed = list(log_analyzer.iter_log_entries(path))
+        self.assertEqual([entry for _, entry in streamed], log_analyzer.extract_conversation_entries(content))
+        self.assertEqual(len(streamed), 5)
+        self.assertTrue(all(prompt == "You are a helpful agent." for prompt, _ in streamed))
+        # Labels straddling the blocks the file is read in
+        for block_size in (1, 7, 64):
+            sections = log_analyzer.iter_log_sections(log_analyzer.read_blocks(io.StringIO(content), block_size))
+            self.assertEqual(list(sections), list(log_analyzer.iter_log_sections([content])))
+
+    def test_entry_spans_sections_until_ai(self):
+        """
+        An entry should run from a [HUMAN] section to the next [AI] section, plus the metadata
+        the thinking file writes as a fenced JSON structure.
+        """
+        content = (
+            "Agent: assistant\n\n[HUMAN]:\nFirst\n\n[HUMAN]:\nSecond\n\n[AI]:\nAnswer\n\n"
+            f"[AGENT]:\n```json\n{METADATA}\n```\n\n[AGENT]:\nNot metadata\n\n[HUMAN]:\nUnanswered\n"
+        )
+        entries = log_analyzer.extract_conversation_entries(content)
+        self.assertEqual(len(entries), 1)
+        self.assertIn("Second", entries[0])
+        self.assertIn("total_tokens", entries[0])
+        self.assertNotIn("Not metadata", entries[0])
+
+    def test_metadata_detection(self):
+        """
+        Only sections holding a JSON object with token fields should be metadata.
+        """
+        self.assertTrue(log_analyzer.is_json_metadata(f":\n{METADATA}"))
+        self.assertTrue(log_analyzer.is_json_metadata(f":\n```json\n{METADATA}\n```"))
+        self.assertEqual(log_analyzer.parse_metadata(METADATA)["total_tokens"], 352)
+        self.assertFalse(log_analyzer.is_json_metadata(":\nUsed 352 total_tokens"))
+        self.assertFalse(log_analyzer.is_json_metadata(':\n{"answer": 42}'))
+        self.assertFalse(log_analyzer.is_json_metadata(':\n{"total_tokens": '))
+
+    def test_results_come_in_log_order(self):
+        """
+        Entries analyzed concurrently should be handed out in log order, with one session per
+        worker, all closed at the end.
+        """
+        results = list(
+            log_analyzer.analyze_log_directory(
+                self.logs, self.analyze, self.set_up, self.tear_down, workers=3, checkpoint_path=self.checkpoint
+            )
+        )
+        self.assertEqual(
+            [result["analysis"] for result in results], [f"Question {f}.{t}" for f in range(3) for t in range(6)]
+        )
+        self.assertLessEqual(len(self.sessions), 3)
+        self.assertEqual(len(self.closed), len(self.sessions))
+
+    def test_resume_from_checkpoint(self):
+        """
+        A run interrupted by an error should resume after the entries it completed.
+        """
+        analyzed = []
+
+        def failing_analyze(session, analysis_thread, log_entry):
+            analysis, analysis_thread = self.analyze(session, analysis_thread, log_entry)
+            if analysis == "Question 1.2":
+                raise ConnectionError("agent unreachable")
+            return analysis, analysis_thread
+
+        with self.assertRaises(ConnectionError):
+            for _ in log_analyzer.analyze_log_directory(
+                self.logs, failing_analyze, self.set_up, self.tear_down, workers=2, checkpoint_path=self.checkpoint
+            ):
+                pass
+        self.assertEqual(len(self.closed), len(self.sessions))
+
+        def counting_analyze(session, analysis_thread, log_entry):
+            analyzed.append(log_entry)
+            return self.analyze(session, analysis_thread, log_entry)
+
+        list(
+            log_analyzer.analyze_log_directory(
+                self.logs, counting_analyze, self.set_up, self.tear_down, workers=2, checkpoint_path=self.checkpoint
+            )
+        )
+        with open(self.checkpoint, "r", encoding="utf-8") as f:
+            results = [json.loads(line) for line in f]
+        self.assertEqual(len(analyzed), 10)
+        self.assertEqual(
+            sorted(result["analysis"] for result in results),
+            sorted(f"Question {f}.{t}" for f in range(3) for t in range(6)),
+        )
+
+    def test_token_usage_report_feeds_outliers(self):
+        """
+        Token usage should be aggregated per agent without any LLM, and only the outliers should
+        be sent to the analysis agent, with a note on their usage.
+        """
+        usage_logs = os.path.join(self.tmp.name, "usage")
+        os.makedirs(usage_logs)
+        parts = ["Agent: assistant\n"]
+        for turn in range(40):
+            total = 10000 if turn == 7 else 100 + turn
+            metadata = {"prompt_tokens": total - 10, "completion_tokens": 10, "total_tokens": total}
+            metadata.update({"time_taken_in_seconds": 1.5, "total_cost": 0.001})
+            parts.append(f"\n[HUMAN]:\nQuestion 0.{turn}\n\n[AI]:\nAnswer\n\n")
+            parts.append(f"[AGENT]:\n```json\n{json.dumps(metadata, indent=4)}\n```\n")
+        with open(os.path.join(usage_logs, "assistant"), "w", encoding="utf-8") as f:
+            f.write("".join(parts))
+
+        usage = log_analyzer.collect_token_usage(usage_logs)
+        summary = log_analyzer.summarize_token_usage(usage)
+        self.assertEqual(len(usage), 40)
+        self.assertEqual(summary[0]["agent"], "assistant")
+        self.assertEqual(summary[0]["calls"], 40)
+        self.assertEqual(summary[0]["total_tokens"], 10000 + sum(100 + turn for turn in range(40) if turn != 7))
+        self.assertEqual(summary[0]["p95_tokens"], 138)
+
+        path = os.path.join(self.tmp.name, "summary.csv")
+        log_analyzer.write_table(summary, log_analyzer.SUMMARY_COLUMNS, path)
+        with open(path, "r", encoding="utf-8") as f:
+            self.assertEqual(int(next(csv.DictReader(f))["calls"]), 40)
+
+        outliers = log_analyzer.find_outliers(usage, summary)
+        self.assertEqual(sorted(index for _, index in outliers), [7, 39])
+        results = list(
+            log_analyzer.analyze_log_directory(
+                usage_logs, self.analyze, self.set_up, self.tear_down, selected=outliers
+            )
+        )
+        self.assertEqual([result["analysis"] for result in results], ["Question 0.7", "Question 0.39"])
+
+    def test_outliers_keep_entries_that_cannot_be_ranked(self):
+        """
+        Entries of agents with few calls and entries without usage metadata should all be analyzed.
+        """
+        usage_logs = os.path.join(self.tmp.name, "usage")
+        os.makedirs(usage_logs)
+        parts = ["Agent: assistant\n"]
+        for turn in range(30):
+            parts.append(f"\n[HUMAN]:\nQuestion 0.{turn}\n\n[AI]:\nAnswer\n\n")
+            if turn != 3:
+                parts.append(f"[AGENT]:\n{METADATA}\n")
+        with open(os.path.join(usage_logs, "assistant"), "w", encoding="utf-8") as f:
+            f.write("".join(parts))
+        with open(os.path.join(usage_logs, "helper"), "w", encoding="utf-8") as f:
+            f.write("Agent: helper\n" + make_log(2, 1))
+
+        usage = log_analyzer.collect_token_usage(usage_logs)
+        outliers = log_analyzer.find_outliers(usage, log_analyzer.summarize_token_usage(usage))
+        self.assertEqual(
+            sorted(outliers),
+            [(os.path.join(usage_logs, "assistant"), 3)] + [(os.path.join(usage_logs, "helper"), i) for i in range(2)],
+        )
+        self.assertIn("no usage metadata", outliers[(os.path.join(usage_logs, "assistant"), 3)])
+
+    def test_requests_send_the_system_prompt_once(self):
+        """
+        Entries of a log file batched into one request should share one copy of the system prompt.
+        """
+        inputs = []
+
+        def recording_analyze(session, analysis_thread, log_entry):
+            with self.lock:
+                inputs.append(log_entry)
+            return self.analyze(session, analysis_thread, log_entry)
+
+        results = list(
+            log_analyzer.analyze_log_directory(
+                self.logs, recording_analyze, self.set_up, self.tear_down, batch_tokens=10000
+            )
+        )
+        self.assertEqual([result["entries"] for result in results], [list(range(6))] * 3)
+        self.assertEqual(len(inputs), 3)
+        for combined_input in inputs:
+            self.assertEqual(combined_input.count("You are a helpful agent."), 1)
+            self.assertEqual(combined_input.count("[HUMAN]"), 6)
+
+    def test_filter_drops_duplicates(self):
+        """
+        Identical entries up to digits and near-identical entries should be dropped, and entries
+        should be filtered by agent, error markers and tokens.
+        """
+        rng = random.Random(0)
+        words = " ".join("".join(rng.choices("abcdefghij", k=6)) for _ in range(200))
+        entry = f"[HUMAN]:\nRun the report at 10:42 {words}\n[AI]:\nDone"
+        entry_filter = log_analyzer.LogEntryFilter()
+        self.assertTrue(entry_filter.accept("assistant", entry))
+        self.assertFalse(entry_filter.accept("assistant", entry.replace("10:42", "11:07")))
+        self.assertFalse(entry_filter.accept("assistant", entry.replace(words.split()[100], "other")))
+        self.assertTrue(entry_filter.accept("assistant", entry.replace(words, words[::-1])))
+        self.assertEqual(entry_filter.stats, {"read": 4, "filtered": 0, "duplicates": 2, "kept": 2})
+
+        entry_filter = log_analyzer.LogEntryFilter(agents=["assistant"], error_markers=["Traceback"])
+        self.assertFalse(entry_filter.accept("researcher", entry + " traceback"))
+        self.assertFalse(entry_filter.accept("assistant", entry))
+        self.assertTrue(entry_filter.accept("assistant", entry + " Traceback"))
+
+        entry_filter = log_analyzer.LogEntryFilter(min_total_tokens=300)
+        self.assertFalse(entry_filter.accept("assistant", entry))
+        self.assertTrue(entry_filter.accept("assistant", f"{entry}\n[AGENT]:\n{METADATA}"))
@@ -0,0 +1,59 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+from unittest import TestCase
+
+from apps.response_blocks import ResponseBlockStream
+
+
+class TestResponseBlockStream(TestCase):
+    """
+    Unit tests for parsing the say and gui blocks of a response as it streams in.
+    """
+
+    RESPONSE = "Let me see.\nsay: Here is a form\nto fill in.\nGUI: <form>\n<input name='city'>\n</form>\nsay: Done?\n"
+
+    def test_chunks_parse_like_the_whole_response(self):
+        """
+        However the response is split, the stream should give the blocks of the whole response.
+        """
+        expected = [
+            ("say", "Here is a form\nto fill in."),
+            ("gui", "<form>\n<input name='city'>\n</form>"),
+            ("say", "Done?"),
+        ]
+        for size in (1, 3, 7, 100):
+            stream = ResponseBlockStream()
+            blocks = []
+            for start in range(0, len(self.RESPONSE), size):
+                blocks.extend(stream.feed(self.RESPONSE[start : start + size]))
+            self.assertEqual(blocks + stream.close(), expected)
+
+    def test_other_kinds_of_blocks(self):
+        """
+        The stream should parse the block types it is given, such as the thoughts of the conscious assistant.
+        """
+        stream = ResponseBlockStream(kinds=("thought", "say"))
+        blocks = stream.feed("Thought: Quiet day.\ngui: not a block\nsay: Hi\n")
+        self.assertEqual(blocks + stream.close(), [("thought", "Quiet day.\ngui: not a block"), ("say", "Hi")])
+
+    def test_blocks_complete_as_they_stream_in(self):
+        """
+        A block should be given once the next one starts, and be readable while it is written.
+        """
+        stream = ResponseBlockStream()
+        self.assertEqual(stream.feed("say: Hello"), [])
+        self.assertEqual(stream.partial(), ("say", "Hello"))
+        self.assertEqual(stream.feed(" there\nsa"), [])
+        # The last line may be starting the next block, so it is left out
+        self.assertEqual(stream.partial(), ("say", "Hello there"))
+        self.assertEqual(stream.feed("y: Bye\n"), [("say", "Hello there")])
+        self.assertEqual(stream.partial(), ("say", "Bye"))
+        self.assertEqual(stream.close(), [("say", "Bye")])
+        self.assertIsNone(stream.partial())
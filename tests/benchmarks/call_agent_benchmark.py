@@ -0,0 +1,127 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+"""
+Offline benchmark of concurrent CallAgent calls, comparing exchanges run inside the coroutine,
+which block the event loop, with CallAgent offloading them to the worker threads of the session
+pool. The called agent network is a fake session answering after a fixed latency. Calls beyond
+the sessions the pool opens to one agent network wait for a session, so they take a multiple of
+the latency.
+
+Run it with:
+    python -m tests.benchmarks.call_agent_benchmark --calls 8 --latency 0.5
+"""
+import argparse
+import asyncio
+import time
+from typing import Any
+from typing import Dict
+from typing import Generator
+from typing import List
+
+from coded_tools.agent_session_pool import DEFAULT_MAX_SESSIONS
+from coded_tools.agent_session_pool import get_agent_session_pool
+from coded_tools.agent_session_pool import new_agent_state_info
+from coded_tools.call_agent import CallAgent
+
+AGENT_NAME = "fake_agent"
+
+
+class LatencySession:
+    """
+    Fake agent session answering every request after a fixed latency.
+    """
+
+    def __init__(self, latency: float):
+        """
+        :param latency: Seconds the agent network takes to answer
+        """
+        self.latency: float = latency
+
+    def streaming_chat(self, chat_request: Dict[str, Any]) -> Generator[Dict[str, Any], None, None]:
+        """
+        :return: The answer, after the latency
+        """
+        time.sleep(self.latency)
+        yield {"response": {"type": "AI", "text": "Answer to " + chat_request["user_message"]["text"]}}
+
+    def connectivity(self, _request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        :return: An empty connectivity report
+        """
+        return {}
+
+    def close(self):
+        """
+        Nothing to close.
+        """
+
+
+async def blocking_call(inquiry: str) -> str:
+    """
+    :return: The answer to the inquiry, exchanged inside the coroutine as CallAgent used to
+    """
+    state: Dict[str, Any] = new_agent_state_info()
+    state["user_input"] = inquiry
+    with get_agent_session_pool().session(AGENT_NAME, "direct", "localhost", 30012) as pooled:
+        state = pooled.process_once(state)
+    return state["last_chat_response"]
+
+
+async def offloaded_call(inquiry: str) -> str:
+    """
+    :return: The answer to the inquiry, from CallAgent
+    """
+    return await CallAgent().async_invoke({"inquiry": inquiry, "agent_name": AGENT_NAME}, {})
+
+
+async def run_calls(call, calls: int) -> Dict[str, float]:
+    """
+    :param call: Coroutine function of an inquiry returning the answer
+    :param calls: Number of calls run concurrently
+    :return: Seconds the calls took, and the longest the event loop was kept from running a ticker
+    """
+    stalls: List[float] = [0.0]
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            before: float = time.perf_counter()
+            await asyncio.sleep(0.01)
+            stalls.append(time.perf_counter() - before - 0.01)
+
+    ticking = asyncio.create_task(ticker())
+    start: float = time.perf_counter()
+    answers: List[str] = await asyncio.gather(*(call(f"question {index}") for index in range(calls)))
+    seconds: float = time.perf_counter() - start
+    done.set()
+    await ticking
+    assert answers == [f"Answer to question {index}" for index in range(calls)]
+    return {"seconds": seconds, "stall": max(stalls)}
+
+
+def main():
+    """
+    Run the benchmark and print the time taken by each strategy.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=DEFAULT_MAX_SESSIONS, help="CallAgent calls run concurrently")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds the agent network takes to answer")
+    args = parser.parse_args()
+
+    get_agent_session_pool().create_session = lambda *_: LatencySession(args.latency)
+    print(f"{args.calls} concurrent calls, {args.latency}s per call")
+    print(f"{'strategy':<32}{'seconds':>10}{'max loop stall':>16}")
+    for name, call in (("blocking in the coroutine", blocking_call), ("CallAgent offloaded", offloaded_call)):
+        result: Dict[str, float] = asyncio.run(run_calls(call, args.calls))
+        print(f"{name:<32}{result['seconds']:>10.2f}{result['stall']:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+"""
+Benchmark of the chunking settings of the RAG tools: chunk count, splitting time with and
+without the chunk memo, index size and retrieval latency, on a synthetic corpus embedded
+with the offline fake embedding backend.
+
+Run it with:
+    python -m tests.benchmarks.chunking_benchmark --documents 200 --words 2000
+"""
+import argparse
+import random
+import time
+from typing import List
+
+import numpy as np
+from langchain_core.documents import Document
+
+from coded_tools.chunking import ChunkMemo
+from coded_tools.chunking import DocumentChunker
+from coded_tools.numpy_vector_store import NumpyVectorStore
+from tests.benchmarks.fake_embeddings import FakeEmbeddingBackend
+
+SETTINGS = ((100, 50), (200, 50), (400, 100), (800, 200))
+
+
+def make_corpus(documents: int, words: int, seed: int) -> List[Document]:
+    """
+    :return: Documents of random sentences, like pages of a policy pack
+    """
+    rng = random.Random(seed)
+    vocabulary: List[str] = [f"term{i}" for i in range(5000)]
+    corpus: List[Document] = []
+    for index in range(documents):
+        sentences: List[str] = []
+        count: int = 0
+        while count < words:
+            length: int = rng.randint(8, 25)
+            sentences.append(" ".join(rng.choices(vocabulary, k=length)).capitalize() + ".")
+            count += length
+        corpus.append(Document(page_content=" ".join(sentences), metadata={"source": f"doc{index}.pdf"}))
+    return corpus
+
+
+def main():  # pylint: disable=too-many-locals
+    """
+    Run the benchmark and print a table of the settings.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--words", type=int, default=2000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus: List[Document] = make_corpus(args.documents, args.words, args.seed)
+    embedding = FakeEmbeddingBackend(size=args.dimension, latency=0.0)
+    queries: np.ndarray = np.asarray([embedding.embed_text(f"query {i}") for i in range(args.queries)])
+    print(f"{args.documents} documents of {args.words} words, dimension {args.dimension}")
+    print(f"{'size/overlap':<14}{'chunks':>8}{'split s':>10}{'memo s':>10}{'index MB':>10}{'ms/query':>10}")
+
+    for chunk_size, chunk_overlap in SETTINGS:
+        chunker = DocumentChunker(chunk_size, chunk_overlap, memo=ChunkMemo())
+        start: float = time.perf_counter()
+        chunks: List[Document] = chunker.split_documents(corpus)
+        split_s: float = time.perf_counter() - start
+        start = time.perf_counter()
+        chunker.split_documents(corpus)
+        memo_s: float = time.perf_counter() - start
+
+        store = NumpyVectorStore(embedding=embedding)
+        store.add_vectors(
+            [embedding.embed_text(chunk.page_content) for chunk in chunks],
+            [chunk.page_content for chunk in chunks],
+            [chunk.metadata for chunk in chunks],
+        )
+        start = time.perf_counter()
+        for query in queries:
+            store.top_k(query[None, :], k=4)
+        query_ms: float = 1000 * (time.perf_counter() - start) / len(queries)
+
+        name = f"{chunk_size}/{chunk_overlap}"
+        print(f"{name:<14}{len(chunks):>8}{split_s:>10.2f}{memo_s:>10.3f}{store.nbytes / 1e6:>10.1f}{query_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+"""
+Offline benchmark of the embedding scheduler of coded_tools/embedding_scheduler.py against
+langchain's default of sequential fixed-size batches, on a fake embedding backend simulating
+request latency and a tokens-per-minute quota.
+
+Run it with:
+    python -m tests.benchmarks.embedding_scheduler_benchmark --chunks 5000 --latency 0.2
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+from typing import Optional
+
+from coded_tools.chunking import CHARS_PER_TOKEN
+from coded_tools.embedding_scheduler import EmbeddingScheduler
+from coded_tools.embedding_scheduler import RateLimiter
+from tests.benchmarks.fake_embeddings import FakeEmbeddingBackend
+
+# Batch size of langchain's OpenAIEmbeddings
+LANGCHAIN_BATCH_SIZE = 1000
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    :return: Tokens of the text, as accounted by the fake backend
+    """
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def make_chunks(count: int) -> List[str]:
+    """
+    :return: Chunks of varying length, up to about 100 tokens like the splitter produces
+    """
+    return [f"chunk {i} " + "lorem ipsum dolor sit amet " * (1 + i % 15) for i in range(count)]
+
+
+async def sequential(backend: FakeEmbeddingBackend, chunks: List[str]) -> Optional[float]:
+    """
+    :return: Seconds to embed the chunks in sequential batches, None if a request was rate limited
+    """
+    start: float = time.perf_counter()
+    try:
+        for index in range(0, len(chunks), LANGCHAIN_BATCH_SIZE):
+            await backend.aembed_documents(chunks[index : index + LANGCHAIN_BATCH_SIZE])
+    except Exception:  # pylint: disable=broad-exception-caught
+        return None
+    return time.perf_counter() - start
+
+
+async def scheduled(
+    backend: FakeEmbeddingBackend, chunks: List[str], concurrency: int, batch_tokens: int, tokens_per_minute: int
+) -> float:
+    """
+    :return: Seconds to embed the chunks through the scheduler
+    """
+    scheduler = EmbeddingScheduler(
+        backend,
+        limiter=RateLimiter(concurrency, tokens_per_minute or None),
+        max_batch_tokens=batch_tokens,
+        initial_backoff=0.1,
+        token_counter=estimate_tokens,
+    )
+    start: float = time.perf_counter()
+    await scheduler.aembed_documents(chunks)
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Run the benchmark and print the time taken by each strategy.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per request")
+    parser.add_argument("--seconds-per-token", type=float, default=2e-6)
+    parser.add_argument("--backend-tokens-per-minute", type=int, default=0, help="Quota of the fake backend")
+    args = parser.parse_args()
+
+    chunks: List[str] = make_chunks(args.chunks)
+    total_tokens: int = sum(estimate_tokens(chunk) for chunk in chunks)
+    print(f"{len(chunks)} chunks, {total_tokens} tokens, {args.latency}s per request")
+    print(f"{'strategy':<48}{'seconds':>10}{'requests':>10}{'429s':>8}")
+
+    def new_backend() -> FakeEmbeddingBackend:
+        return FakeEmbeddingBackend(
+            latency=args.latency,
+            seconds_per_token=args.seconds_per_token,
+            tokens_per_minute=args.backend_tokens_per_minute,
+        )
+
+    backend = new_backend()
+    seconds: Optional[float] = asyncio.run(sequential(backend, chunks))
+    result: str = f"{seconds:>10.2f}" if seconds is not None else f"{'failed':>10}"
+    print(
+        f"{f'sequential batches of {LANGCHAIN_BATCH_SIZE}':<48}{result}{backend.requests:>10}{backend.rate_limited:>8}"
+    )
+
+    for concurrency, batch_tokens in ((1, 50000), (4, 50000), (8, 20000), (16, 10000)):
+        backend = new_backend()
+        seconds = asyncio.run(scheduled(backend, chunks, concurrency, batch_tokens, args.backend_tokens_per_minute))
+        name = f"scheduler concurrency={concurrency} batch_tokens={batch_tokens}"
+        print(f"{name:<48}{seconds:>10.2f}{backend.requests:>10}{backend.rate_limited:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import Deque
+from typing import List
+from typing import Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from coded_tools.chunking import CHARS_PER_TOKEN
+from coded_tools.embedding_scheduler import TOKENS_PER_MINUTE_WINDOW_SECONDS
+
+
+class FakeRateLimitError(Exception):
+    """
+    Raised by FakeEmbeddingBackend like an HTTP 429 response of an embedding API.
+    """
+
+    status_code: int = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit reached, retry after {retry_after:.2f}s")
+        self.retry_after: float = retry_after
+
+
+class FakeEmbeddingBackend(Embeddings):  # pylint: disable=too-many-instance-attributes
+    """
+    Local stand-in for a remote embedding API, to exercise and benchmark the embedding
+    scheduler offline. Vectors are deterministic per text. Each request takes a fixed
+    latency plus a time per token, and requests beyond a tokens-per-minute quota are
+    rejected with a FakeRateLimitError.
+    """
+
+    def __init__(
+        self,
+        size: int = 256,
+        latency: float = 0.05,
+        seconds_per_token: float = 0.0,
+        tokens_per_minute: int = 0,
+    ):
+        """
+        :param size: Dimension of the vectors
+        :param latency: Seconds each request takes regardless of its size
+        :param seconds_per_token: Additional seconds per token of the request
+        :param tokens_per_minute: Quota of tokens per minute, 0 for no quota
+        """
+        self.size: int = size
+        self.latency: float = latency
+        self.seconds_per_token: float = seconds_per_token
+        self.tokens_per_minute: int = tokens_per_minute
+        self.model: str = f"fake-{size}"
+        # Statistics
+        self.requests: int = 0
+        self.rate_limited: int = 0
+        self.window: Deque[Tuple[float, int]] = deque()
+        self.lock = threading.Lock()
+
+    def embed_text(self, text: str) -> List[float]:
+        """
+        :param text: A text
+        :return: A deterministic unit vector for the text
+        """
+        seed: int = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector: np.ndarray = np.random.default_rng(seed).normal(size=self.size)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def admit(self, texts: List[str]) -> float:
+        """
+        Account for a request against the quota.
+
+        :param texts: Texts of the request
+        :return: Seconds the request takes
+        :raises FakeRateLimitError: If the request exceeds the tokens-per-minute quota
+        """
+        tokens: int = sum(max(1, len(text) // CHARS_PER_TOKEN) for text in texts)
+        with self.lock:
+            self.requests += 1
+            now: float = time.monotonic()
+            while self.window and now - self.window[0][0] > TOKENS_PER_MINUTE_WINDOW_SECONDS:
+                self.window.popleft()
+            used: int = sum(window_tokens for _, window_tokens in self.window)
+            if self.tokens_per_minute and self.window and used + tokens > self.tokens_per_minute:
+                self.rate_limited += 1
+                raise FakeRateLimitError(self.window[0][0] + TOKENS_PER_MINUTE_WINDOW_SECONDS - now)
+            self.window.append((now, tokens))
+        return self.latency + tokens * self.seconds_per_token
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.admit(texts))
+        return [self.embed_text(text) for text in texts]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.admit(texts))
+        return [self.embed_text(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
@@ -0,0 +1,124 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+"""
+Benchmark of the parsing of thinking logs by the log_analyzer app: the single-pass section
+scanner, on the whole content and streamed from a file, against the former regex splitting,
+on a synthetic log.
+
+Run it with:
+    python -m tests.benchmarks.log_parsing_benchmark --turns 20000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+from typing import List
+
+from apps.log_analyzer import log_analyzer
+
+
+def make_log(turns: int, seed: int) -> str:
+    """
+    :return: A thinking log of the given number of turns, with tool calls and token metadata
+    """
+    rng = random.Random(seed)
+    words: List[str] = [f"word{i}" for i in range(2000)]
+    parts: List[str] = ["Agent: assistant\n\n[SYSTEM]:\n" + " ".join(rng.choices(words, k=300)) + "\n"]
+    for turn in range(turns):
+        parts.append(f"\n[HUMAN]:\n{' '.join(rng.choices(words, k=rng.randint(10, 60)))}\n")
+        for _ in range(rng.randint(0, 3)):
+            parts.append(f"\n[AGENT]:\nCalling tool {turn} with {' '.join(rng.choices(words, k=40))}\n")
+        parts.append(f"\n[AI]:\n{' '.join(rng.choices(words, k=rng.randint(50, 300)))}\n")
+        metadata = {"completion_tokens": rng.randint(10, 500), "prompt_tokens": rng.randint(100, 5000)}
+        metadata["total_tokens"] = metadata["completion_tokens"] + metadata["prompt_tokens"]
+        parts.append(f"\n[AGENT]:\n```json\n{json.dumps(metadata, indent=4)}\n```\n")
+    return "".join(parts)
+
+
+def regex_extract_conversation_entries(content: str) -> List[str]:
+    """
+    The former parser: split the whole content with a regex, then walk the list of sections.
+    """
+    sections = re.split(r"(\[(?:HUMAN|AI|AGENT|SYSTEM)])", content)
+    labeled_sections = []
+    for i in range(0, len(sections) - 1, 2):
+        if sections[i + 1] and (i + 2 >= len(sections) or sections[i + 2].strip()):
+            labeled_sections.append((sections[i + 1], sections[i + 2].strip() if i + 2 < len(sections) else ""))
+    entries = []
+    i = 0
+    while i < len(labeled_sections):
+        if labeled_sections[i][0] != "[HUMAN]":
+            i += 1
+            continue
+        entry_parts = [f"[HUMAN]:\n{labeled_sections[i][1]}"]
+        i += 1
+        while i < len(labeled_sections) and labeled_sections[i][0] != "[AI]":
+            entry_parts.append(f"{labeled_sections[i][0]}:\n{labeled_sections[i][1]}")
+            i += 1
+        if i < len(labeled_sections):
+            entry_parts.append(f"[AI]:\n{labeled_sections[i][1]}")
+            i += 1
+            if (
+                i < len(labeled_sections)
+                and labeled_sections[i][0] == "[AGENT]"
+                and log_analyzer.is_json_metadata(labeled_sections[i][1])
+            ):
+                entry_parts.append(f"[AGENT]:\n{labeled_sections[i][1]}")
+                i += 1
+        if len(entry_parts) >= 2:
+            entries.append("\n".join(entry_parts))
+    return entries
+
+
+def measure(name: str, parse: Callable[[], int], megabytes: float):
+    """
+    Print the time of a parse returning its number of entries, and its peak memory in a second run.
+    """
+    start: float = time.perf_counter()
+    count: int = parse()
+    elapsed: float = time.perf_counter() - start
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<24}{count:>10}{elapsed:>10.3f}{megabytes / elapsed:>10.1f}{peak / 2**20:>12.1f}")
+
+
+def main():
+    """
+    Run the benchmark and print a table of the parsers.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    content: str = make_log(args.turns, args.seed)
+    megabytes: float = len(content.encode("utf-8")) / 2**20
+    assert regex_extract_conversation_entries(content) == log_analyzer.extract_conversation_entries(content)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path: str = os.path.join(tmp_dir, "thinking.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        print(f"{args.turns} turns, {megabytes:.1f} MB")
+        print(f"{'parser':<24}{'entries':>10}{'s':>10}{'MB/s':>10}{'peak MB':>12}")
+        measure("regex split", lambda: len(regex_extract_conversation_entries(content)), megabytes)
+        measure("scanner", lambda: len(log_analyzer.extract_conversation_entries(content)), megabytes)
+        measure("scanner from file", lambda: sum(1 for _ in log_analyzer.iter_log_entries(path)), megabytes)
+
+
+if __name__ == "__main__":
+    main()
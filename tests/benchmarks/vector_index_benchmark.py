@@ -0,0 +1,113 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+"""
+Recall-vs-latency benchmark of the approximate nearest neighbor indexes of
+coded_tools/vector_index.py against exact search, on synthetic clustered embeddings.
+
+Run it with:
+    python -m tests.benchmarks.vector_index_benchmark --chunks 50000 --dimension 256
+"""
+import argparse
+import time
+from typing import List
+from typing import Set
+from typing import Tuple
+
+import numpy as np
+
+from coded_tools.numpy_vector_store import normalize
+from coded_tools.vector_index import FaissIndex
+from coded_tools.vector_index import IvfIndex
+from coded_tools.vector_index import VectorIndex
+
+
+def make_corpus(chunks: int, dimension: int, topics: int, seed: int) -> np.ndarray:
+    """
+    :return: Normalized embeddings drawn around random topic centers, like chunks of related documents
+    """
+    rng = np.random.default_rng(seed)
+    centers: np.ndarray = rng.normal(size=(topics, dimension))
+    vectors: np.ndarray = centers[rng.integers(topics, size=chunks)] + 0.6 * rng.normal(size=(chunks, dimension))
+    return normalize(vectors)
+
+
+def recall(expected: List[Set[int]], actual: List[List[Tuple[int, float]]]) -> float:
+    """
+    :return: Fraction of the exact top-k rows found by the index
+    """
+    found: int = sum(len(truth & {row for row, _ in hits}) for truth, hits in zip(expected, actual))
+    return found / sum(len(truth) for truth in expected)
+
+
+def time_search(index: VectorIndex, vectors: np.ndarray, queries: np.ndarray, k: int) -> Tuple[float, list]:
+    """
+    :return: Mean milliseconds per query and the results
+    """
+    start: float = time.perf_counter()
+    results = [index.search(vectors, query[None, :], k)[0] for query in queries]
+    return 1000 * (time.perf_counter() - start) / len(queries), results
+
+
+def main():  # pylint: disable=too-many-locals
+    """
+    Run the benchmark and print a table of settings, recall@k and latency.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors: np.ndarray = make_corpus(args.chunks, args.dimension, args.topics, args.seed)
+    queries: np.ndarray = make_corpus(args.queries, args.dimension, args.topics, args.seed)[: args.queries]
+    # Perturb the queries so they are not exact copies of corpus rows
+    queries = normalize(queries + 0.1 * np.random.default_rng(args.seed + 1).normal(size=queries.shape))
+
+    start: float = time.perf_counter()
+    expected: List[Set[int]] = []
+    for query in queries:
+        scores: np.ndarray = vectors @ query
+        expected.append(set(np.argpartition(-scores, args.k - 1)[: args.k].tolist()))
+    exact_ms: float = 1000 * (time.perf_counter() - start) / len(queries)
+
+    print(f"{args.chunks} chunks, dimension {args.dimension}, {args.queries} queries, recall@{args.k}")
+    print(f"{'index':<36}{'build s':>10}{'recall':>10}{'ms/query':>10}{'speedup':>10}")
+    print(f"{'exact':<36}{'-':>10}{1.0:>10.3f}{exact_ms:>10.3f}{1.0:>10.1f}")
+
+    ivf = IvfIndex()
+    start = time.perf_counter()
+    ivf.build(vectors)
+    build_s: float = time.perf_counter() - start
+    for nprobe in (1, 4, 8, 16, 32, 64):
+        ivf.nprobe = nprobe
+        ms, results = time_search(ivf, vectors, queries, args.k)
+        name = f"ivf nlist={len(ivf.centroids)} nprobe={nprobe}"
+        print(f"{name:<36}{build_s:>10.2f}{recall(expected, results):>10.3f}{ms:>10.3f}{exact_ms / ms:>10.1f}")
+
+    try:
+        faiss_index = FaissIndex()
+    except ImportError:
+        print("faiss is not installed, skipping the faiss index")
+        return
+    start = time.perf_counter()
+    faiss_index.build(vectors)
+    build_s = time.perf_counter() - start
+    for ef_search in (16, 32, 64, 128, 256):
+        faiss_index.ef_search = ef_search
+        ms, results = time_search(faiss_index, vectors, queries, args.k)
+        name = f"faiss hnsw m={faiss_index.m} ef_search={ef_search}"
+        print(f"{name:<36}{build_s:>10.2f}{recall(expected, results):>10.3f}{ms:>10.3f}{exact_ms / ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from coded_tools.kwik_agents import list_topics
+from coded_tools.kwik_agents.commit_to_memory import CommitToMemory
+from coded_tools.kwik_agents.list_topics import ListTopics
+from coded_tools.kwik_agents.memory_store import TopicMemoryStore
+from coded_tools.kwik_agents.recall_memory import RecallMemory
+
+
+def commit_facts(base_path: str, writer: int, count: int):
+    """
+    Commit facts from a separate process.
+    """
+    store = TopicMemoryStore(base_path, compact_min_records=50)
+    for i in range(count):
+        store.add(f"topic {i % 3}", f"fact {i} of writer {writer}")
+
+
+class TestMemoryStore(TestCase):
+    """
+    Unit tests for the append-only topic memory store of the kwik_agents tools.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.base_path = os.path.join(self.tmp.name, "TopicMemory")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_add_appends_and_reloads(self):
+        """
+        Facts should be appended one line each, and a new store should read them back.
+        """
+        store = TopicMemoryStore(self.base_path)
+        store.add("pets", "has a cat")
+        self.assertEqual(store.add("pets", "has a dog"), "has a cat\nhas a dog")
+        store.add("food", "likes pizza")
+        with open(store.log_path, "r", encoding="utf-8") as file:
+            self.assertEqual(len(file.readlines()), 3)
+
+        reloaded = TopicMemoryStore(self.base_path)
+        self.assertEqual(reloaded.list_topics(), ["food", "pets"])
+        self.assertEqual(reloaded.get("pets"), "has a cat\nhas a dog")
+
+    def test_store_sees_appends_of_other_writers(self):
+        """
+        A store should pick up the facts appended by another store of the same file.
+        """
+        first = TopicMemoryStore(self.base_path)
+        second = TopicMemoryStore(self.base_path)
+        first.add("pets", "has a cat")
+        second.add("pets", "has a dog")
+        self.assertEqual(first.get("pets"), "has a cat\nhas a dog")
+
+    def test_compaction_keeps_all_facts(self):
+        """
+        Compaction should shrink the log to one record per topic without losing facts.
+        """
+        store = TopicMemoryStore(self.base_path, compact_factor=2, compact_min_records=10)
+        other = TopicMemoryStore(self.base_path)
+        for i in range(25):
+            store.add(f"topic {i % 2}", f"fact {i}")
+        with open(store.log_path, "r", encoding="utf-8") as file:
+            self.assertLess(len(file.readlines()), 10)
+        self.assertEqual(len(other.get("topic 0").split("\n")), 13)
+        self.assertEqual(TopicMemoryStore(self.base_path).snapshot(), store.snapshot())
+
+    def test_partial_line_is_skipped(self):
+        """
+        A line cut short by a crashed writer should not corrupt the facts appended after it.
+        """
+        store = TopicMemoryStore(self.base_path)
+        store.add("pets", "has a cat")
+        with open(store.log_path, "a", encoding="utf-8") as file:
+            file.write('{"topic": "pets", "fa')
+        store.add("pets", "has a dog")
+        self.assertEqual(TopicMemoryStore(self.base_path).get("pets"), "has a cat\nhas a dog")
+
+    def test_legacy_file_is_migrated(self):
+        """
+        The JSON file of the former whole-file format should seed the log.
+        """
+        with open(self.base_path + ".json", "w", encoding="utf-8") as file:
+            json.dump({"pets": "has a cat"}, file)
+        store = TopicMemoryStore(self.base_path)
+        store.add("pets", "has a dog")
+        self.assertEqual(TopicMemoryStore(self.base_path).get("pets"), "has a cat\nhas a dog")
+
+    def test_concurrent_writers_lose_no_facts(self):
+        """
+        Threads and processes committing at the same time should not clobber each other's facts.
+        """
+        store = TopicMemoryStore(self.base_path, compact_min_records=50)
+        threads = [threading.Thread(target=commit_facts, args=(self.base_path, writer, 40)) for writer in range(3)]
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=commit_facts, args=(self.base_path, writer, 40)) for writer in (3, 4)]
+        for worker in threads + processes:
+            worker.start()
+        for worker in threads + processes:
+            worker.join()
+        facts = [fact for topic in store.list_topics() for fact in store.get(topic).split("\n")]
+        self.assertEqual(len(facts), 200)
+        self.assertEqual(len(set(facts)), 200)
+
+    def test_tools_share_the_file(self):
+        """
+        Facts committed in one session should be listed and recalled in another.
+        """
+        with patch.object(list_topics, "MEMORY_FILE_PATH", self.tmp.name + os.sep):
+            CommitToMemory().invoke({"topic": "pets", "new_fact": "has a cat"}, {})
+            session = {}
+            CommitToMemory().invoke({"topic": "food", "new_fact": "likes pizza"}, session)
+            self.assertEqual(ListTopics().invoke({}, {"TopicMemory": {"stale": "memory"}}), "['food', 'pets']")
+            self.assertTrue(RecallMemory().invoke({"topic": "pets"}, session).endswith("has a cat"))
+
+    def test_tools_read_only_the_topic(self):
+        """
+        The tools should not copy the memory of all topics, nor push it into sly_data.
+        """
+        with patch.object(list_topics, "MEMORY_FILE_PATH", self.tmp.name + os.sep), patch.object(
+            TopicMemoryStore, "snapshot", side_effect=AssertionError("snapshot")
+        ):
+            sly_data = {}
+            self.assertEqual(RecallMemory().invoke({"topic": "pets"}, sly_data), "NO TOPICS YET!")
+            CommitToMemory().invoke({"topic": "pets", "new_fact": "has a cat"}, sly_data)
+            CommitToMemory().invoke({"topic": "food", "new_fact": "likes pizza"}, sly_data)
+            self.assertEqual(ListTopics().invoke({}, sly_data), "['food', 'pets']")
+            self.assertTrue(RecallMemory().invoke({"topic": "pets"}, sly_data).endswith("has a cat"))
+            self.assertEqual(RecallMemory().invoke({"topic": "travel"}, sly_data), "NO RELATED MEMORIES!")
+            self.assertEqual(sly_data, {})
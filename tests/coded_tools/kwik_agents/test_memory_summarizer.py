@@ -0,0 +1,161 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import os
+import tempfile
+import threading
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+from unittest import TestCase
+from unittest.mock import patch
+
+from coded_tools.chunking import count_tokens
+from coded_tools.embedding_scheduler import TOKEN_ENCODING
+from coded_tools.kwik_agents import list_topics
+from coded_tools.kwik_agents.commit_to_memory import CommitToMemory
+from coded_tools.kwik_agents.memory_store import TopicMemoryStore
+from coded_tools.kwik_agents.memory_summarizer import SUMMARY_PREFIX
+from coded_tools.kwik_agents.memory_summarizer import TopicSummarizer
+from coded_tools.kwik_agents.memory_summarizer import create_summary_llm
+from coded_tools.kwik_agents.recall_memory import RecallMemory
+
+
+class TestMemorySummarizer(TestCase):
+    """
+    Unit tests for the per-topic token budget of the kwik_agents memory.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.base_path = os.path.join(self.tmp.name, "TopicMemory")
+        self.store = TopicMemoryStore(self.base_path)
+        self.summarized: List[List[str]] = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def summarize(self, topic: str, facts: List[str], max_tokens: int, llm_config: Dict[str, Any]) -> str:
+        """
+        Offline summarizer recording the facts it was given.
+        """
+        del max_tokens, llm_config
+        self.summarized.append(facts)
+        return f"{len(facts)} older facts about\n{topic}"
+
+    def test_split_recent_keeps_the_latest_line(self):
+        """
+        The most recent lines within the budget are kept, and at least the latest one.
+        """
+        lines = ["fact " + "word " * 20] * 5
+        self.assertEqual(TopicSummarizer.split_recent(lines, 1000), 0)
+        self.assertEqual(TopicSummarizer.split_recent(lines, 1), 4)
+        self.assertEqual(TopicSummarizer.split_recent(["only line"], 0), 0)
+
+    def test_summary_llm_follows_the_llm_config(self):
+        """
+        The summarizer LLM should be created from an agent-style llm_config, with the summary budget as max_tokens.
+        """
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test", "ANTHROPIC_API_KEY": "test"}):
+            llm = create_summary_llm({"model_name": "gpt-4.1-mini"}, 50)
+            self.assertEqual(type(llm).__name__, "ChatOpenAI")
+            self.assertEqual(llm.max_tokens, 50)
+            llm = create_summary_llm({"class": "anthropic", "model_name": "claude-3-5-haiku-latest"}, 50)
+            self.assertEqual(type(llm).__name__, "ChatAnthropic")
+            self.assertEqual(llm.model, "claude-3-5-haiku-latest")
+
+    def test_oldest_facts_are_summarized(self):
+        """
+        A topic over budget should keep its recent facts, with the older ones replaced by one summary line.
+        """
+        for i in range(20):
+            memory = self.store.add("pets", f"fact {i} about the cat and the dog of the user")
+        summarizer = TopicSummarizer(self.store, self.summarize)
+        self.assertIsNone(summarizer.check("pets", memory, max_tokens=10000))
+        self.assertTrue(summarizer.check("pets", memory, max_tokens=100).result(timeout=10))
+
+        lines = self.store.get("pets").split("\n")
+        self.assertIn("older facts about pets", lines[0])
+        self.assertEqual(lines[-1], "fact 19 about the cat and the dog of the user")
+        self.assertEqual(len(self.summarized[0]) + len(lines) - 1, 20)
+        # The summary is in the log, so a new process sees it too
+        self.assertEqual(TopicMemoryStore(self.base_path).get("pets"), self.store.get("pets"))
+
+    def test_recall_keeps_the_summary(self):
+        """
+        With the budgets of the kwik_agents registry, recalling a summarized topic should return
+        the summary and the most recent facts, within the recall budget.
+        """
+        max_topic_tokens = 2000
+        max_recall_tokens = 1000
+
+        def summarize_long(topic: str, facts: List[str], max_tokens: int, model: str) -> str:
+            self.summarize(topic, facts, max_tokens, model)
+            # A summary as long as the summarizer is allowed
+            return " ".join(["the user keeps many pets"] * (max_tokens // 6))
+
+        for i in range(300):
+            memory = self.store.add("pets", f"fact {i} about the cat and the dog of the user")
+        summarizer = TopicSummarizer(self.store, summarize_long)
+        self.assertTrue(summarizer.check("pets", memory, max_topic_tokens).result(timeout=10))
+
+        recall = RecallMemory()
+        recall.topic_memory = {"pets": self.store.get("pets")}
+        lines = recall.recall_memory("pets", max_tokens=max_recall_tokens).split("\n")
+        self.assertTrue(lines[0].startswith(SUMMARY_PREFIX))
+        self.assertEqual(lines[-1], "fact 299 about the cat and the dog of the user")
+        self.assertGreater(len(lines), 2)
+        self.assertLessEqual(count_tokens("\n".join(lines), TOKEN_ENCODING), max_recall_tokens)
+
+    def test_facts_committed_meanwhile_are_kept(self):
+        """
+        Facts committed while the summary is written are kept, and a stale summary is dropped.
+        """
+        for i in range(20):
+            memory = self.store.add("pets", f"fact {i} about the cat and the dog of the user")
+
+        def summarize_slowly(topic: str, facts: List[str], max_tokens: int, model: str) -> str:
+            self.store.add("pets", "a fact committed meanwhile")
+            return self.summarize(topic, facts, max_tokens, model)
+
+        self.assertTrue(TopicSummarizer(self.store, summarize_slowly).run("pets", 100, "model"))
+        self.assertTrue(self.store.get("pets").endswith("a fact committed meanwhile"))
+        self.assertFalse(self.store.summarize("pets", self.summarized[0], "stale summary"))
+        self.assertIsNotNone(memory)
+
+    def test_commit_does_not_wait_for_the_summary(self):
+        """
+        CommitToMemory should return while the summary is still being written.
+        """
+        release = threading.Event()
+
+        def summarize_blocking(topic: str, facts: List[str], max_tokens: int, model: str) -> str:
+            release.wait(timeout=10)
+            return self.summarize(topic, facts, max_tokens, model)
+
+        summarizer = TopicSummarizer(self.store, summarize_blocking)
+        args = {
+            "topic": "pets",
+            "new_fact": "the user has a cat named Tom and a dog named Rex",
+            "max_topic_tokens": 30,
+        }
+        with patch.object(list_topics, "MEMORY_FILE_PATH", self.tmp.name + os.sep), patch(
+            "coded_tools.kwik_agents.commit_to_memory.get_topic_summarizer", return_value=summarizer
+        ):
+            start = time.monotonic()
+            for _ in range(3):
+                CommitToMemory().invoke(args, {})
+            self.assertLess(time.monotonic() - start, 5)
+            self.assertEqual(self.summarized, [])
+            release.set()
+            summarizer.executor.shutdown(wait=True)
+        self.assertEqual(len(self.summarized), 1)
+        # The summarization may have started before the last commits, which are then kept verbatim
+        self.assertEqual(len(self.store.get("pets").split("\n")), 1 + 3 - len(self.summarized[0]))
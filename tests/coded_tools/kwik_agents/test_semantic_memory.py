@@ -0,0 +1,183 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import List
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from coded_tools.kwik_agents import list_topics
+from coded_tools.kwik_agents import semantic_memory
+from coded_tools.kwik_agents.commit_to_memory import CommitToMemory
+from coded_tools.kwik_agents.memory_store import TopicMemoryStore
+from coded_tools.kwik_agents.recall_memory import RecallMemory
+from coded_tools.kwik_agents.semantic_memory import SemanticMemoryIndex
+from coded_tools.kwik_agents.semantic_memory import cap_to_token_budget
+
+
+class BagOfWordsEmbeddings(Embeddings):
+    """
+    Offline embeddings under which texts sharing words are similar, counting the texts embedded.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.embedded: int = 0
+        self.latency: float = latency
+
+    def embed_text(self, text: str) -> List[float]:
+        """
+        :return: The hashed bag of words of the text
+        """
+        vector = np.zeros(64)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.sha256(word.encode("utf-8")).hexdigest(), 16) % 64] += 1.0
+        return (vector + 1e-3).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        self.embedded += len(texts)
+        return [self.embed_text(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_text(text)
+
+
+class TestSemanticMemory(TestCase):
+    """
+    Unit tests for the semantic recall of the kwik_agents memory.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.store = TopicMemoryStore(os.path.join(self.tmp.name, "TopicMemory"))
+        self.store.add("pets", "has a cat named Tom")
+        self.store.add("pets", "walks the dog every morning")
+        self.store.add("food", "likes pizza with olives")
+        self.embeddings = BagOfWordsEmbeddings()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_recall_finds_facts_of_other_topics(self):
+        """
+        A query naming no topic should recall the closest facts, whichever their topic.
+        """
+        index = SemanticMemoryIndex(self.store, self.embeddings)
+        self.assertEqual(index.recall("my cat", k=1), [("pets", "has a cat named Tom")])
+        self.assertEqual(index.recall("favourite food", k=1), [("food", "likes pizza with olives")])
+
+    def test_index_follows_the_store(self):
+        """
+        Facts appended by another store of the same file are embedded once, on the next update.
+        """
+        index = SemanticMemoryIndex(self.store, self.embeddings)
+        index.update()
+        embedded = self.embeddings.embedded
+        TopicMemoryStore(self.store.log_path[: -len(".jsonl")]).add("travel", "flew to Lisbon in May")
+        index.update()
+        self.assertEqual(self.embeddings.embedded, embedded + 2)
+        self.assertEqual(index.recall("trip to Lisbon", k=1), [("travel", "flew to Lisbon in May")])
+
+    def test_summary_replaces_facts_in_the_index(self):
+        """
+        Facts replaced by a summary should no longer be recalled, and the index should hold one row
+        per line of the memory of the topic.
+        """
+        index = SemanticMemoryIndex(self.store, self.embeddings)
+        index.update()
+        self.store.add("pets", "feeds the fish at noon")
+        replaced = ["has a cat named Tom", "walks the dog every morning"]
+        self.assertTrue(self.store.summarize("pets", replaced, "owns pets"))
+        index.update()
+
+        recalled = [fact for _, fact in index.recall("cat Tom dog morning", k=10)]
+        self.assertNotIn("has a cat named Tom", recalled)
+        self.assertNotIn("walks the dog every morning", recalled)
+        self.assertEqual(sorted(recalled), ["feeds the fish at noon", "likes pizza with olives", "owns pets"])
+        self.assertEqual(len(index.facts), 3)
+        self.assertEqual(index.recall("fish", k=1), [("pets", "feeds the fish at noon")])
+
+    def test_cap_to_token_budget(self):
+        """
+        Lines beyond the token budget should be dropped.
+        """
+        lines = ["one two three"] * 10
+        self.assertEqual(cap_to_token_budget(lines, None), lines)
+        self.assertLess(len(cap_to_token_budget(lines, 12)), 10)
+        self.assertEqual(cap_to_token_budget(lines, 0), [])
+
+    def test_tools_recall_semantically(self):
+        """
+        RecallMemory should answer an unknown topic with the closest facts instead of no memories.
+        """
+        with patch.object(list_topics, "MEMORY_FILE_PATH", self.tmp.name + os.sep), patch.object(
+            semantic_memory, "create_embeddings", return_value=self.embeddings
+        ):
+            CommitToMemory().invoke({"topic": "hobbies", "new_fact": "plays chess", "semantic_recall": True}, {})
+            # Wait for the embedding scheduled by the commit
+            semantic_memory.get_semantic_memory_index(
+                list_topics.get_long_term_memory()
+            ).update_in_background().result()
+            embedded = self.embeddings.embedded
+            args = {"topic": "games", "query": "chess", "semantic_recall": True}
+            answer = RecallMemory().invoke(args, {})
+            self.assertIn("[hobbies]", answer.split("\n")[1])
+            self.assertTrue(answer.split("\n")[1].endswith("plays chess"))
+            # Facts were embedded at commit time
+            self.assertEqual(self.embeddings.embedded, embedded)
+            self.assertEqual(RecallMemory().invoke({"topic": "games"}, {}), "NO RELATED MEMORIES!")
+
+    def test_commit_does_not_wait_for_embeddings(self):
+        """
+        Committing should not wait for the memory or the new fact to be embedded.
+        """
+        self.embeddings.latency = 0.3
+        with patch.object(list_topics, "MEMORY_FILE_PATH", self.tmp.name + os.sep), patch.object(
+            semantic_memory, "create_embeddings", return_value=self.embeddings
+        ):
+            args = {"topic": "hobbies", "new_fact": "plays chess", "semantic_recall": True}
+
+            start = time.monotonic()
+            self.assertTrue(asyncio.run(CommitToMemory().async_invoke(args, {})).endswith("plays chess"))
+            self.assertLess(time.monotonic() - start, 0.2)
+            # Recall does not wait for the embedding of the memory either, it searches the facts embedded so far
+            args = {"topic": "games", "query": "chess", "semantic_recall": True}
+            start = time.monotonic()
+            self.assertEqual(RecallMemory().invoke(args, {}), "NO RELATED MEMORIES!")
+            self.assertLess(time.monotonic() - start, 0.2)
+            semantic_memory.get_semantic_memory_index(
+                list_topics.get_long_term_memory()
+            ).update_in_background().result()
+            answer = RecallMemory().invoke(args, {})
+            self.assertTrue(answer.split("\n")[1].endswith("plays chess"))
+
+    def test_recall_embeds_a_short_queue_only(self):
+        """
+        A recall should embed the facts committed just before, but leave a long queue to the background worker.
+        """
+        index = SemanticMemoryIndex(self.store, self.embeddings)
+        self.assertEqual(index.recall("my cat", k=1), [("pets", "has a cat named Tom")])
+
+        with patch.object(semantic_memory, "RECALL_MAX_EMBED_TEXTS", 2):
+            for i in range(5):
+                self.store.add("travel", f"flew to Lisbon in May {i}")
+            self.store.add("pets", "feeds the fish at noon")
+            embedded = self.embeddings.embedded
+            self.assertNotIn(("pets", "feeds the fish at noon"), index.recall("fish", k=1))
+            self.assertEqual(self.embeddings.embedded, embedded + 2)
+        index.executor.shutdown(wait=True)
+        self.assertEqual(index.recall("fish", k=1), [("pets", "feeds the fish at noon")])
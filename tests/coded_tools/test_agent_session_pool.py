@@ -0,0 +1,219 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+from coded_tools.agent_session_pool import AgentSessionPool
+from coded_tools.agent_session_pool import new_agent_state_info
+
+
+class FakeSession:
+    """
+    Stands in for an agent session, counting its health checks and answering after a latency.
+    """
+
+    def __init__(self, agent_name: str, latency: float = 0.0):
+        self.agent_name = agent_name
+        self.latency = latency
+        self.healthy = True
+        self.checks = 0
+        self.closed = False
+
+    def streaming_chat(self, chat_request):
+        """
+        Answer with the request in upper case.
+        """
+        time.sleep(self.latency)
+        yield {"response": {"type": "AI", "text": chat_request["user_message"]["text"].upper()}}
+
+    def connectivity(self, _request):
+        """
+        Fail when the session is unhealthy.
+        """
+        self.checks += 1
+        if not self.healthy:
+            raise ConnectionError("server went away")
+        return {}
+
+    def close(self):
+        """
+        Record that the session was closed.
+        """
+        self.closed = True
+
+
+class TestAgentSessionPool(TestCase):
+    """
+    Unit tests for the process-wide pool of agent sessions.
+    """
+
+    def setUp(self):
+        self.created = []
+        self.latency = 0.0
+
+    def create_session(self, agent_name, _connection_type, _host, _port, _local_externals_direct):
+        """
+        :return: A new fake session
+        """
+        session = FakeSession(agent_name, self.latency)
+        self.created.append(session)
+        return session
+
+    def test_sessions_are_reused_per_key(self):
+        """
+        Consecutive calls to the same agent network should share one session, and calls to
+        another agent network should get their own.
+        """
+        pool = AgentSessionPool(create_session=self.create_session)
+        for _ in range(3):
+            with pool.session("math_guy", "direct", "localhost", 30011) as pooled:
+                self.assertIs(pooled.session, self.created[0])
+        with pool.session("music_nerd", "direct", "localhost", 30011) as pooled:
+            self.assertEqual(pooled.session.agent_name, "music_nerd")
+        self.assertEqual(len(self.created), 2)
+
+    def test_cap_on_open_sessions(self):
+        """
+        Callers beyond max_sessions should wait for a session to be released, or time out.
+        """
+        pool = AgentSessionPool(max_sessions=2, create_session=self.create_session)
+        first = pool.acquire("math_guy", "direct", "localhost", 30011)
+        pool.acquire("math_guy", "direct", "localhost", 30011)
+        with self.assertRaises(TimeoutError):
+            pool.acquire("math_guy", "direct", "localhost", 30011, timeout=0.05)
+
+        threading.Timer(0.05, pool.release, [first]).start()
+        third = pool.acquire("math_guy", "direct", "localhost", 30011, timeout=5)
+        self.assertIs(third, first)
+        self.assertEqual(len(self.created), 2)
+
+    def test_unhealthy_session_is_replaced(self):
+        """
+        A session unused for longer than the health check interval should be checked before reuse,
+        and replaced if it fails the check.
+        """
+        pool = AgentSessionPool(health_check_interval=0.0, create_session=self.create_session)
+        with pool.session("math_guy", "direct", "localhost", 30011):
+            pass
+        self.created[0].healthy = False
+        with pool.session("math_guy", "direct", "localhost", 30011) as pooled:
+            self.assertIs(pooled.session, self.created[1])
+        self.assertEqual(self.created[0].checks, 1)
+        self.assertTrue(self.created[0].closed)
+
+    def test_idle_sessions_are_evicted(self):
+        """
+        Sessions unused for longer than the idle timeout should be closed, freeing their slot.
+        """
+        pool = AgentSessionPool(max_sessions=1, idle_timeout=0.01, create_session=self.create_session)
+        with pool.session("math_guy", "direct", "localhost", 30011):
+            pass
+        time.sleep(0.05)
+        with pool.session("music_nerd", "direct", "localhost", 30011):
+            pass
+        self.assertTrue(self.created[0].closed)
+        with pool.session("math_guy", "direct", "localhost", 30011, timeout=1) as pooled:
+            self.assertIs(pooled.session, self.created[2])
+
+    def test_failed_call_discards_session(self):
+        """
+        A session whose call raised should be closed instead of going back to the pool.
+        """
+        pool = AgentSessionPool(max_sessions=1, create_session=self.create_session)
+        with self.assertRaises(ConnectionError):
+            with pool.session("math_guy", "direct", "localhost", 30011):
+                raise ConnectionError("stream broken")
+        self.assertTrue(self.created[0].closed)
+        with pool.session("math_guy", "direct", "localhost", 30011, timeout=1) as pooled:
+            self.assertIs(pooled.session, self.created[1])
+
+    def test_async_calls_run_concurrently(self):
+        """
+        Concurrent exchanges should run in the worker threads of the pool, keeping the event loop
+        free, so that they take about as long as one.
+        """
+        self.latency = 0.2
+        pool = AgentSessionPool(create_session=self.create_session)
+
+        async def call(inquiry):
+            state = new_agent_state_info()
+            state["user_input"] = inquiry
+            state = await pool.async_process("math_guy", "direct", "localhost", 30011, state, timeout=5)
+            return state["last_chat_response"]
+
+        async def calls():
+            return await asyncio.gather(*(call(f"question {i}") for i in range(6)))
+
+        start = time.monotonic()
+        answers = asyncio.run(calls())
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(answers, [f"QUESTION {i}" for i in range(6)])
+        self.assertEqual(len(self.created), 6)
+
+    def test_async_call_timeout_aborts_session(self):
+        """
+        A call over its timeout should raise TimeoutError, and its session should be closed
+        instead of reused.
+        """
+        self.latency = 0.3
+        pool = AgentSessionPool(max_sessions=1, create_session=self.create_session)
+        state = new_agent_state_info()
+        state["user_input"] = "slow question"
+        with self.assertRaises(TimeoutError):
+            asyncio.run(pool.async_process("math_guy", "direct", "localhost", 30011, state, timeout=0.05))
+        self.assertTrue(self.created[0].closed)
+
+        self.latency = 0.0
+        state = asyncio.run(pool.async_process("math_guy", "direct", "localhost", 30011, state, timeout=5))
+        self.assertEqual(state["last_chat_response"], "SLOW QUESTION")
+        self.assertEqual(len(self.created), 2)
+
+    def test_cancelled_call_aborts_session(self):
+        """
+        Cancelling the task awaiting a call should abandon its exchange.
+        """
+        self.latency = 0.3
+        pool = AgentSessionPool(create_session=self.create_session)
+        state = new_agent_state_info()
+        state["user_input"] = "question"
+
+        async def cancel():
+            task = asyncio.create_task(pool.async_process("math_guy", "direct", "localhost", 30011, state))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await task
+
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(cancel())
+        self.assertTrue(self.created[0].closed)
+
+    def test_answer_text_is_forwarded(self):
+        """
+        The answer of the front man should be passed on as it streams in, without the messages of
+        the agents it called.
+        """
+        pool = AgentSessionPool(create_session=self.create_session)
+        state = new_agent_state_info()
+        state["user_input"] = "question"
+        texts = []
+        with pool.session("math_guy", "direct", "localhost", 30011) as pooled:
+            pooled.session.streaming_chat = lambda _request: iter(
+                [
+                    {"response": {"type": "AI", "text": "Working on it", "origin": [{"tool": "math_guy"}]}},
+                    {"response": {"type": "AI", "text": "Sub-agent", "origin": [{"tool": "a"}, {"tool": "b"}]}},
+                    {"response": {"type": "AGENT", "text": "Calling a tool", "origin": [{"tool": "math_guy"}]}},
+                    {"response": {"type": "AI", "text": "42", "origin": [{"tool": "math_guy"}]}},
+                ]
+            )
+            state = pooled.process_once(state, texts.append)
+            pooled.process_once(state)
+        self.assertEqual(texts, ["Working on it", "42"])
@@ -0,0 +1,143 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+from unittest import TestCase
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.embeddings import Embeddings
+
+from coded_tools.agentic_rag import rag
+
+
+class OfflineRag(rag.Rag):
+    """
+    Rag over a fixed set of pages instead of the remote PDF, counting the loads.
+    """
+
+    loads: int = 0
+    loads_lock = threading.Lock()
+
+    async def load_documents(self, loader_args: Dict[str, Any]) -> List[Document]:
+        with OfflineRag.loads_lock:
+            OfflineRag.loads += 1
+        # Slow enough for concurrent first calls to overlap with the build
+        await asyncio.sleep(0.2)
+        return [Document(page_content=f"Section {i} of the RFP", metadata={"page": i}) for i in range(5)]
+
+    def get_embeddings(self) -> Embeddings:
+        return DeterministicFakeEmbedding(size=16)
+
+    def split_documents(self, docs: List[Document]) -> List[Document]:
+        # One chunk per page, avoiding the download of the tiktoken encoding
+        return docs
+
+
+class TestAgenticRag(TestCase):
+    """
+    Unit tests for the warmed up vector store of the agentic_rag Rag tool.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.args = {"vector_store_path": os.path.join(self.tmp.name, "store.npy")}
+        OfflineRag.loads = 0
+        rag._WARM_UPS.clear()  # pylint: disable=protected-access
+        rag._FINGERPRINTS.clear()  # pylint: disable=protected-access
+
+    def tearDown(self):
+        rag._WARM_UPS.clear()  # pylint: disable=protected-access
+        rag._FINGERPRINTS.clear()  # pylint: disable=protected-access
+        self.tmp.cleanup()
+
+    def invoke_concurrently(self, count: int) -> List[str]:
+        """
+        :return: The answers of count concurrent invocations
+        """
+
+        async def invoke_all() -> List[str]:
+            return await asyncio.gather(
+                *(OfflineRag().async_invoke({**self.args, "query": "Section 3 of the RFP"}, {}) for _ in range(count))
+            )
+
+        return asyncio.run(invoke_all())
+
+    def test_concurrent_first_calls_share_one_build(self):
+        """
+        Concurrent first calls should wait on a single build, and later calls reuse it.
+        """
+        answers = self.invoke_concurrently(5)
+        self.assertEqual(OfflineRag.loads, 1)
+        self.assertTrue(all(answer.startswith("Section 3 of the RFP") for answer in answers))
+        self.invoke_concurrently(2)
+        self.assertEqual(OfflineRag.loads, 1)
+
+    def test_warm_up_persists_the_vector_store(self):
+        """
+        A warm-up started ahead of the first query should persist the store, so a new process
+        loads it instead of loading the PDF again.
+        """
+        future = OfflineRag.warm_up(self.args)
+        self.assertIs(OfflineRag.warm_up(self.args), future)
+        future.result(timeout=10)
+        self.assertTrue(os.path.exists(self.args["vector_store_path"]))
+
+        # Forget the warm-up, as in a new process
+        rag._WARM_UPS.clear()  # pylint: disable=protected-access
+        start = time.monotonic()
+        self.invoke_concurrently(1)
+        self.assertEqual(OfflineRag.loads, 1)
+        self.assertLess(time.monotonic() - start, 0.2)
+
+    def test_failed_warm_up_is_retried(self):
+        """
+        A failed build should not be reused, so the next call builds again.
+        """
+
+        class FailingRag(OfflineRag):
+            """
+            Rag whose source cannot be loaded.
+            """
+
+            async def load_documents(self, loader_args: Dict[str, Any]) -> List[Document]:
+                raise ConnectionError("offline")
+
+        with self.assertRaises(ConnectionError):
+            FailingRag.warm_up(self.args).result(timeout=10)
+        self.invoke_concurrently(1)
+        self.assertEqual(OfflineRag.loads, 1)
+
+    def test_pdf_checks_are_rate_limited(self):
+        """
+        The PDF should be checked at most once per interval, and a failed check should keep the current store.
+        """
+        checks = []
+
+        def fingerprint_url(url: str) -> str:
+            checks.append(url)
+            # The first check succeeds, later ones fail and return the bare URL
+            return url + "|etag" if len(checks) == 1 else url
+
+        with patch.object(rag.PdfRag, "fingerprint_url", side_effect=fingerprint_url):
+            self.invoke_concurrently(3)
+            self.invoke_concurrently(1)
+            self.assertEqual(len(checks), 1)
+            with patch.object(rag, "FINGERPRINT_INTERVAL_SECONDS", 0.0):
+                self.invoke_concurrently(1)
+        self.assertEqual(len(checks), 2)
+        self.assertEqual(OfflineRag.loads, 1)
@@ -0,0 +1,140 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import json
+import os
+import tempfile
+from typing import Any
+from typing import Dict
+from typing import List
+from unittest import TestCase
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.embeddings import Embeddings
+
+from coded_tools.base_rag import BaseRag
+from coded_tools.base_rag import get_manifest_path
+
+
+class FakePagesRag(BaseRag):
+    """
+    BaseRag over an in-memory dictionary of pages, recording which pages were fetched.
+    """
+
+    def __init__(self, pages: Dict[str, str]):
+        super().__init__()
+        self.pages: Dict[str, str] = pages
+        self.fetched: List[str] = []
+
+    async def load_documents(self, loader_args: Any) -> List[Document]:
+        return await self.fetch(list(self.pages))
+
+    async def fetch(self, page_ids: List[str]) -> List[Document]:
+        """
+        :return: The documents of the given pages
+        """
+        self.fetched.extend(page_ids)
+        return [Document(page_content=self.pages[page_id], metadata={"id": page_id}) for page_id in page_ids]
+
+    def get_embeddings(self) -> Embeddings:
+        return DeterministicFakeEmbedding(size=16)
+
+    def split_documents(self, docs: List[Document]) -> List[Document]:
+        # One chunk per page, avoiding the download of the tiktoken encoding
+        return docs
+
+    def sync(self, versions: Dict[str, Any]):
+        """
+        Run an incremental sync of the pages with the given versions.
+        """
+        return asyncio.run(self.sync_vector_store(versions, self.fetch, "id", {"url": "fake"}))
+
+
+class TestBaseRagSync(TestCase):
+    """
+    Unit tests for the incremental vector store sync of BaseRag.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.pages = {"1": "first page", "2": "second page", "3": "third page"}
+        self.rag = FakePagesRag(self.pages)
+        self.rag.configure_vector_store_path(os.path.join(self.tmp.name, "store.npy"))
+        self.rag.save_vector_store = True
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_first_sync_fetches_all_pages(self):
+        """
+        Without a manifest every page is fetched, and the store and manifest are saved.
+        """
+        store = self.rag.sync({"1": 1, "2": 1, "3": 1})
+        self.assertEqual(sorted(self.rag.fetched), ["1", "2", "3"])
+        self.assertEqual(len(store), 3)
+        with open(get_manifest_path(self.rag.abs_vector_store_path), "r", encoding="utf-8") as file:
+            self.assertEqual(json.load(file)["documents"], {"1": 1, "2": 1, "3": 1})
+
+    def test_only_changed_pages_are_fetched(self):
+        """
+        A later sync fetches changed and new pages only and drops the chunks of removed pages.
+        """
+        self.rag.sync({"1": 1, "2": 1, "3": 1})
+        self.rag.fetched.clear()
+        self.pages["2"] = "second page, edited"
+        self.pages["4"] = "fourth page"
+
+        store = self.rag.sync({"1": 1, "2": 2, "4": 1})
+        self.assertEqual(sorted(self.rag.fetched), ["2", "4"])
+        self.assertEqual(sorted(store.texts), ["first page", "fourth page", "second page, edited"])
+
+        # Nothing changed: nothing is fetched and the saved store is reused
+        self.rag.fetched.clear()
+        store = self.rag.sync({"1": 1, "2": 2, "4": 1})
+        self.assertEqual(self.rag.fetched, [])
+        self.assertEqual(len(store), 3)
+
+    def test_failed_fetch_keeps_store(self):
+        """
+        A failing fetch leaves the saved store and manifest untouched so the sync is retried.
+        """
+        self.rag.sync({"1": 1, "2": 1, "3": 1})
+
+        async def fail(page_ids: List[str]) -> List[Document]:
+            raise ConnectionError(page_ids)
+
+        with self.assertRaises(ConnectionError):
+            asyncio.run(self.rag.sync_vector_store({"1": 2, "2": 1, "3": 1}, fail, "id", {"url": "fake"}))
+        self.rag.fetched.clear()
+        self.rag.sync({"1": 2, "2": 1, "3": 1})
+        self.assertEqual(self.rag.fetched, ["1"])
+
+    def test_corrupt_manifest_rebuilds_store(self):
+        """
+        A manifest that cannot be read is treated as missing, so every page is fetched again.
+        """
+        self.rag.sync({"1": 1, "2": 1, "3": 1})
+        with open(get_manifest_path(self.rag.abs_vector_store_path), "w", encoding="utf-8") as file:
+            file.write('{"source": ')
+        self.rag.fetched.clear()
+        store = self.rag.sync({"1": 1, "2": 1, "3": 1})
+        self.assertEqual(sorted(self.rag.fetched), ["1", "2", "3"])
+        self.assertEqual(len(store), 3)
+
+    def test_sync_honors_save_vector_store(self):
+        """
+        Without save_vector_store, the synced store is not written to vector_store_path.
+        """
+        self.rag.save_vector_store = False
+        store = self.rag.sync({"1": 1, "2": 1, "3": 1})
+        self.assertEqual(len(store), 3)
+        self.assertFalse(os.path.exists(self.rag.abs_vector_store_path))
+        self.assertFalse(os.path.exists(get_manifest_path(self.rag.abs_vector_store_path)))
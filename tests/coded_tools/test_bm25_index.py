@@ -0,0 +1,124 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from coded_tools.bm25_index import Bm25Index
+from coded_tools.bm25_index import get_sparse_index_path
+from coded_tools.bm25_index import reciprocal_rank_fusion
+from coded_tools.bm25_index import tokenize
+from coded_tools.numpy_vector_store import NumpyVectorStore
+
+
+class TestBm25Index(TestCase):
+    """
+    Unit tests for the BM25 index and hybrid search of NumpyVectorStore.
+    """
+
+    def setUp(self):
+        self.texts = [f"Claim {i} was filed under the standard home policy for water damage." for i in range(200)]
+        self.texts[137] = "Renewal notice for policy POL-2023-001, premium unchanged."
+
+    def test_tokenize_keeps_identifiers(self):
+        """
+        Identifiers should be kept whole and also split into their parts.
+        """
+        terms = tokenize("See POL-2023-001 and ERR_1042.")
+        self.assertIn("pol-2023-001", terms)
+        self.assertIn("2023", terms)
+        self.assertIn("err_1042", terms)
+        self.assertIn("1042", terms)
+
+    def test_identifier_ranks_first(self):
+        """
+        The only chunk containing an identifier should rank first, also after incremental adds.
+        """
+        index = Bm25Index()
+        index.build(self.texts[:100])
+        index.add(self.texts[100:])
+        hits = index.search("what is the premium of POL-2023-001?", k=3)
+        self.assertEqual(hits[0][0], 137)
+        self.assertEqual(index.search("nonexistent", k=3), [])
+
+    def test_save_and_load(self):
+        """
+        A saved index should load with the same postings and scores.
+        """
+        index = Bm25Index()
+        index.build(self.texts)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = get_sparse_index_path(os.path.join(tmp_dir, "store.npy"))
+            index.save(path)
+            loaded = Bm25Index()
+            loaded.load(path)
+        self.assertTrue(loaded.is_consistent(len(self.texts)))
+        self.assertEqual(loaded.search("water damage claim 42", k=5), index.search("water damage claim 42", k=5))
+
+    def test_reciprocal_rank_fusion(self):
+        """
+        Rows ranked well by both rankings should come first.
+        """
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=3)
+        self.assertEqual([row for row, _ in fused], [1, 3, 2])
+
+    def test_hybrid_search_finds_identifier(self):
+        """
+        Hybrid search should retrieve the identifier chunk that dense search with a
+        meaningless fake embedding misses, and persist the BM25 index with the store.
+        """
+        store = NumpyVectorStore.from_texts(self.texts, DeterministicFakeEmbedding(size=16))
+        store.set_sparse_index(Bm25Index())
+        query = "premium of POL-2023-001"
+        hybrid = asyncio.run(store.abatch_hybrid_search_with_score([query], k=4))[0]
+        self.assertIn(self.texts[137], [doc.page_content for doc, _ in hybrid])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "store.npy")
+            store.dump(path)
+            self.assertTrue(os.path.exists(get_sparse_index_path(path)))
+            loaded = NumpyVectorStore.load(path, DeterministicFakeEmbedding(size=16))
+            loaded.set_sparse_index(Bm25Index(), get_sparse_index_path(path))
+            self.assertEqual(loaded.sparse_index.search(query, k=1)[0][0], 137)
+
+    def test_hybrid_score_threshold_filters_fused_results(self):
+        """
+        The score threshold should apply to every fused chunk by its dense score, including chunks found by BM25 only.
+        """
+        store = NumpyVectorStore.from_texts(self.texts, DeterministicFakeEmbedding(size=16))
+        store.set_sparse_index(Bm25Index())
+        query = "premium of POL-2023-001"
+        query_vector = store.embedding.embed_query(query)
+        self.assertIn(137, [row for row, _ in store.hybrid_top_k([query], [query_vector], k=4)[0]])
+
+        # Just above the dense score of the identifier chunk, which BM25 alone ranks first
+        threshold = float(store.dense_scores([137], query_vector)[0]) + 1e-4
+        hits = store.hybrid_top_k([query], [query_vector], k=4, score_threshold=threshold)[0]
+        self.assertNotIn(137, [row for row, _ in hits])
+        self.assertTrue(
+            all(score >= threshold for score in store.dense_scores([row for row, _ in hits], query_vector))
+        )
+        self.assertEqual(store.hybrid_top_k([query], [query_vector], k=4, score_threshold=1.01), [[]])
+
+    def test_sparse_search_is_fast(self):
+        """
+        A BM25 query over thousands of chunks should take about a millisecond at most, with slack for slow CI machines.
+        """
+        index = Bm25Index()
+        index.build(f"chunk {i} about topic {i % 97} with code ERR_{i}" for i in range(10000))
+        index.search("warm up", k=10)
+        start = time.perf_counter()
+        for i in range(100):
+            index.search(f"code ERR_{i * 7}", k=10)
+        self.assertLess((time.perf_counter() - start) / 100, 0.005)
@@ -0,0 +1,122 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+from coded_tools.agent_session_pool import AgentSessionPool
+from coded_tools.call_agent import CallAgents
+
+LATENCIES = {"vc_text_ux": 0.2, "vc_text_scalability": 0.3, "vc_text_innovation": 0.25, "vc_text_complexity": 1.0}
+
+
+class NamedSession:
+    """
+    Fake agent session answering with the name of its agent network, after the latency of the network.
+    """
+
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+
+    def streaming_chat(self, chat_request):
+        """
+        Answer with the agent name and the inquiry, or fail for an unknown network.
+        """
+        if self.agent_name not in LATENCIES:
+            raise ConnectionError(f"{self.agent_name} is not served")
+        time.sleep(LATENCIES[self.agent_name])
+        yield {"response": {"type": "AI", "text": f"{self.agent_name}: {chat_request['user_message']['text']}"}}
+
+    def connectivity(self, _request):
+        """
+        Always reachable.
+        """
+        return {}
+
+    def close(self):
+        """
+        Nothing to close.
+        """
+
+
+class TestCallAgents(TestCase):
+    """
+    Unit tests for the fan-out of CallAgents across agent networks.
+    """
+
+    def setUp(self):
+        self.pool = AgentSessionPool(create_session=lambda agent_name, *_: NamedSession(agent_name))
+
+    def invoke(self, args, sly_data):
+        """
+        :return: The result of CallAgents, calling the fake sessions of the test pool
+        """
+        with patch("coded_tools.call_agent.get_agent_session_pool", return_value=self.pool):
+            return asyncio.run(CallAgents().async_invoke(args, sly_data))
+
+    def test_fan_out_takes_the_slowest_latency(self):
+        """
+        The calls should run concurrently, with their results in the order of the calls and the
+        conversation with each agent kept in the sly_data.
+        """
+        sly_data = {}
+        args = {
+            "inquiry": "Evaluate this repo",
+            "calls": [
+                {"agent_name": "vc_text_ux"},
+                ["vc_text_scalability", "Evaluate its scalability"],
+                {"agent_name": "vc_text_innovation", "inquiry": "Evaluate its novelty"},
+            ],
+        }
+        start = time.monotonic()
+        result = self.invoke(args, sly_data)
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(
+            result["results"],
+            [
+                {"agent_name": "vc_text_ux", "answer": "vc_text_ux: Evaluate this repo"},
+                {"agent_name": "vc_text_scalability", "answer": "vc_text_scalability: Evaluate its scalability"},
+                {"agent_name": "vc_text_innovation", "answer": "vc_text_innovation: Evaluate its novelty"},
+            ],
+        )
+        self.assertEqual(
+            sorted(sly_data["agent_state_infos"]), ["vc_text_innovation", "vc_text_scalability", "vc_text_ux"]
+        )
+
+    def test_partial_results(self):
+        """
+        A call over its own timeout or failing should report an error, without losing the answers
+        of the other calls.
+        """
+        args = {
+            "inquiry": "Evaluate this repo",
+            "timeout": 1.0,
+            "calls": [
+                {"agent_name": "vc_text_complexity", "timeout": 0.1},
+                {"agent_name": "vc_text_unknown"},
+                {"agent_name": "vc_text_ux"},
+            ],
+        }
+        start = time.monotonic()
+        results = self.invoke(args, {})["results"]
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(results[0], {"agent_name": "vc_text_complexity", "error": "No answer within 0.1 seconds."})
+        self.assertIn("not served", results[1]["error"])
+        self.assertEqual(results[2]["answer"], "vc_text_ux: Evaluate this repo")
+
+    def test_malformed_calls(self):
+        """
+        Calls without agent or inquiry should be reported before any agent is called.
+        """
+        self.assertTrue(self.invoke({"calls": []}, {}).startswith("Error"))
+        self.assertTrue(self.invoke({"calls": [{"inquiry": "Hi"}]}, {}).startswith("Error"))
+        self.assertTrue(self.invoke({"calls": [{"agent_name": "vc_text_ux"}]}, {}).startswith("Error"))
+        self.assertTrue(self.invoke({"calls": ["vc_text_ux"]}, {}).startswith("Error"))
@@ -0,0 +1,88 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+from unittest import TestCase
+
+from langchain_core.documents import Document
+
+from coded_tools.chunking import TOKEN_COUNT_KEY
+from coded_tools.chunking import ChunkMemo
+from coded_tools.chunking import DocumentChunker
+
+
+class CountingLength:  # pylint: disable=too-few-public-methods
+    """
+    Length function measuring texts in words and counting its calls.
+    """
+
+    def __init__(self):
+        self.calls: int = 0
+
+    def __call__(self, text: str) -> int:
+        self.calls += 1
+        return len(text.split())
+
+
+class TestChunking(TestCase):
+    """
+    Unit tests for DocumentChunker and ChunkMemo.
+    """
+
+    def setUp(self):
+        self.text = " ".join(f"word{i}" for i in range(200))
+
+    def test_chunks_respect_size(self):
+        """
+        Chunks stay within the chunk size and carry the metadata of their document and their token count.
+        """
+        length = CountingLength()
+        chunker = DocumentChunker(chunk_size=20, chunk_overlap=5, length_function=length, memo=ChunkMemo())
+        chunks = chunker.split_documents([Document(page_content=self.text, metadata={"source": "a.pdf"})])
+        self.assertGreater(len(chunks), 10)
+        self.assertTrue(all(length(chunk.page_content) <= 20 for chunk in chunks))
+        self.assertTrue(
+            all(chunk.metadata == {"source": "a.pdf", TOKEN_COUNT_KEY: length(chunk.page_content)} for chunk in chunks)
+        )
+        chunks[0].metadata["page"] = 1
+        self.assertNotIn("page", chunks[1].metadata)
+
+    def test_memo_skips_tokenization(self):
+        """
+        A document split before with the same settings is not tokenized again, other settings are.
+        """
+        memo = ChunkMemo()
+        length = CountingLength()
+        first = DocumentChunker(chunk_size=20, chunk_overlap=5, length_function=length, memo=memo)
+        chunks = first.split_text(self.text)
+        calls = length.calls
+        second = DocumentChunker(chunk_size=20, chunk_overlap=5, length_function=length, memo=memo)
+        self.assertEqual(second.split_text(self.text), chunks)
+        self.assertEqual(length.calls, calls)
+        DocumentChunker(chunk_size=40, chunk_overlap=5, length_function=length, memo=memo).split_text(self.text)
+        self.assertGreater(length.calls, calls)
+
+    def test_memo_evicts_least_recently_used(self):
+        """
+        The memo stays within its character limit by evicting the least recently used documents.
+        """
+        memo = ChunkMemo(max_chars=10)
+        memo.put("a", (("1234", 1),))
+        memo.put("b", (("1234", 1),))
+        memo.get("a")
+        memo.put("c", (("1234", 1),))
+        self.assertIsNone(memo.get("b"))
+        self.assertIsNotNone(memo.get("a"))
+        self.assertEqual(memo.total_chars, 8)
+
+    def test_invalid_settings(self):
+        """
+        An overlap not smaller than the chunk size is rejected.
+        """
+        with self.assertRaises(ValueError):
+            DocumentChunker(chunk_size=50, chunk_overlap=50)
@@ -0,0 +1,90 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import os
+import tempfile
+from typing import List
+from unittest import TestCase
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from coded_tools.embedding_cache import CachedEmbeddings
+from coded_tools.embedding_cache import EmbeddingCache
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """
+    Fake embedding model remembering which texts it was asked to embed.
+    """
+
+    embedded: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+class TestEmbeddingCache(TestCase):
+    """
+    Unit tests for EmbeddingCache and CachedEmbeddings.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.tmp_dir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_only_misses_are_embedded(self):
+        """
+        Texts already in the cache should not reach the wrapped model, even across cache instances.
+        """
+        model = CountingEmbeddings(size=8, embedded=[])
+        cache = EmbeddingCache(self.path)
+        embeddings = CachedEmbeddings(model, cache, model_name="fake")
+
+        first = embeddings.embed_documents(["a", "b", "a"])
+        self.assertEqual(model.embedded, ["a", "b"])
+        cache.close()
+
+        embeddings = CachedEmbeddings(model, EmbeddingCache(self.path), model_name="fake")
+        second = embeddings.embed_documents(["b", "c", "a"])
+        self.assertEqual(model.embedded, ["a", "b", "c"])
+        self.assertEqual(len(second), 3)
+        for expected, actual in zip(first[:2], [second[2], second[0]]):
+            for x, y in zip(expected, actual):
+                self.assertAlmostEqual(x, y, places=5)
+
+    def test_model_is_part_of_the_key(self):
+        """
+        The same text embedded by another model should be a miss.
+        """
+        model = CountingEmbeddings(size=8, embedded=[])
+        cache = EmbeddingCache(self.path)
+        CachedEmbeddings(model, cache, model_name="one").embed_documents(["a"])
+        CachedEmbeddings(model, cache, model_name="two").embed_documents(["a"])
+        self.assertEqual(model.embedded, ["a", "a"])
+
+    def test_lru_eviction(self):
+        """
+        The least recently used vectors should be evicted once the cache is over budget.
+        """
+        # Each 8-dimensional float32 vector takes 32 bytes, so only two fit
+        cache = EmbeddingCache(self.path, max_bytes=64)
+        cache.put_many("fake", ["a", "b"], [[0.0] * 8, [1.0] * 8])
+        # Touch "a" so that "b" becomes the least recently used entry
+        cache.get_many("fake", ["a"])
+        cache.put_many("fake", ["c"], [[2.0] * 8])
+
+        hits = cache.get_many("fake", ["a", "b", "c"])
+        self.assertIsNotNone(hits[0])
+        self.assertIsNone(hits[1])
+        self.assertEqual(hits[2], [2.0] * 8)
+        self.assertLessEqual(cache.total_bytes, 64)
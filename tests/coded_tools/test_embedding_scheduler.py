@@ -0,0 +1,187 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import os
+import tempfile
+from typing import List
+from unittest import TestCase
+
+import numpy as np
+from langchain_core.documents import Document
+
+from coded_tools.chunking import ChunkMemo
+from coded_tools.chunking import DocumentChunker
+from coded_tools.embedding_cache import CachedEmbeddings
+from coded_tools.embedding_cache import EmbeddingCache
+from coded_tools.embedding_scheduler import EmbeddingScheduler
+from coded_tools.embedding_scheduler import RateLimiter
+from coded_tools.embedding_scheduler import get_rate_limiter
+from coded_tools.numpy_vector_store import NumpyVectorStore
+from tests.benchmarks.fake_embeddings import FakeEmbeddingBackend
+from tests.benchmarks.fake_embeddings import FakeRateLimitError
+
+
+def count_words(text: str) -> int:
+    """
+    :return: Number of words of the text, standing in for its tokens
+    """
+    return len(text.split())
+
+
+def refuse_to_count(text: str) -> int:
+    """
+    Token counter failing the test, for texts whose token counts should come from the chunker.
+    """
+    raise AssertionError(f"Tokenized again: {text}")
+
+
+class FakeServerError(Exception):
+    """
+    Raised like an HTTP 503 response of an embedding API.
+    """
+
+    status_code: int = 503
+
+
+class FlakyBackend(FakeEmbeddingBackend):
+    """
+    Fake backend rejecting its first requests as rate limited.
+    """
+
+    def __init__(self, failures: int, error: Exception = None):
+        super().__init__(size=8, latency=0.0)
+        self.failures: int = failures
+        self.error: Exception = error or FakeRateLimitError(retry_after=0.01)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.failures > 0:
+            self.failures -= 1
+            raise self.error
+        return await super().aembed_documents(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.failures > 0:
+            self.failures -= 1
+            raise self.error
+        return super().embed_documents(texts)
+
+
+class TestEmbeddingScheduler(TestCase):
+    """
+    Unit tests for EmbeddingScheduler and RateLimiter.
+    """
+
+    def test_pack_respects_limits(self):
+        """
+        Batches stay within the token and size limits, keep the text order and
+        an oversized text gets a batch of its own.
+        """
+        scheduler = EmbeddingScheduler(
+            FakeEmbeddingBackend(), max_batch_tokens=4, max_batch_size=3, token_counter=count_words
+        )
+        texts = ["a b", "c", "d", "e", "f g h i j", "k"]
+        batches = scheduler.pack(texts)
+        self.assertEqual([batch for _, batch, _ in batches], [["a b", "c", "d"], ["e"], ["f g h i j"], ["k"]])
+        self.assertEqual([start for start, _, _ in batches], [0, 3, 4, 5])
+        self.assertEqual([tokens for _, _, tokens in batches], [4, 1, 5, 1])
+
+    def test_concurrent_batches_keep_order(self):
+        """
+        Batches embedded concurrently are returned aligned with the input texts.
+        """
+        backend = FakeEmbeddingBackend(size=8, latency=0.01)
+        scheduler = EmbeddingScheduler(
+            backend, limiter=RateLimiter(max_concurrency=4), max_batch_size=5, token_counter=count_words
+        )
+        texts = [f"text {i}" for i in range(47)]
+        vectors = asyncio.run(scheduler.aembed_documents(texts))
+        self.assertEqual(vectors, [backend.embed_text(text) for text in texts])
+        self.assertEqual(backend.requests, 10)
+        self.assertEqual(scheduler.embed_documents(texts[:3]), vectors[:3])
+
+    def test_chunk_token_counts_are_reused(self):
+        """
+        Chunks added to a vector store are packed on the token counts recorded by the chunker,
+        through the embedding cache, instead of being tokenized again.
+        """
+        chunker = DocumentChunker(chunk_size=20, chunk_overlap=5, length_function=count_words, memo=ChunkMemo())
+        chunks = chunker.split_documents([Document(page_content=" ".join(f"word{i}" for i in range(200)))])
+        backend = FakeEmbeddingBackend(size=8, latency=0.0)
+        scheduler = EmbeddingScheduler(backend, max_batch_tokens=50, token_counter=refuse_to_count)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = EmbeddingCache(os.path.join(tmp, "cache.sqlite"))
+            store = NumpyVectorStore(embedding=CachedEmbeddings(scheduler, cache))
+            asyncio.run(store.aadd_documents(chunks[:5]))
+            store.add_documents(chunks)
+            cache.close()
+        self.assertEqual(len(store.ids), len(chunks) + 5)
+        self.assertTrue(np.allclose(store.vectors[-1], backend.embed_text(chunks[-1].page_content), atol=1e-6))
+        # Batches of at most 50 tokens, i.e. a few chunks of up to 20 words each
+        self.assertGreater(backend.requests, 2)
+
+    def test_rate_limited_batches_are_retried(self):
+        """
+        Rate limited requests are retried after the advertised delay and lower the concurrency limit.
+        """
+        backend = FlakyBackend(failures=2)
+        limiter = RateLimiter(max_concurrency=4)
+        scheduler = EmbeddingScheduler(backend, limiter=limiter, max_batch_size=1, token_counter=count_words)
+        vectors = asyncio.run(scheduler.aembed_documents(["one"]))
+        self.assertEqual(vectors, [backend.embed_text("one")])
+        self.assertLess(limiter.limit, 4)
+
+    def test_rate_limit_gives_up(self):
+        """
+        A batch still rate limited after the retries raises the rate limit error.
+        """
+        scheduler = EmbeddingScheduler(FlakyBackend(failures=5), max_retries=1, token_counter=count_words)
+        with self.assertRaises(FakeRateLimitError):
+            asyncio.run(scheduler.aembed_documents(["one"]))
+        self.assertEqual(scheduler.limiter.in_flight, 0)
+
+    def test_transient_errors_are_retried(self):
+        """
+        Server errors are retried without lowering the concurrency, and other errors are not retried.
+        """
+        scheduler = EmbeddingScheduler(
+            FlakyBackend(failures=2, error=FakeServerError()), initial_backoff=0.01, token_counter=count_words
+        )
+        self.assertEqual(len(scheduler.embed_documents(["one", "two"])), 2)
+        self.assertEqual(len(asyncio.run(scheduler.aembed_documents(["three"]))), 1)
+        self.assertEqual(scheduler.limiter.limit, scheduler.limiter.max_concurrency)
+
+        scheduler = EmbeddingScheduler(
+            FlakyBackend(failures=1, error=ValueError("bad input")), token_counter=count_words
+        )
+        with self.assertRaises(ValueError):
+            scheduler.embed_documents(["one"])
+        self.assertEqual(scheduler.limiter.in_flight, 0)
+
+    def test_tokens_per_minute(self):
+        """
+        The limiter holds back a request that would exceed the tokens-per-minute quota.
+        """
+        limiter = RateLimiter(max_concurrency=8, tokens_per_minute=100)
+        self.assertEqual(limiter.try_acquire(60), 0.0)
+        limiter.release()
+        self.assertGreater(limiter.try_acquire(60), 0.0)
+        self.assertEqual(limiter.try_acquire(40), 0.0)
+
+    def test_shared_limiter_keeps_the_tightest_limits(self):
+        """
+        Tools sharing the limiter of a model should not loosen each other's limits.
+        """
+        limiter = get_rate_limiter("test-shared-model", max_concurrency=2, tokens_per_minute=1000)
+        self.assertIs(get_rate_limiter("test-shared-model"), limiter)
+        self.assertEqual((limiter.max_concurrency, limiter.tokens_per_minute), (2, 1000))
+        get_rate_limiter("test-shared-model", max_concurrency=8, tokens_per_minute=5000)
+        self.assertEqual((limiter.max_concurrency, limiter.tokens_per_minute), (2, 1000))
+        get_rate_limiter("test-shared-model", max_concurrency=1, tokens_per_minute=500)
+        self.assertEqual((limiter.max_concurrency, limiter.tokens_per_minute), (1, 500))
@@ -0,0 +1,122 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from coded_tools.numpy_vector_store import NumpyVectorStore
+from coded_tools.numpy_vector_store import get_metadata_path
+
+
+class TestNumpyVectorStore(TestCase):
+    """
+    Unit tests for NumpyVectorStore.
+    """
+
+    def setUp(self):
+        self.embedding = DeterministicFakeEmbedding(size=16)
+        self.texts = ["alpha", "beta", "gamma", "delta"]
+        self.metadatas = [{"page": i} for i in range(len(self.texts))]
+
+    def test_exact_match_ranks_first(self):
+        """
+        Searching for the text of a chunk should return that chunk first with a cosine similarity of 1.
+        """
+        store = NumpyVectorStore.from_texts(self.texts, self.embedding, metadatas=self.metadatas)
+        results = store.similarity_search_with_score("gamma", k=2)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0][0].page_content, "gamma")
+        self.assertEqual(results[0][0].metadata, {"page": 2})
+        self.assertAlmostEqual(results[0][1], 1.0, places=5)
+        self.assertGreaterEqual(results[0][1], results[1][1])
+
+    def test_dump_and_memory_mapped_load(self):
+        """
+        A dumped store should load memory-mapped and answer queries the same way.
+        """
+        store = NumpyVectorStore.from_texts(self.texts, self.embedding, metadatas=self.metadatas)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "store.npy")
+            store.dump(path)
+            self.assertTrue(os.path.exists(get_metadata_path(path)))
+
+            loaded = NumpyVectorStore.load(path, self.embedding)
+            self.assertIsInstance(loaded.vectors, np.memmap)
+            self.assertEqual(loaded.vectors.dtype, np.float32)
+            self.assertEqual(loaded.ids, store.ids)
+            self.assertEqual(loaded.similarity_search("beta", k=1)[0].page_content, "beta")
+
+            # Adding to a loaded store works on an in-memory copy
+            loaded.add_texts(["epsilon"])
+            self.assertEqual(len(loaded), 5)
+            self.assertEqual(loaded.similarity_search("epsilon", k=1)[0].page_content, "epsilon")
+
+    def test_load_rejects_a_mismatched_sidecar(self):
+        """
+        A matrix saved without its metadata sidecar, e.g. by an interrupted dump, should not load.
+        """
+        store = NumpyVectorStore.from_texts(self.texts, self.embedding, metadatas=self.metadatas)
+        other = NumpyVectorStore.from_texts(self.texts[::-1], self.embedding, metadatas=self.metadatas)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "store.npy")
+            other_path = os.path.join(tmp_dir, "other.npy")
+            store.dump(path)
+            other.dump(other_path)
+            os.replace(other_path, path)
+            with self.assertRaises(ValueError):
+                NumpyVectorStore.load(path, self.embedding)
+
+    def test_delete(self):
+        """
+        Deleted chunks should no longer be returned.
+        """
+        store = NumpyVectorStore.from_texts(self.texts, self.embedding, ids=["a", "b", "c", "d"])
+        self.assertTrue(store.delete(["b"]))
+        self.assertEqual(store.ids, ["a", "c", "d"])
+        self.assertEqual(store.vectors.shape, (3, 16))
+        self.assertNotIn("beta", [doc.page_content for doc in store.similarity_search("beta", k=3)])
+
+    def test_batched_top_k_matches_brute_force(self):
+        """
+        Batched top-k with a partial sort should match a full sort of the cosine similarities.
+        """
+        rng = np.random.default_rng(seed=0)
+        vectors = rng.normal(size=(200, 16))
+        store = NumpyVectorStore(self.embedding)
+        store.add_vectors(vectors, [str(i) for i in range(200)])
+
+        queries = rng.normal(size=(3, 16))
+        results = store.top_k(queries, k=5)
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        for query, hits in zip(queries, results):
+            expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+            self.assertEqual([row for row, _ in hits], expected.tolist())
+
+        # A threshold above every score filters everything out
+        self.assertEqual(store.top_k(queries, k=5, score_threshold=1.1), [[], [], []])
+
+    def test_langchain_json_round_trip(self):
+        """
+        A .json path should use the format of langchain's InMemoryVectorStore.
+        """
+        store = NumpyVectorStore.from_texts(self.texts, self.embedding, metadatas=self.metadatas)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "store.json")
+            store.dump(path)
+            in_memory = InMemoryVectorStore.load(path, self.embedding)
+            self.assertEqual(in_memory.similarity_search("delta", k=1)[0].page_content, "delta")
+
+            loaded = NumpyVectorStore.load(path, self.embedding)
+            self.assertEqual(loaded.ids, store.ids)
+            self.assertEqual(loaded.similarity_search("delta", k=1)[0].metadata, {"page": 3})
@@ -0,0 +1,126 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+import os
+import tempfile
+from typing import List
+from unittest import TestCase
+
+import pymupdf
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.embeddings import Embeddings
+
+from coded_tools.numpy_vector_store import NumpyVectorStore
+from coded_tools.numpy_vector_store import get_metadata_path
+from coded_tools.pdf_rag import PdfRag
+from coded_tools.pdf_rag import get_parse_pool
+
+
+class OfflinePdfRag(PdfRag):
+    """
+    PdfRag with fake embeddings and one chunk per page, so that no network access is needed.
+    """
+
+    def get_embeddings(self) -> Embeddings:
+        return DeterministicFakeEmbedding(size=16)
+
+    def split_documents(self, docs: List[Document]) -> List[Document]:
+        return docs
+
+
+class TestPdfRag(TestCase):
+    """
+    Unit tests for the PdfRag ingestion pipeline.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.urls: List[str] = []
+        for pdf in range(3):
+            path = os.path.join(self.tmp.name, f"policy_{pdf}.pdf")
+            with pymupdf.open() as document:
+                for page in range(2):
+                    document.new_page().insert_text((72, 72), f"policy {pdf} page {page}")
+                document.save(path)
+            self.urls.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, parse_workers: int, urls: List[str], vector_store_path: str = None):
+        """
+        :return: The vector store built from the given PDFs, or loaded from vector_store_path
+        """
+        rag = OfflinePdfRag()
+        rag.parse_workers = parse_workers
+        rag.configure_ingest_batch_size(4)
+        if vector_store_path:
+            rag.configure_vector_store_path(vector_store_path)
+            rag.save_vector_store = True
+        return asyncio.run(rag.build_vector_store({"urls": urls}))
+
+    def test_process_pool_loads_all_pages(self):
+        """
+        PDFs parsed in worker processes are all embedded, across several embedding batches.
+        """
+        store = self.build(2, self.urls)
+        self.assertEqual(len(store), 6)
+        self.assertIn("policy 2 page 1", {text.strip() for text in store.texts})
+
+    def test_missing_pdf_is_skipped(self):
+        """
+        A missing PDF is logged and skipped without failing the other PDFs.
+        """
+        store = self.build(0, self.urls[:1] + [os.path.join(self.tmp.name, "missing.pdf")])
+        self.assertEqual(sorted(text.strip() for text in store.texts), ["policy 0 page 0", "policy 0 page 1"])
+
+    def test_unreadable_pdf_is_skipped(self):
+        """
+        A PDF the parser rejects is logged and skipped, and the process pool is reused across calls.
+        """
+        bad = os.path.join(self.tmp.name, "bad.pdf")
+        with open(bad, "w", encoding="utf-8") as file:
+            file.write("not a pdf")
+        store = self.build(2, [bad] + self.urls[:1])
+        self.assertEqual(sorted(text.strip() for text in store.texts), ["policy 0 page 0", "policy 0 page 1"])
+        pool = get_parse_pool(2)
+        self.assertEqual(len(self.build(2, self.urls[1:])), 4)
+        self.assertIs(get_parse_pool(2), pool)
+
+    def test_changed_pdf_rebuilds_persisted_store(self):
+        """
+        The persisted vector store should be loaded while its PDF is unchanged, and rebuilt once it changes.
+        """
+        path = os.path.join(self.tmp.name, "store.npy")
+        self.build(0, self.urls[:1], path)
+        saved = os.stat(path).st_mtime_ns
+        self.build(0, self.urls[:1], path)
+        self.assertEqual(os.stat(path).st_mtime_ns, saved)
+
+        with pymupdf.open() as document:
+            document.new_page().insert_text((72, 72), "policy 0 revised")
+            document.save(self.urls[0])
+        stat = os.stat(self.urls[0])
+        os.utime(self.urls[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        store = self.build(0, self.urls[:1], path)
+        self.assertEqual([text.strip() for text in store.texts], ["policy 0 revised"])
+
+    def test_corrupt_persisted_store_is_rebuilt(self):
+        """
+        A persisted vector store that cannot be loaded should be rebuilt rather than fail the query.
+        """
+        path = os.path.join(self.tmp.name, "store.npy")
+        self.build(0, self.urls[:1], path)
+        with open(get_metadata_path(path), "w", encoding="utf-8") as file:
+            file.write('{"ids": [')
+        store = self.build(0, self.urls[:1], path)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(len(NumpyVectorStore.load(path, store.embedding)), 2)
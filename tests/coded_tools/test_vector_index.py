@@ -0,0 +1,120 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import importlib.util
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from coded_tools.numpy_vector_store import normalize
+from coded_tools.vector_index import IvfIndex
+from coded_tools.vector_index import create_vector_index
+from coded_tools.vector_index import exact_top_k
+
+
+def make_vectors(count: int, seed: int = 0) -> np.ndarray:
+    """
+    :return: Normalized vectors clustered around a few random centers
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(20, 32))
+    return normalize(centers[rng.integers(20, size=count)] + 0.5 * rng.normal(size=(count, 32)))
+
+
+class TestVectorIndex(TestCase):
+    """
+    Unit tests for the approximate nearest neighbor indexes of NumpyVectorStore.
+    """
+
+    def assert_recall(self, index: IvfIndex, vectors: np.ndarray, minimum: float):
+        """
+        Check the recall@10 of the index against exact search.
+        """
+        queries = vectors[:50]
+        found = 0
+        for query, hits in zip(queries, index.search(vectors, queries, 10)):
+            expected = {row for row, _ in exact_top_k(vectors @ query, np.arange(len(vectors)), 10)}
+            found += len(expected & {row for row, _ in hits})
+        self.assertGreaterEqual(found / (10 * len(queries)), minimum)
+
+    def test_ivf_recall(self):
+        """
+        Probing a fraction of the clusters still finds most of the exact neighbors.
+        """
+        vectors = make_vectors(4000)
+        index = IvfIndex(nprobe=16)
+        index.build(vectors)
+        self.assertTrue(index.trained)
+        self.assert_recall(index, vectors, 0.9)
+
+    def test_ivf_incremental_add(self):
+        """
+        Rows appended after training are inserted into the existing clusters and are searchable.
+        """
+        vectors = make_vectors(3000)
+        index = IvfIndex(nprobe=16)
+        index.build(vectors[:2000])
+        index.add(vectors, 2000)
+        self.assertTrue(index.is_consistent(vectors))
+        self.assertEqual(sum(len(rows) for rows in index.lists), 3000)
+        row, score = index.search(vectors, vectors[2500:2501], 1)[0][0]
+        self.assertEqual(row, 2500)
+        self.assertAlmostEqual(score, 1.0, places=5)
+
+    def test_ivf_small_store_stays_exact(self):
+        """
+        Below the training size the index is not trained and search is exact.
+        """
+        vectors = make_vectors(100)
+        index = IvfIndex()
+        index.add(vectors, 0)
+        self.assertFalse(index.trained)
+        self.assertEqual(index.search(vectors, vectors[7:8], 1)[0][0][0], 7)
+
+    def test_ivf_save_load(self):
+        """
+        A persisted index is reloaded identically and detects a matrix it does not cover.
+        """
+        vectors = make_vectors(2000)
+        index = IvfIndex()
+        index.build(vectors)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "vector_store.ivf.index")
+            index.save(path)
+            loaded = IvfIndex()
+            loaded.load(path)
+        np.testing.assert_array_equal(loaded.assignments, index.assignments)
+        self.assertTrue(loaded.is_consistent(vectors))
+        self.assertFalse(loaded.is_consistent(vectors[:-1]))
+
+    def test_create_vector_index(self):
+        """
+        The kind selects the index, "faiss" falls back to IVF without faiss and unknown kinds are rejected.
+        """
+        self.assertIsNone(create_vector_index("exact"))
+        self.assertIsInstance(create_vector_index("ivf", {"nprobe": 4}), IvfIndex)
+        if importlib.util.find_spec("faiss") is None:
+            self.assertIsInstance(create_vector_index("faiss", {"ef_search": 32}), IvfIndex)
+        with self.assertRaises(ValueError):
+            create_vector_index("annoy")
+
+    def test_create_vector_index_rejects_unknown_params(self):
+        """
+        A parameter the kind of index does not take should be rejected by name.
+        """
+        with self.assertRaisesRegex(ValueError, "'n_probe'"):
+            create_vector_index("ivf", {"n_probe": 4})
+        with self.assertRaisesRegex(ValueError, "'ef_search'"):
+            create_vector_index("ivf", {"ef_search": 32})
+        with self.assertRaisesRegex(ValueError, "'nprobe'"):
+            create_vector_index("exact", {"nprobe": 4})
+        if importlib.util.find_spec("faiss") is None:
+            self.assertIsInstance(create_vector_index("faiss", {"ef_search": 32, "nprobe": 4}), IvfIndex)
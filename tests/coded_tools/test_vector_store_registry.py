@@ -0,0 +1,81 @@
+# Copyright (C) 2023-2025 Cognizant Digital Business, Evolutionary AI.
+# All Rights Reserved.
+# Issued under the Academic Public License.
+#
+# You can be released from the terms, and requirements of the Academic Public
+# License by purchasing a commercial license.
+# Purchase of a commercial license is mandatory for any use of the
+# neuro-san-studio SDK Software in commercial settings.
+#
+import asyncio
+from unittest import TestCase
+
+from langchain_community.vectorstores import InMemoryVectorStore
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from coded_tools.vector_store_registry import VectorStoreRegistry
+from coded_tools.vector_store_registry import estimate_vector_store_size
+
+
+class TestVectorStoreRegistry(TestCase):
+    """
+    Unit tests for VectorStoreRegistry.
+    """
+
+    def setUp(self):
+        self.builds = 0
+
+    async def build(self) -> InMemoryVectorStore:
+        """
+        Slow fake build counting how often it is called.
+        """
+        self.builds += 1
+        await asyncio.sleep(0.05)
+        return await InMemoryVectorStore.afrom_texts(["some text"], embedding=DeterministicFakeEmbedding(size=4))
+
+    def test_concurrent_callers_share_one_build(self):
+        """
+        Concurrent callers for the same key should wait on a single build, and later callers reuse it.
+        """
+        registry = VectorStoreRegistry()
+
+        async def run():
+            stores = await asyncio.gather(*(registry.get_or_build("key", self.build) for _ in range(5)))
+            stores.append(await registry.get_or_build("key", self.build))
+            return stores
+
+        stores = asyncio.run(run())
+        self.assertEqual(self.builds, 1)
+        self.assertTrue(all(store is stores[0] for store in stores))
+
+    def test_ttl_expiry(self):
+        """
+        An expired store should be rebuilt.
+        """
+        registry = VectorStoreRegistry(ttl_seconds=0.0)
+        asyncio.run(registry.get_or_build("key", self.build))
+        asyncio.run(registry.get_or_build("key", self.build))
+        self.assertEqual(self.builds, 2)
+
+    def test_memory_cap_evicts_least_recently_used(self):
+        """
+        Registering stores beyond the memory cap should evict the least recently used one.
+        """
+        first = asyncio.run(self.build())
+        # Room for exactly two stores
+        registry = VectorStoreRegistry(max_bytes=2 * estimate_vector_store_size(first))
+        registry.put("a", first)
+        registry.put("b", asyncio.run(self.build()))
+        registry.get("a")
+        registry.put("c", asyncio.run(self.build()))
+        self.assertIsNotNone(registry.get("a"))
+        self.assertIsNone(registry.get("b"))
+        self.assertIsNotNone(registry.get("c"))
+
+    def test_key_depends_on_fingerprints(self):
+        """
+        A changed source fingerprint should produce a different key, while argument order should not matter.
+        """
+        key = VectorStoreRegistry.make_key("PdfRag", {"urls": ["a.pdf"], "x": 1}, ["a.pdf|1"])
+        self.assertEqual(key, VectorStoreRegistry.make_key("PdfRag", {"x": 1, "urls": ["a.pdf"]}, ["a.pdf|1"]))
+        self.assertNotEqual(key, VectorStoreRegistry.make_key("PdfRag", {"urls": ["a.pdf"], "x": 1}, ["a.pdf|2"]))